@@ -1,13 +1,24 @@
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
+import hashlib
 import os
+import threading
+import time
+import cachetools
 from dotenv import load_dotenv
+from services.metrics import metrics
 
 load_dotenv()
 
 SECRET_KEY = os.getenv("JWT_SECRET")
 ALGORITHM = "HS256"
 
+# sha256(token) -> (claims, exp); a token is verified once and then served
+# from memory until it expires
+_verified = cachetools.LRUCache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "10000")))
+_verified_lock = threading.Lock()
+_cache_counts = {"hits": 0, "misses": 0}
+
 def create_token(data: dict, expires_delta: int = 60):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=expires_delta)
@@ -16,8 +27,36 @@ def create_token(data: dict, expires_delta: int = 60):
     return encoded_jwt
 
 def decode_token(token: str):
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    now = time.time()
+    with _verified_lock:
+        entry = _verified.get(key)
+        if entry and entry[1] > now:
+            _cache_counts["hits"] += 1
+            return dict(entry[0])
+        _cache_counts["misses"] += 1
+
     try:
         decoded = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return decoded
     except JWTError:
         return None
+
+    # Only tokens that expire are cached, and only until they do
+    exp = decoded.get("exp")
+    if isinstance(exp, (int, float)):
+        with _verified_lock:
+            _verified[key] = (dict(decoded), exp)
+    return decoded
+
+def token_cache_stats():
+    with _verified_lock:
+        lookups = _cache_counts["hits"] + _cache_counts["misses"]
+        return {
+            "size": len(_verified),
+            "max_size": _verified.maxsize,
+            **_cache_counts,
+            "hit_ratio": round(_cache_counts["hits"] / lookups, 4) if lookups else None,
+        }
+
+metrics.register_gauges("cache_hit_ratio", "Hit ratio of in-process caches", ("cache",),
+                        lambda: {("jwt",): token_cache_stats()["hit_ratio"]})
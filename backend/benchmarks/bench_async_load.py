@@ -0,0 +1,112 @@
+"""p50/p99 latency under concurrent load, blocking vs non-blocking handlers.
+
+Serves the real /suggestions/smart route next to a copy of its old shape
+(blocking work called inline from an async handler) and fires requests at
+both through httpx's ASGI transport at a fixed arrival rate. A cheap
+endpoint is hit at the same time to show how much the blocking variant
+stalls everyone else.
+Model inference is replaced by a fixed-duration stub so the numbers measure
+the event loop, not the model.
+
+    python benchmarks/bench_async_load.py --rate 60 --requests 400
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("JWT_SECRET", "bench-secret")
+os.environ.setdefault("SCHEDULER_ENABLED", "0")
+
+import httpx
+from fastapi import FastAPI, Depends
+import dependencies
+from routes import suggestion
+
+# The services log at INFO; one line per request would swamp the report
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def fake_inference(record, service_time):
+    # Stands in for the yfinance download + model forward pass
+    time.sleep(service_time)
+    return [{"symbol": s["symbol"], "action": "hold"} for s in record["stocks"]]
+
+
+def build_app(service_time):
+    app = FastAPI()
+    app.include_router(suggestion.router)
+
+    async def portfolio():
+        return {"user_id": "bench", "stocks": [{"symbol": "AAPL", "quantity": 1}]}
+
+    app.dependency_overrides[dependencies.get_portfolio] = portfolio
+    suggestion.generate_suggestion_smart = lambda record: fake_inference(record, service_time)
+    suggestion.scheduler.lookup = lambda symbols: [None] * len(symbols)
+
+    # The handler before the change: async, but the work runs on the event loop
+    @app.get("/suggestions/blocking")
+    async def blocking_suggestions(record: dict = Depends(dependencies.get_portfolio)):
+        return {"suggestions": fake_inference(record, service_time)}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def run(app, path, rate, total):
+    """Open-loop load: request i is due at i / rate seconds, whatever came before.
+
+    Latency runs from the due time, so time spent waiting for a stalled event
+    loop to get around to sending the request counts against it.
+    """
+    latencies = {path: [], "/ping": []}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        async def one(i, url):
+            due = start + i / rate
+            await asyncio.sleep(due - loop.time())
+            response = await client.get(url)
+            response.raise_for_status()
+            latencies[url].append(loop.time() - due)
+
+        # Every fourth request is the cheap endpoint
+        await asyncio.gather(*(one(i, "/ping" if i % 4 == 0 else path) for i in range(total)))
+        elapsed = loop.time() - start
+    return latencies, elapsed
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=60, help="requests per second")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--service-ms", type=float, default=20, help="duration of one stubbed inference")
+    args = parser.parse_args()
+
+    app = build_app(args.service_ms / 1000)
+    print(f"{args.requests} requests at {args.rate:g}/s, {args.service_ms:g} ms per inference, "
+          f"{os.getenv('INFERENCE_WORKERS', '2')} inference workers\n")
+    print(f"{'handler':<28}{'endpoint':<22}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for label, path in (("blocking (before)", "/suggestions/blocking"), ("executor (after)", "/suggestions/smart")):
+        latencies, elapsed = asyncio.run(run(app, path, args.rate, args.requests))
+        for url, values in latencies.items():
+            print(f"{label:<28}{url:<22}{percentile(values, 50):>10.1f}{percentile(values, 99):>10.1f}"
+                  f"{len(values) / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Per-request auth overhead with and without the verified-token cache.
+
+First times decode_token() alone: a full jose verification vs a cache hit.
+Then sends authenticated requests through FastAPI to an endpoint that, like
+the portfolio routes, depends on the user and on their portfolio from two
+places, and reports latency and portfolio reads per request.
+
+    python benchmarks/bench_auth.py --requests 2000
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("JWT_SECRET", "bench-secret")
+
+import httpx
+from fastapi import FastAPI, Depends
+import auth
+import dependencies
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+class StubPortfolios:
+    """Stands in for the Motor collection and counts reads"""
+
+    def __init__(self):
+        self.reads = 0
+
+    async def find_one(self, query):
+        self.reads += 1
+        return {"user_id": query["user_id"], "stocks": [{"symbol": "AAPL", "quantity": 1}]}
+
+
+def time_decode(token, n, cached):
+    auth._verified.clear()
+    started = time.perf_counter()
+    for _ in range(n):
+        if not cached:
+            auth._verified.clear()
+        auth.decode_token(token)
+    return (time.perf_counter() - started) / n
+
+
+def build_app(portfolios):
+    app = FastAPI()
+    dependencies.async_portfolio_collection = portfolios
+
+    async def holdings(record: dict = Depends(dependencies.get_portfolio)):
+        return [s["symbol"] for s in record["stocks"]]
+
+    @app.get("/dashboard")
+    async def dashboard(user: dict = Depends(dependencies.get_current_user),
+                        record: dict = Depends(dependencies.get_portfolio),
+                        symbols: list = Depends(holdings)):
+        return {"user_id": user["user_id"], "positions": len(record["stocks"]), "symbols": symbols}
+
+    @app.get("/public")
+    async def public():
+        return {"ok": True}
+
+    return app
+
+
+async def time_requests(app, token, n, path, cached):
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        await client.get(path)  # warm-up
+        auth._verified.clear()
+        started = time.perf_counter()
+        for _ in range(n):
+            if not cached:
+                auth._verified.clear()
+            response = await client.get(path)
+            response.raise_for_status()
+        return (time.perf_counter() - started) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--decodes", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    token = auth.create_token({"user_id": "bench", "name": "Bench User"})
+    verify = time_decode(token, args.decodes, cached=False)
+    hit = time_decode(token, args.decodes, cached=True)
+    print(f"decode_token: full verification {verify * 1e6:.1f} us, cache hit {hit * 1e6:.1f} us "
+          f"({verify / hit:.0f}x)\n")
+
+    portfolios = StubPortfolios()
+    app = build_app(portfolios)
+    baseline = asyncio.run(time_requests(app, token, args.requests, "/public", cached=True))
+    print(f"{'request':<34}{'us/request':>12}{'auth+deps us':>14}{'portfolio reads':>17}")
+    print(f"{'no auth (/public)':<34}{baseline * 1e6:>12.0f}{'':>14}{'':>17}")
+    for label, cached in (("verify every request", False), ("verified-token cache", True)):
+        portfolios.reads = 0
+        per_request = asyncio.run(time_requests(app, token, args.requests, "/dashboard", cached))
+        reads = portfolios.reads / (args.requests + 1)
+        print(f"{label:<34}{per_request * 1e6:>12.0f}{(per_request - baseline) * 1e6:>14.0f}{reads:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
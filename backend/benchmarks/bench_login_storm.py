@@ -0,0 +1,122 @@
+"""Latency of other endpoints while a login storm is running.
+
+A steady stream of requests to a sync endpoint (the shape of the portfolio
+and stock routes, which run on FastAPI's threadpool) is timed while bursts
+of logins arrive. The old login handler ran bcrypt inline in a sync handler,
+so logins took over the shared threadpool; the current one hashes on the
+bounded bcrypt pool and sheds excess logins with a 503. Mongo is stubbed.
+
+    python benchmarks/bench_login_storm.py --logins 150 --rounds 10
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import statistics
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("JWT_SECRET", "bench-secret")
+
+import bcrypt
+import httpx
+from fastapi import FastAPI, HTTPException
+from models import LoginUser
+from routes import user as user_routes
+from services.passwords import hasher
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+PASSWORD = "Benchmark1"
+
+
+class StubUsers:
+    def __init__(self, hashed):
+        self.record = {"user_id": "bench", "name": "Bench User", "password": hashed}
+
+    async def find_one(self, query):
+        return self.record if query.get("user_id") == "bench" else None
+
+    async def update_one(self, query, update):
+        pass
+
+
+def build_app(work_ms):
+    app = FastAPI()
+    app.include_router(user_routes.router, prefix="/auth")
+
+    # The handler before the change: bcrypt on FastAPI's shared threadpool
+    @app.post("/auth/login-inline")
+    def login_inline(user: LoginUser):
+        record = {"password": user_routes.async_users_collection.record["password"]}
+        if not bcrypt.checkpw(user.password.encode("utf-8"), record["password"]):
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        return {"message": "Login successful"}
+
+    @app.get("/portfolio-like")
+    def portfolio_like():
+        # Blocking database call + a little CPU, as the sync routes do
+        time.sleep(work_ms / 1000)
+        return {"stocks": []}
+
+    return app
+
+
+async def run(app, login_path, args):
+    transport = httpx.ASGITransport(app=app)
+    latencies, outcomes = [], Counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        async def probe(i):
+            due = start + i / args.rate
+            await asyncio.sleep(due - loop.time())
+            await client.get("/portfolio-like")
+            latencies.append(loop.time() - due)
+
+        async def login(i):
+            # Logins arrive in bursts spread over the run
+            burst = i * args.bursts // args.logins
+            await asyncio.sleep(start + burst * args.seconds / args.bursts - loop.time())
+            response = await client.post(login_path, json={"user_id": "bench", "password": PASSWORD})
+            outcomes[response.status_code] += 1
+
+        probes = int(args.rate * args.seconds)
+        await asyncio.gather(*(probe(i) for i in range(probes)), *(login(i) for i in range(args.logins)))
+        elapsed = loop.time() - start
+    return latencies, outcomes, elapsed
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=150)
+    parser.add_argument("--bursts", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt cost factor")
+    parser.add_argument("--rate", type=float, default=50, help="other requests per second")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--work-ms", type=float, default=5, help="blocking time of the other endpoint")
+    args = parser.parse_args()
+
+    hasher.rounds = args.rounds
+    user_routes.async_users_collection = StubUsers(bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(args.rounds)))
+    app = build_app(args.work_ms)
+
+    print(f"{args.logins} logins in {args.bursts} bursts over {args.seconds:g}s, bcrypt cost {args.rounds}; "
+          f"other endpoint at {args.rate:g}/s\n")
+    print(f"{'login handler':<26}{'other p50 ms':>14}{'other p99 ms':>14}{'run s':>8}   login responses")
+    for label, path in (("inline (before)", "/auth/login-inline"), ("bcrypt pool (after)", "/auth/login")):
+        latencies, outcomes, elapsed = asyncio.run(run(app, path, args))
+        responses = ", ".join(f"{status}: {count}" for status, count in sorted(outcomes.items()))
+        print(f"{label:<26}{percentile(latencies, 50):>14.1f}{percentile(latencies, 99):>14.1f}"
+              f"{elapsed:>8.1f}   {responses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""LSTM serving cost: NumPy forward pass vs TensorFlow/Keras.
+
+Each runtime is measured in a fresh process: RSS after loading the model and
+latency of predict() per batch size. The NumPy runtime loads
+ml/models/lstm_model.npz; the TF side rebuilds the same architecture with
+those weights, so both compute the same function.
+
+    python benchmarks/bench_lstm_runtime.py --batches 1 32 256
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND)
+
+PROBE = """
+import json, sys, time
+import numpy as np
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+
+runtime, weights, batches, repeats = sys.argv[1], sys.argv[2], json.loads(sys.argv[3]), int(sys.argv[4])
+before = rss_mb()
+started = time.perf_counter()
+if runtime == "numpy":
+    from ml.lstm_runtime import NumpyLSTM
+    model = NumpyLSTM.load(weights)
+else:
+    import tensorflow as tf
+    tf.get_logger().setLevel("ERROR")
+    with np.load(weights) as w:
+        window, units = int(w["window"]), w["recurrent_kernel"].shape[0]
+        model = tf.keras.Sequential([
+            tf.keras.Input((window, w["kernel"].shape[0])),
+            tf.keras.layers.LSTM(units),
+            tf.keras.layers.Dense(1, activation="sigmoid"),
+        ])
+        model.layers[0].set_weights([w["kernel"], w["recurrent_kernel"], w["bias"]])
+        model.layers[1].set_weights([w["dense_kernel"], w["dense_bias"]])
+load = time.perf_counter() - started
+
+window = model.input_shape[1]
+latency = {}
+for batch in batches:
+    x = np.random.default_rng(0).random((batch, window, 1)).astype(np.float32)
+    model.predict(x, verbose=0)  # warm-up (graph tracing on the TF side)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        model.predict(x, verbose=0)
+    latency[batch] = (time.perf_counter() - started) / repeats
+print(json.dumps({"load_s": load, "rss_mb": rss_mb(), "rss_delta_mb": rss_mb() - before, "latency": latency}))
+"""
+
+
+def ensure_weights(path):
+    """Synthetic weights with the serving model's shapes if none were exported"""
+    if os.path.exists(path):
+        return path
+    import numpy as np
+    rng = np.random.default_rng(0)
+    units, window = 50, 30
+    path = os.path.join(tempfile.gettempdir(), "bench_lstm_model.npz")
+    np.savez(path, kernel=rng.normal(0, 0.2, (1, 4 * units)), recurrent_kernel=rng.normal(0, 0.2, (units, 4 * units)),
+             bias=np.zeros(4 * units), dense_kernel=rng.normal(0, 0.2, (units, 1)), dense_bias=np.zeros(1),
+             window=window)
+    return path
+
+
+def measure(runtime, weights, batches, repeats):
+    result = subprocess.run([sys.executable, "-c", PROBE, runtime, weights, json.dumps(batches), str(repeats)],
+                            cwd=BACKEND, capture_output=True, text=True)
+    if result.returncode:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weights", default=os.path.join(BACKEND, "ml", "models", "lstm_model.npz"))
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 32, 256])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    weights = ensure_weights(args.weights)
+    print(f"weights: {weights}\n")
+    header = f"{'runtime':<12}{'load s':>8}{'RSS MB':>8}{'+RSS MB':>9}"
+    print(header + "".join(f"{f'batch {b} ms':>14}" for b in args.batches))
+    for runtime in ("numpy", "tensorflow"):
+        stats = measure(runtime, weights, args.batches, args.repeats)
+        if stats is None:
+            print(f"{runtime:<12}not available in this environment")
+            continue
+        row = f"{runtime:<12}{stats['load_s']:>8.2f}{stats['rss_mb']:>8.0f}{stats['rss_delta_mb']:>9.0f}"
+        print(row + "".join(f"{stats['latency'][str(b)] * 1000:>14.2f}" for b in args.batches))
+
+
+if __name__ == "__main__":
+    main()
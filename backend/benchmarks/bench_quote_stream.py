@@ -0,0 +1,124 @@
+"""Quote hub load test: hundreds of subscribers on a simulated upstream feed.
+
+Every subscriber watches a random handful of symbols. Most drain their
+updates promptly, some only every couple of seconds (their updates are
+coalesced per symbol) and a few never read at all (they are dropped once
+STREAM_SLOW_CLIENT_TIMEOUT passes). Reports upstream fetches against
+subscribers, delivery latency and what happened to the slow clients.
+
+    python benchmarks/bench_quote_stream.py --subscribers 500 --seconds 10
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("STREAM_POLL_INTERVAL", "0.1")
+os.environ.setdefault("STREAM_SLOW_CLIENT_TIMEOUT", "3")
+
+from services import quote_stream
+
+# Benchmark the open-market cadence whatever the time of day
+quote_stream.market_is_open = lambda: True
+
+
+class SimulatedFeed:
+    """Random-walk prices; about half the symbols move on each poll"""
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        self.prices = {}
+        self.calls = 0
+        self.symbols_requested = 0
+
+    def __call__(self, symbols):
+        self.calls += 1
+        self.symbols_requested += len(symbols)
+        for symbol in symbols:
+            price = self.prices.setdefault(symbol, 100.0)
+            if self.rng.random() < 0.5:
+                self.prices[symbol] = round(price * (1 + self.rng.gauss(0, 0.001)), 2)
+        return {symbol: self.prices[symbol] for symbol in symbols}
+
+
+async def client(hub, symbols, kind, stop, stats):
+    sub = hub.subscribe(symbols)
+    try:
+        while not stop.is_set() and not sub.closed:
+            if kind == "stalled":
+                # Connected but never reads
+                await asyncio.sleep(0.1)
+                continue
+            if kind == "sluggish":
+                await asyncio.sleep(2)
+                stats["max_pending"] = max(stats["max_pending"], len(sub.pending))
+            batch = await sub.next_batch(timeout=0.5)
+            received = datetime.now()
+            for update in batch:
+                stats["latencies"].append((received - datetime.fromisoformat(update["time"])).total_seconds())
+            stats["updates"] += len(batch)
+    finally:
+        if sub.closed:
+            stats["dropped"][kind] += 1
+        hub.unsubscribe(sub)
+
+
+async def run(args):
+    feed = SimulatedFeed()
+    hub = quote_stream.QuoteHub(fetch=feed)
+    rng = random.Random(1)
+    universe = [f"SYM{i}" for i in range(args.symbols)]
+    stop = asyncio.Event()
+    stats = {"latencies": [], "updates": 0, "max_pending": 0,
+             "dropped": {"fast": 0, "sluggish": 0, "stalled": 0}}
+
+    kinds = []
+    for i in range(args.subscribers):
+        roll = rng.random()
+        kinds.append("stalled" if roll < args.stalled else "sluggish" if roll < args.stalled + args.sluggish else "fast")
+    tasks = [asyncio.create_task(client(hub, rng.sample(universe, args.per_client), kind, stop, stats))
+             for kind in kinds]
+
+    started = time.perf_counter()
+    await asyncio.sleep(args.seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    return feed, hub, kinds, stats, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=500)
+    parser.add_argument("--symbols", type=int, default=200, help="size of the symbol universe")
+    parser.add_argument("--per-client", type=int, default=10, help="symbols per subscriber")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--sluggish", type=float, default=0.1, help="share of clients reading every 2s")
+    parser.add_argument("--stalled", type=float, default=0.02, help="share of clients that never read")
+    args = parser.parse_args()
+
+    feed, hub, kinds, stats, elapsed = asyncio.run(run(args))
+    latencies = stats["latencies"]
+    p50, p99 = (statistics.quantiles(latencies, n=100, method="inclusive")[q - 1] * 1000 for q in (50, 99))
+
+    print(f"{args.subscribers} subscribers x {args.per_client} symbols over {args.seconds:g}s, "
+          f"poll every {quote_stream.POLL_INTERVAL_OPEN:g}s\n")
+    print(f"upstream fetches               {feed.calls} ({feed.calls / elapsed:.1f}/s, "
+          f"{feed.symbols_requested / max(feed.calls, 1):.0f} symbols each)")
+    print(f"fetches if each client polled  {args.subscribers * hub.ticks}")
+    print(f"updates delivered              {stats['updates']} ({stats['updates'] / elapsed:.0f}/s)")
+    print(f"delivery latency               p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+    print(f"sluggish client backlog        at most {stats['max_pending']} pending updates "
+          f"(coalesced, <= {args.per_client} symbols)")
+    for kind in ("fast", "sluggish", "stalled"):
+        print(f"dropped {kind:<23}{stats['dropped'][kind]} of {kinds.count(kind)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Holdings index at scale: build time, query and update latency.
+
+Builds the item-item index from synthetic portfolios (100k users by
+default), then times recommend() for random users, incremental
+update_user() calls as /portfolio/add and /portfolio/delete make them, and
+the periodic compaction.
+
+    python benchmarks/bench_recommender.py --users 100000 --symbols 5000
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+from benchmarks.portfolios import synthetic_portfolios
+from ml.collaborative import HoldingsIndex
+
+logging.getLogger("ml.collaborative").setLevel(logging.WARNING)
+
+
+def percentiles(seconds):
+    q = statistics.quantiles(seconds, n=100, method="inclusive")
+    return f"p50 {q[49] * 1e6:8.1f} us   p99 {q[98] * 1e6:8.1f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--holdings", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    portfolios = dict(synthetic_portfolios(args.users, args.symbols, args.holdings, n_styles=100))
+    index = HoldingsIndex(compact_every=10 ** 9)
+    started = time.perf_counter()
+    index.build(portfolios.items())
+    build = time.perf_counter() - started
+    stats = index.stats()
+    print(f"{stats['users']} users, {stats['symbols']} symbols, {stats['stored_pairs']} co-held pairs")
+    print(f"build          {build:8.2f} s")
+
+    rng = np.random.default_rng(0)
+    users = list(portfolios)
+    timings = []
+    for user_id in rng.choice(users, args.queries):
+        started = time.perf_counter()
+        index.recommend(user_id, args.k)
+        timings.append(time.perf_counter() - started)
+    print(f"recommend      {percentiles(timings)}")
+
+    timings = []
+    for i, user_id in enumerate(rng.choice(users, args.updates)):
+        stocks = portfolios[user_id]
+        if i % 2:
+            stocks = stocks[1:]  # sell one
+        else:
+            stocks = stocks + [{"symbol": f"SYM{rng.integers(args.symbols):04d}", "quantity": 10,
+                                "buy_price": 100.0, "buy_date": "2024-01-02"}]
+        portfolios[user_id] = stocks
+        started = time.perf_counter()
+        index.update_user(user_id, stocks)
+        timings.append(time.perf_counter() - started)
+    print(f"update_user    {percentiles(timings)}")
+
+    timings = []
+    for user_id in rng.choice(users, args.queries):
+        started = time.perf_counter()
+        index.recommend(user_id, args.k)
+        timings.append(time.perf_counter() - started)
+    print(f"recommend      {percentiles(timings)}   ({args.updates} updates pending)")
+
+    started = time.perf_counter()
+    index.compact()
+    print(f"compact        {time.perf_counter() - started:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Sentiment throughput on CPU: articles/sec one at a time vs batched vs cached.
+
+Uses synthetic headlines, so no NewsAPI key is needed, but the transformers
+model is real (downloaded on first run).
+
+    python benchmarks/bench_sentiment.py --articles 256 --batch-size 32
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+
+SUBJECTS = ["Apple", "Tesla", "Nvidia", "Microsoft", "Amazon", "Infosys", "Reliance", "Alphabet"]
+EVENTS = [
+    "beats earnings estimates", "misses revenue guidance", "announces share buyback",
+    "faces antitrust probe", "raises full-year outlook", "cuts jobs amid slowdown",
+    "unveils new product line", "shares slide after downgrade",
+]
+
+
+def synthetic_articles(n, seed=0):
+    rng = random.Random(seed)
+    return [{
+        "title": f"{rng.choice(SUBJECTS)} {rng.choice(EVENTS)}",
+        "description": f"{rng.choice(SUBJECTS)} {rng.choice(EVENTS)} as analysts weigh in ({i}).",
+        "url": f"https://news.example/{seed}/{i}",
+    } for i in range(n)]
+
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    try:
+        import transformers  # noqa: F401
+    except ImportError:
+        print("transformers is not installed; nothing to benchmark")
+        return
+
+    os.environ["SENTIMENT_BATCH_SIZE"] = str(args.batch_size)
+    from ml import sentiment
+
+    load = timed(sentiment.get_classifier)
+    print(f"model load: {load:.2f}s (deferred until first use)\n")
+
+    classifier = sentiment.get_classifier()
+    articles = synthetic_articles(args.articles)
+    texts = [sentiment._article_text(a) for a in articles]
+    classifier(texts[:4])  # warm-up
+
+    single = timed(lambda: [classifier(text, truncation=True) for text in texts])
+    batched = timed(lambda: sentiment.score_articles(articles))
+    cached = timed(lambda: sentiment.score_articles(articles))
+
+    print(f"{'mode':<30}{'seconds':>10}{'articles/s':>14}")
+    for label, seconds in (("one article per call", single),
+                           (f"batched ({args.batch_size} per pass)", batched),
+                           ("cached (already scored)", cached)):
+        print(f"{label:<30}{seconds:>10.3f}{args.articles / seconds:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Serialization time and payload size of /stocks/data-shaped responses.
+
+Builds 50 symbols x 1 year of closes (synthetic, with staggered listings)
+and encodes them the old way (Python lists, jsonable_encoder, json.dumps),
+as orjson rows (what layout=rows returns now) and as the columnar layout
+(one shared date axis). A suggestions-shaped payload full of NumPy scalars
+compares the old recursive convert_numpy_types pass with orjson directly.
+
+    python benchmarks/bench_serialization.py --symbols 50 --days 252
+"""
+import os
+import sys
+import gzip
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from responses import FastJSONResponse
+from ml.backtest import synthetic_closes
+
+
+def old_rows(closes):
+    result = []
+    for symbol in closes.columns:
+        hist = closes[symbol].dropna()
+        result.append({"symbol": symbol, "company": symbol, "current_price": 0,
+                       "trend": hist.tolist(), "dates": hist.index.strftime("%Y-%m-%d").tolist()})
+    return JSONResponse(jsonable_encoder({"data": result})).body
+
+
+def orjson_rows(closes):
+    result = []
+    for symbol in closes.columns:
+        hist = closes[symbol].dropna()
+        result.append({"symbol": symbol, "company": symbol, "current_price": 0,
+                       "trend": hist.to_numpy(), "dates": hist.index.strftime("%Y-%m-%d").tolist()})
+    return FastJSONResponse({"data": result}).body
+
+
+def columnar(closes):
+    result = [{"symbol": symbol, "company": symbol, "current_price": 0, "close": closes[symbol].to_numpy()}
+              for symbol in closes.columns]
+    return FastJSONResponse({"dates": closes.index.strftime("%Y-%m-%d").tolist(), "data": result}).body
+
+
+def convert_numpy_types(obj):
+    """The recursive pass routes/suggestion.py used to run before returning"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    elif isinstance(obj, dict):
+        return {k: convert_numpy_types(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [convert_numpy_types(v) for v in obj]
+    return obj
+
+
+def suggestions(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{
+        "symbol": f"SYM{i:04d}", "suggestion": "Buy", "confidence": np.float64(rng.random()),
+        "up_score": np.float32(rng.random()), "price": np.float64(rng.uniform(10, 500)),
+        "indicators": {name: np.float64(rng.random() * 100) for name in ("rsi_14", "sma_20", "sma_50", "atr_14")},
+        "signals": [np.int64(rng.integers(-1, 2)) for _ in range(5)],
+    } for i in range(n)]
+
+
+def timed(fn, arg, repeats):
+    fn(arg)  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeats):
+        body = fn(arg)
+    return (time.perf_counter() - started) / repeats, body
+
+
+def report(label, seconds, body, baseline=None):
+    speedup = f"{baseline / seconds:>8.1f}x" if baseline else f"{'':>9}"
+    print(f"{label:<36}{seconds * 1000:>10.2f}{speedup}{len(body) / 1024:>11.1f}{len(gzip.compress(body)) / 1024:>11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--days", type=int, default=252)
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    closes = synthetic_closes(n_symbols=args.symbols, n_days=args.days, seed=1)
+    print(f"{args.symbols} symbols x {args.days} days\n")
+    print(f"{'payload':<36}{'ms':>10}{'speedup':>9}{'KiB':>11}{'gzip KiB':>11}")
+    baseline, body = timed(old_rows, closes, args.repeats)
+    report("rows: lists + jsonable_encoder", baseline, body)
+    for label, fn in (("rows: orjson", orjson_rows), ("columnar: orjson", columnar)):
+        seconds, body = timed(fn, closes, args.repeats)
+        report(label, seconds, body, baseline)
+
+    payload = suggestions(args.symbols * 10)
+    print()
+    baseline, body = timed(lambda p: JSONResponse(jsonable_encoder(convert_numpy_types(p))).body, payload, args.repeats)
+    report(f"suggestions x{len(payload)}: convert + json", baseline, body)
+    seconds, body = timed(lambda p: FastJSONResponse(p).body, payload, args.repeats)
+    report(f"suggestions x{len(payload)}: orjson", seconds, body, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Worker cold start: import time and RSS per module, each in a fresh process.
+
+Every target is imported in its own interpreter so nothing is shared with
+the previous one. `main[auth]` is an auth-only worker (ENABLED_ROUTERS=auth),
+`main` the full app. Pass --importtime to also print the slowest entries of
+`python -X importtime` for each target.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py ml.lstm_runtime yfinance --importtime
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+DEFAULT_TARGETS = [
+    "main[auth]", "main", "numpy", "pandas", "ml.model_registry", "ml.lstm_runtime",
+    "yfinance", "sklearn.ensemble", "tensorflow", "transformers",
+]
+
+PROBE = """
+import json, resource, sys, time
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+before = rss_mb()
+started = time.perf_counter()
+__import__(sys.argv[1])
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "rss_mb": rss_mb(), "rss_delta_mb": rss_mb() - before}))
+"""
+
+
+def child_env(target):
+    env = dict(os.environ, PRELOAD_MODELS="0")
+    env.setdefault("MONGO_URI", "mongodb://localhost:27017")
+    env.setdefault("JWT_SECRET", "bench-secret")
+    env.pop("ENABLED_ROUTERS", None)
+    if target.endswith("[auth]"):
+        env["ENABLED_ROUTERS"] = "auth"
+    return env
+
+
+def measure(target):
+    module = target.split("[")[0]
+    result = subprocess.run([sys.executable, "-c", PROBE, module], cwd=BACKEND, env=child_env(target),
+                            capture_output=True, text=True)
+    if result.returncode:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(target, top=10):
+    """(cumulative microseconds, module) for the slowest imports under target"""
+    module = target.split("[")[0]
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=BACKEND,
+                            env=child_env(target), capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("--importtime", action="store_true", help="show the slowest nested imports")
+    args = parser.parse_args()
+
+    print(f"{'module':<22}{'import s':>10}{'RSS MB':>10}{'+RSS MB':>10}")
+    for target in args.targets:
+        stats = measure(target)
+        if stats is None:
+            print(f"{target:<22}{'not importable here':>30}")
+            continue
+        print(f"{target:<22}{stats['seconds']:>10.2f}{stats['rss_mb']:>10.0f}{stats['rss_delta_mb']:>10.0f}")
+        if args.importtime:
+            for cumulative, name in slowest_imports(target):
+                print(f"    {cumulative / 1e6:>8.3f}s {name}")
+
+
+if __name__ == "__main__":
+    main()
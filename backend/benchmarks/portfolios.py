@@ -0,0 +1,17 @@
+"""Synthetic portfolios shared by the recommender tests and benchmark."""
+import numpy as np
+
+
+def synthetic_portfolios(n_users=1000, n_symbols=500, holdings=10, n_styles=20, seed=11):
+    """Deterministic fixture: users drawn from a few investing "styles" (each a
+    cluster of symbols) plus some noise, as (user_id, stocks) pairs"""
+    rng = np.random.default_rng(seed)
+    styles = [rng.choice(n_symbols, size=holdings * 3, replace=False) for _ in range(n_styles)]
+    for u in range(n_users):
+        style = styles[rng.integers(n_styles)]
+        picks = set(rng.choice(style, size=holdings - 2, replace=False)) | set(rng.integers(0, n_symbols, 2))
+        yield f"user{u:06d}", [
+            {"symbol": f"SYM{s:04d}", "quantity": int(rng.integers(1, 100)),
+             "buy_price": float(rng.uniform(5, 500)), "buy_date": "2024-01-02"}
+            for s in picks
+        ]
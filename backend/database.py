@@ -1,6 +1,10 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING
+from pymongo.errors import OperationFailure
+from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 import os
+import logging
+from services.metrics import MongoCommandMetrics
 
 # Load .env variables
 load_dotenv()
@@ -8,8 +12,11 @@ load_dotenv()
 # Get MongoDB URI from .env
 MONGO_URI = os.getenv("MONGO_URI")
 
+# Every Mongo command (sync and Motor) feeds the upstream latency metrics
+mongo_metrics = MongoCommandMetrics()
+
 # Connect to MongoDB
-client = MongoClient(MONGO_URI)
+client = MongoClient(MONGO_URI, event_listeners=[mongo_metrics])
 
 # Use or create 'stocksage' database
 db = client["stocksageai"]
@@ -18,3 +25,25 @@ db = client["stocksageai"]
 users_collection = db["users"]
 portfolio_collection = db["portfolios"]
 
+logger = logging.getLogger(__name__)
+
+def ensure_indexes():
+    """Create the lookup indexes used by every request (idempotent)"""
+    specs = [
+        (portfolio_collection, "user_id"),
+        (users_collection, "user_id"),
+        (users_collection, "email"),
+    ]
+    for collection, field in specs:
+        try:
+            collection.create_index([(field, ASCENDING)], unique=True)
+        except OperationFailure as e:
+            # Existing duplicates block a unique index; still index for lookups
+            logger.error(f"Unique index on {collection.name}.{field} failed: {e}")
+            collection.create_index([(field, ASCENDING)])
+
+# Async (Motor) handles for request paths that run on the event loop
+async_client = AsyncIOMotorClient(MONGO_URI, event_listeners=[mongo_metrics])
+async_db = async_client["stocksageai"]
+async_users_collection = async_db["users"]
+async_portfolio_collection = async_db["portfolios"]
@@ -0,0 +1,22 @@
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from auth import decode_token
+from database import async_portfolio_collection
+
+security = HTTPBearer()
+
+# ✅ Decode JWT and get the user's claims (verified tokens are cached in auth.py).
+# No I/O, so it runs inline on the event loop instead of hopping to the threadpool.
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    user = decode_token(credentials.credentials)
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    if not user.get("user_id"):
+        raise HTTPException(status_code=400, detail="User ID not found in token")
+    return user
+
+# ✅ The user's portfolio document (None if they have none). FastAPI caches
+# dependency results per request, so every dependency and handler asking for
+# it shares one database read.
+async def get_portfolio(user: dict = Depends(get_current_user)):
+    return await async_portfolio_collection.find_one({"user_id": user["user_id"]})
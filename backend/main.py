@@ -1,22 +1,92 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routes import user
-from routes import portfolio
-from routes import stock
-from routes import news
-from routes.suggestion import router as suggestion_router
+from fastapi.responses import PlainTextResponse
+from database import ensure_indexes
+from responses import FastJSONResponse
+from services.metrics import metrics, MetricsMiddleware
 from dotenv import load_dotenv
+import importlib
 import os
 
 load_dotenv()
 
+# name -> (module, prefix). Route modules are imported only when enabled, so a
+# worker started with ENABLED_ROUTERS=auth never loads pandas, yfinance or the
+# ML stack and boots in a fraction of the time.
+ROUTERS = {
+    "auth": ("routes.user", "/auth"),
+    "portfolio": ("routes.portfolio", ""),
+    "stock": ("routes.stock", "/stock"),
+    "news": ("routes.news", "/api"),
+    "suggestion": ("routes.suggestion", ""),
+    "stream": ("routes.stream", "/stream"),
+    "admin": ("routes.admin", "/admin"),
+}
+ENABLED_ROUTERS = [
+    name.strip() for name in os.getenv("ENABLED_ROUTERS", ",".join(ROUTERS)).split(",")
+    if name.strip() in ROUTERS
+]
+# Routers that need the ML models / precomputed suggestions
+MODEL_ROUTERS = {"portfolio", "suggestion", "admin"}
 
-app = FastAPI()
+
+# orjson everywhere: faster than json.dumps and handles NumPy types natively
+app = FastAPI(default_response_class=FastJSONResponse)
+
+@app.on_event("startup")
+def create_indexes():
+    ensure_indexes()
+
+@app.on_event("startup")
+def preload_models():
+    # Load + warm the ML models before serving traffic instead of on the first request
+    if os.getenv("PRELOAD_MODELS", "1") == "1" and MODEL_ROUTERS & set(ENABLED_ROUTERS):
+        from ml.model_registry import registry
+        registry.warm_up()
+
+@app.on_event("startup")
+async def start_scheduler():
+    # Precompute suggestions for every held symbol in the background
+    if "suggestion" in ENABLED_ROUTERS:
+        from services.scheduler import scheduler, SCHEDULER_ENABLED
+        if SCHEDULER_ENABLED:
+            scheduler.start()
+
+@app.on_event("startup")
+async def start_news_refresh():
+    # Keep the headline and watched symbol feeds fresh on a schedule
+    if "news" in ENABLED_ROUTERS:
+        from services.news_store import news_store
+        news_store.start()
+
+@app.on_event("startup")
+async def start_holdings_index():
+    # "Investors like you" index over every portfolio, rebuilt in the background
+    if "portfolio" in ENABLED_ROUTERS:
+        from ml.collaborative import holdings_index
+        holdings_index.start()
+
+@app.on_event("shutdown")
+async def close_clients():
+    if "suggestion" in ENABLED_ROUTERS:
+        from services.scheduler import scheduler
+        await scheduler.stop()
+    if "news" in ENABLED_ROUTERS:
+        from routes import news
+        await news.close_http_client()
+    if "portfolio" in ENABLED_ROUTERS:
+        from ml.collaborative import holdings_index
+        await holdings_index.stop()
 
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Stock Market ML Backend"}
 
+# Prometheus scrape endpoint: request/span latency histograms and cache gauges
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # React frontend
@@ -24,10 +94,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last so it wraps everything, including CORS preflights
+app.add_middleware(MetricsMiddleware)
 
 # Include routes
-app.include_router(user.router, prefix="/auth")
-app.include_router(portfolio.router)
-app.include_router(stock.router, prefix="/stock")
-app.include_router(news.router, prefix="/api")
-app.include_router(suggestion_router)
\ No newline at end of file
+for name in ENABLED_ROUTERS:
+    module, prefix = ROUTERS[name]
+    app.include_router(importlib.import_module(module).router, prefix=prefix)
@@ -0,0 +1,318 @@
+"""Vectorized walk-forward backtests of the recommender's trading rules.
+
+Run from backend/:
+
+    python -m ml.backtest --symbols AAPL MSFT NVDA --period 5y --strategy sma
+    python -m ml.backtest --synthetic 500 --strategy sma --grid lookback=10,21,50 --jobs 4
+    python -m ml.backtest --symbols AAPL MSFT --strategy model
+
+Every strategy maps a dates x symbols close matrix to target positions
+(0 = flat, 1 = long) decided at each close from data up to that close; the
+position is held over the next bar, so there is no lookahead. All symbols
+and days are evaluated as whole-matrix NumPy operations.
+"""
+import argparse
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from ml.features import rolling_mean, LABEL_THRESHOLD
+from ml.inference import RF_FEATURES
+from ml.windows import LSTM_WINDOW
+
+TRADING_DAYS = 252
+DEFAULT_COST_BPS = 5.0
+
+
+def synthetic_closes(n_symbols=50, n_days=TRADING_DAYS * 5, seed=7):
+    """Deterministic fixture: trending/mean-reverting random walks with
+    staggered listing dates (leading NaNs), identical for a given seed"""
+    rng = np.random.default_rng(seed)
+    drift = rng.normal(0.0003, 0.0005, n_symbols)
+    vol = rng.uniform(0.01, 0.03, n_symbols)
+    # Slowly switching regimes give the trend rules something to find
+    regime = np.sign(np.sin(np.arange(n_days)[:, None] / rng.uniform(20, 120, n_symbols)))
+    returns = drift + 0.0005 * regime + vol * rng.standard_normal((n_days, n_symbols))
+    closes = 100 * np.exp(np.cumsum(returns, axis=0))
+    listed = rng.integers(0, n_days // 4, n_symbols)
+    closes[np.arange(n_days)[:, None] < listed] = np.nan
+    dates = pd.bdate_range("2015-01-02", periods=n_days)
+    return pd.DataFrame(closes, index=dates, columns=[f"SYM{i:04d}" for i in range(n_symbols)])
+
+
+def _hold_between(buy, sell):
+    """Long from a buy signal until the next sell signal (Hold keeps the
+    previous position), for (dates, symbols) boolean signal matrices"""
+    event = np.where(buy, 1.0, np.where(sell, 0.0, np.nan))
+    rows = np.where(np.isnan(event), 0, np.arange(len(event))[:, None])
+    last = np.maximum.accumulate(rows, axis=0)
+    held = np.take_along_axis(event, last, axis=0)
+    return np.nan_to_num(held)
+
+
+def sma_signal(closes, lookback=21):
+    """The original recommender rule: long while the close is above its
+    trailing mean over `lookback` bars (21 ~ one month)"""
+    mean = rolling_mean(closes, lookback)
+    return np.where(np.isnan(mean), 0.0, (closes > mean).astype(float))
+
+
+def return_threshold_signal(closes, threshold=LABEL_THRESHOLD):
+    """The RF training labels as a rule: buy after a daily gain above
+    `threshold`, sell after a drop below -threshold, otherwise hold"""
+    daily_return = np.full(closes.shape, np.nan)
+    daily_return[1:] = closes[1:] / closes[:-1] - 1
+    with np.errstate(invalid="ignore"):
+        return _hold_between(daily_return > threshold, daily_return < -threshold)
+
+
+def model_signal(closes, buy=0.55, sell=0.45, batch_size=4096):
+    """Replay the served models: up_score from the RF + LSTM at every close,
+    long from up_score >= buy until up_score <= sell"""
+    from ml.model_registry import registry
+
+    rf_model, lstm_model, scaler = registry.get()
+    if rf_model is None:
+        raise RuntimeError("Failed to load ML models")
+
+    n_days, n_symbols = closes.shape
+    daily_return = np.full(closes.shape, np.nan)
+    daily_return[1:] = closes[1:] / closes[:-1] - 1
+    features = np.stack([daily_return, rolling_mean(closes, 7), rolling_mean(closes, 21)], axis=-1)
+
+    # (days - window + 1, symbols, window) strided view; row k ends at day k + window - 1
+    windows = np.lib.stride_tricks.sliding_window_view(closes, LSTM_WINDOW, axis=0)
+    days = np.arange(LSTM_WINDOW - 1, n_days)
+    ready = ~np.isnan(windows).any(axis=-1) & ~np.isnan(features[days]).any(axis=-1)
+    day_idx, sym_idx = np.nonzero(ready)
+
+    up_score = np.full(closes.shape, np.nan)
+    for i in range(0, len(day_idx), batch_size):
+        d, s = day_idx[i:i + batch_size], sym_idx[i:i + batch_size]
+        X = pd.DataFrame(features[days[d], s], columns=RF_FEATURES)
+        probs = rf_model.predict_proba(X)
+        by_class = {label: probs[:, j] for j, label in enumerate(rf_model.classes_)}
+        zeros = np.zeros(len(d))
+        p_hold, p_buy = by_class.get(0, zeros), by_class.get(1, zeros)
+        p_up = lstm_model.predict(scaler.transform(windows[d, s][:, :, np.newaxis]), verbose=0).reshape(-1)
+        # Same blend as ml/inference.predict_batch
+        up_score[days[d], s] = 0.5 * p_up + 0.5 * (p_buy + 0.5 * p_hold)
+
+    with np.errstate(invalid="ignore"):
+        return _hold_between(up_score >= buy, up_score <= sell)
+
+
+STRATEGIES = {
+    "sma": sma_signal,
+    "threshold": return_threshold_signal,
+    "model": model_signal,
+}
+
+
+def strategy_returns(closes, positions, cost_bps=DEFAULT_COST_BPS):
+    """Daily strategy returns: yesterday's position times today's return,
+    minus `cost_bps` per unit of position change. Returns (returns, held,
+    trades) matrices shaped like closes."""
+    asset = np.zeros(closes.shape)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        asset[1:] = closes[1:] / closes[:-1] - 1
+    asset = np.nan_to_num(asset, nan=0.0, posinf=0.0, neginf=0.0)
+    held = np.zeros(positions.shape)
+    held[1:] = positions[:-1]
+    trades = np.abs(np.diff(held, axis=0, prepend=0.0))
+    return held * asset - trades * cost_bps / 10000, held, trades
+
+
+def _metrics(returns, held, trades, active):
+    """Performance per column of (days, n) matrices; `active` marks the days
+    on which each column is listed"""
+    days = np.maximum(active.sum(axis=0), 1)
+    equity = np.cumprod(1 + returns, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+    mean = returns.sum(axis=0) / days
+    std = np.sqrt(np.maximum((returns ** 2).sum(axis=0) / days - mean ** 2, 0))
+    invested = held > 0
+    invested_days = invested.sum(axis=0)
+    years = days / TRADING_DAYS
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "total_return": equity[-1] - 1,
+            "annual_return": equity[-1] ** (1 / years) - 1,
+            "annual_volatility": std * np.sqrt(TRADING_DAYS),
+            "sharpe": np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS), 0.0),
+            "max_drawdown": drawdown.min(axis=0),
+            # Share of invested days that made money
+            "hit_rate": np.where(invested_days > 0, (invested & (returns > 0)).sum(axis=0) / invested_days, np.nan),
+            "exposure": held.sum(axis=0) / days,
+            "annual_turnover": trades.sum(axis=0) / years,
+            "trades": (np.diff(held, axis=0, prepend=0.0) > 0).sum(axis=0),
+        }
+
+
+def _portfolio(returns, held, trades, active):
+    """Equal-weight portfolio over the symbols listed each day, as (days, 1)"""
+    listed = np.maximum(active.sum(axis=1, keepdims=True), 1)
+    return (
+        (returns * active).sum(axis=1, keepdims=True) / listed,
+        (held * active).sum(axis=1, keepdims=True) / listed,
+        (trades * active).sum(axis=1, keepdims=True) / listed,
+        active.any(axis=1, keepdims=True),
+    )
+
+
+def _simulate(args):
+    """(returns, held, trades) for one strategy/params over a closes matrix;
+    module level so it can run in a worker process"""
+    strategy, params, values, cost_bps = args
+    return strategy_returns(values, STRATEGIES[strategy](values, **params), cost_bps)
+
+
+def _grid_point(args):
+    """Portfolio daily returns + metrics for one parameter set (worker side,
+    so only a (days,) vector travels back to the parent)"""
+    values = args[2]
+    run = _portfolio(*_simulate(args), ~np.isnan(values))
+    metrics = _metrics(*run)
+    metrics.pop("trades")
+    return run[0][:, 0], {k: float(v[0]) for k, v in metrics.items()}
+
+
+def _map(func, tasks, jobs):
+    if jobs and jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            return list(pool.map(func, tasks))
+    return [func(task) for task in tasks]
+
+
+def _round(value):
+    value = float(value)
+    return None if np.isnan(value) else round(value, 4)
+
+
+def backtest(closes, strategy="sma", params=None, cost_bps=DEFAULT_COST_BPS, jobs=1):
+    """Backtest one parameter set over every symbol of `closes` (a dates x
+    symbols DataFrame). With jobs > 1 the symbols are split across processes."""
+    params = params or {}
+    values = closes.to_numpy(dtype=float)
+    chunks = [c for c in np.array_split(np.arange(values.shape[1]), max(jobs or 1, 1)) if len(c)]
+    runs = _map(_simulate, [(strategy, params, values[:, c], cost_bps) for c in chunks], jobs)
+    returns, held, trades = (np.concatenate([run[i] for run in runs], axis=1) for i in range(3))
+
+    active = ~np.isnan(values)
+    portfolio = _metrics(*_portfolio(returns, held, trades, active))
+    per_symbol = _metrics(returns, held, trades, active)
+    buy_and_hold = strategy_returns(values, active.astype(float), cost_bps=0)[0]
+    per_symbol["buy_and_hold_return"] = np.prod(1 + buy_and_hold, axis=0) - 1
+    # Entries summed over symbols (the averaged exposure can't count them)
+    portfolio["trades"] = per_symbol["trades"].sum(keepdims=True)
+
+    return {
+        "strategy": strategy,
+        "params": params,
+        "cost_bps": cost_bps,
+        "from": str(closes.index[0].date()),
+        "to": str(closes.index[-1].date()),
+        "symbol_years": round(float(active.sum()) / TRADING_DAYS, 1),
+        "portfolio": {k: _round(v[0]) for k, v in portfolio.items()},
+        "symbols": {
+            symbol: {k: _round(v[i]) for k, v in per_symbol.items()}
+            for i, symbol in enumerate(closes.columns)
+        },
+    }
+
+
+def expand_grid(grid):
+    """{"lookback": [10, 21]} -> [{"lookback": 10}, {"lookback": 21}]"""
+    names = list(grid)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(grid[n] for n in names))]
+
+
+def walk_forward(closes, strategy="sma", grid=None, train_days=TRADING_DAYS, test_days=TRADING_DAYS // 4,
+                 cost_bps=DEFAULT_COST_BPS, jobs=1):
+    """Walk-forward parameter selection.
+
+    Every parameter set is simulated once over the whole history (one task
+    per set, in parallel with jobs > 1). Then, fold by fold, the set with
+    the best Sharpe over the previous `train_days` is used for the next
+    `test_days`; the stitched out-of-sample returns are what is reported.
+    """
+    values = closes.to_numpy(dtype=float)
+    candidates = expand_grid(grid or {})
+    runs = _map(_grid_point, [(strategy, p, values, cost_bps) for p in candidates], jobs)
+    daily = np.stack([r[0] for r in runs])  # (params, days)
+
+    folds = []
+    oos = []
+    for start in range(train_days, len(values), test_days):
+        train = daily[:, start - train_days:start]
+        std = train.std(axis=1)
+        sharpe = np.where(std > 0, train.mean(axis=1) / np.where(std > 0, std, 1), 0.0) * np.sqrt(TRADING_DAYS)
+        best = int(np.argmax(sharpe))
+        end = min(start + test_days, len(values))
+        oos.append(daily[best, start:end])
+        folds.append({
+            "from": str(closes.index[start].date()),
+            "to": str(closes.index[end - 1].date()),
+            "params": candidates[best],
+            "in_sample_sharpe": _round(sharpe[best]),
+        })
+    if not oos:
+        raise ValueError(f"Need more than {train_days} days of history for walk-forward")
+
+    returns = np.concatenate(oos)[:, None]
+    metrics = _metrics(returns, np.zeros_like(returns), np.zeros_like(returns), np.ones_like(returns, dtype=bool))
+    # Exposure/turnover/hit rate need per-symbol positions, so only return-based metrics apply here
+    out_of_sample = {k: _round(metrics[k][0]) for k in ("total_return", "annual_return", "annual_volatility",
+                                                         "sharpe", "max_drawdown")}
+    return {
+        "strategy": strategy,
+        "cost_bps": cost_bps,
+        "out_of_sample": out_of_sample,
+        "folds": folds,
+        "full_period": [{"params": p, **{k: _round(v) for k, v in r[1].items()}} for p, r in zip(candidates, runs)],
+    }
+
+
+def _parse_grid(specs):
+    """["lookback=10,21,50", "threshold=0.01"] -> {"lookback": [10, 21, 50], ...}"""
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        grid[name] = [json.loads(v) for v in values.split(",")]
+    return grid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the recommender's trading rules")
+    parser.add_argument("--symbols", nargs="+", default=[], help="symbols to replay from the bar store")
+    parser.add_argument("--period", default="5y")
+    parser.add_argument("--synthetic", type=int, default=0, help="use N deterministic synthetic symbols instead")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="sma")
+    parser.add_argument("--grid", nargs="*", default=[], help="parameter values, e.g. lookback=10,21,50")
+    parser.add_argument("--cost-bps", type=float, default=DEFAULT_COST_BPS, help="cost per unit traded")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes")
+    parser.add_argument("--per-symbol", action="store_true", help="include per-symbol metrics")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        closes = synthetic_closes(args.synthetic)
+    elif args.symbols:
+        from services.market_data import fetch_close_matrix
+        closes = fetch_close_matrix([s.upper() for s in args.symbols], period=args.period).dropna(axis=1, how="all")
+    else:
+        parser.error("give --symbols or --synthetic")
+
+    grid = _parse_grid(args.grid)
+    if any(len(v) > 1 for v in grid.values()):
+        result = walk_forward(closes, args.strategy, grid, cost_bps=args.cost_bps, jobs=args.jobs)
+    else:
+        params = {k: v[0] for k, v in grid.items()}
+        result = backtest(closes, args.strategy, params, cost_bps=args.cost_bps, jobs=args.jobs)
+        if not args.per_symbol:
+            result.pop("symbols")
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
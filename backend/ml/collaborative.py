@@ -0,0 +1,287 @@
+"""Item-item "investors like you" recommendations from everyone's holdings."""
+import os
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+import numpy as np
+from scipy import sparse
+from services.metrics import span
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COLLAB_NEIGHBORS = int(os.getenv("COLLAB_NEIGHBORS", "50"))
+COLLAB_COMPACT_EVERY = int(os.getenv("COLLAB_COMPACT_EVERY", "1000"))
+COLLAB_REBUILD_INTERVAL = float(os.getenv("COLLAB_REBUILD_INTERVAL", "3600"))
+
+
+def portfolio_weights(stocks):
+    """{SYMBOL: share of the portfolio's cost basis} for a list of holdings"""
+    totals = defaultdict(float)
+    for stock in stocks or []:
+        try:
+            value = float(stock["quantity"]) * float(stock["buy_price"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if value > 0 and stock.get("symbol"):
+            totals[stock["symbol"].strip().upper()] += value
+    total = sum(totals.values())
+    return {symbol: value / total for symbol, value in totals.items()} if total else {}
+
+
+def load_portfolios():
+    """(user_id, stocks) for every stored portfolio"""
+    from database import portfolio_collection  # deferred: keeps the module usable without Mongo
+    for record in portfolio_collection.find({}, {"_id": 0, "user_id": 1, "stocks": 1}):
+        yield record.get("user_id"), record.get("stocks", [])
+
+
+def _top_neighbours(ids, sims, self_id, n):
+    keep = (ids != self_id) & (sims > 1e-12)
+    ids, sims = ids[keep], sims[keep]
+    if len(ids) > n:
+        top = np.argpartition(-sims, n)[:n]
+        ids, sims = ids[top], sims[top]
+    order = np.argsort(-sims, kind="stable")
+    return ids[order].astype(np.int32), sims[order]
+
+
+class HoldingsIndex:
+    """Cosine similarity between symbols from the co-holding matrix G = X^T X
+    (X: users x symbols portfolio weights), with each symbol's top neighbours.
+
+    Portfolio writes update G exactly through a small delta that is folded
+    in every compact_every updates; a periodic rebuild keeps API workers in sync.
+    A write recomputes the neighbour lists of the symbols it touches right
+    away. Other symbols' similarities to those shift too (through their
+    norms) and catch up at compaction.
+    """
+
+    def __init__(self, neighbors=COLLAB_NEIGHBORS, compact_every=COLLAB_COMPACT_EVERY,
+                 rebuild_interval=COLLAB_REBUILD_INTERVAL):
+        self.n_neighbors = neighbors
+        self.compact_every = compact_every
+        self.rebuild_interval = rebuild_interval
+        self.symbols = []        # column -> symbol
+        self.symbol_ids = {}     # symbol -> column
+        self.users = {}          # user_id -> {symbol id: weight}
+        self._cooc = sparse.csr_matrix((0, 0))
+        self._delta = defaultdict(lambda: defaultdict(float))  # co-holding changes since compaction
+        self._norms = np.zeros(0)    # diagonal of G
+        self._holders = np.zeros(0, dtype=np.int64)
+        self._neighbors = []     # symbol id -> (neighbour ids, similarities)
+        self._popular = []       # symbol ids by number of holders, for users with no holdings
+        self._pending = 0
+        self._replay = None      # user_id -> stocks written while a rebuild is running
+        self._lock = threading.RLock()
+        self._task = None
+        self.built_at = None
+        self.last_build_seconds = None
+
+    # Everything a build replaces; queries only see it whole
+    _STATE = ("symbols", "symbol_ids", "users", "_cooc", "_delta", "_norms",
+              "_holders", "_neighbors", "_popular")
+
+    def _symbol_id(self, symbol):
+        sid = self.symbol_ids.get(symbol)
+        if sid is None:
+            sid = self.symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            self._norms = np.append(self._norms, 0.0)
+            self._holders = np.append(self._holders, 0)
+            self._neighbors.append((np.zeros(0, dtype=np.int32), np.zeros(0)))
+        return sid
+
+    def _vector(self, stocks):
+        return {self._symbol_id(s): w for s, w in portfolio_weights(stocks).items()}
+
+    def _load(self, portfolios):
+        users = {}
+        for user_id, stocks in portfolios:
+            vector = self._vector(stocks)
+            if user_id and vector:
+                users[user_id] = vector
+        self.users = users
+
+        rows, cols, vals = [], [], []
+        for r, vector in enumerate(users.values()):
+            rows += [r] * len(vector)
+            cols += list(vector)
+            vals += list(vector.values())
+        X = sparse.csr_matrix((vals, (rows, cols)), shape=(len(users), len(self.symbols)))
+        self._cooc = (X.T @ X).tocsr()
+        self._norms = self._cooc.diagonal()
+        self._holders = np.asarray((X > 0).sum(axis=0)).ravel().astype(np.int64)
+        self._recompute_all()
+
+    def build(self, portfolios):
+        """Replace the whole index from an iterable of (user_id, stocks).
+
+        The new index is built off to the side, so queries and portfolio
+        writes keep being served from the old one until it is published.
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self._replay = {}
+        fresh = HoldingsIndex(self.n_neighbors, self.compact_every, self.rebuild_interval)
+        fresh._load(portfolios)
+
+        with self._lock:
+            # Writes that raced with the snapshot win over it
+            replay, self._replay = self._replay, None
+            for user_id, stocks in replay.items():
+                fresh._apply(user_id, fresh._vector(stocks))
+            # Swapped under the lock that queries read under, so none sees a mix
+            for attr in self._STATE:
+                setattr(self, attr, getattr(fresh, attr))
+            self._pending = 0
+
+        self.built_at = time.time()
+        self.last_build_seconds = time.perf_counter() - started
+        logger.info(f"Built holdings index: {len(self.users)} users, {len(self.symbols)} symbols "
+                    f"in {self.last_build_seconds:.2f}s")
+
+    def _row(self, sid):
+        """Co-holding weights of one symbol with every other (G row incl. delta)"""
+        if sid < self._cooc.shape[0]:
+            start, end = self._cooc.indptr[sid], self._cooc.indptr[sid + 1]
+            ids, vals = self._cooc.indices[start:end], self._cooc.data[start:end]
+        else:
+            ids, vals = np.zeros(0, dtype=np.int32), np.zeros(0)
+        delta = self._delta.get(sid)
+        if delta:
+            ids = np.concatenate([ids, np.fromiter(delta.keys(), dtype=np.int32, count=len(delta))])
+            vals = np.concatenate([vals, np.fromiter(delta.values(), dtype=float, count=len(delta))])
+            vals = np.bincount(ids, weights=vals, minlength=len(self.symbols))
+            ids = np.flatnonzero(vals).astype(np.int32)
+            vals = vals[ids]
+        return ids, vals
+
+    def _recompute(self, sid):
+        ids, vals = self._row(sid)
+        norms = np.sqrt(self._norms[sid] * self._norms[ids])
+        sims = np.divide(vals, norms, out=np.zeros(len(vals)), where=norms > 0)
+        self._neighbors[sid] = _top_neighbours(ids, sims, sid, self.n_neighbors)
+
+    def _recompute_all(self):
+        scale = sparse.diags(1 / np.sqrt(np.where(self._norms > 0, self._norms, np.inf)))
+        sims = (scale @ self._cooc @ scale).tocsr()
+        for sid in range(len(self.symbols)):
+            start, end = sims.indptr[sid], sims.indptr[sid + 1]
+            self._neighbors[sid] = _top_neighbours(sims.indices[start:end], sims.data[start:end],
+                                                   sid, self.n_neighbors)
+        self._popular = list(np.argsort(-self._holders, kind="stable"))
+
+    def _apply(self, user_id, new):
+        """Swap one user's row in G: subtract the old outer product, add the new one"""
+        old = self.users.get(user_id, {})
+        if old == new:
+            return False
+        for vector, sign in ((old, -1.0), (new, 1.0)):
+            for a, wa in vector.items():
+                row = self._delta[a]
+                for b, wb in vector.items():
+                    row[b] += sign * wa * wb
+                self._norms[a] += sign * wa * wa
+                self._holders[a] += int(sign)
+        if new:
+            self.users[user_id] = new
+        else:
+            self.users.pop(user_id, None)
+        for sid in old.keys() | new.keys():
+            self._recompute(sid)
+        return True
+
+    def update_user(self, user_id, stocks):
+        """Apply one user's current holdings after a portfolio write"""
+        with self._lock:
+            if self._replay is not None:
+                self._replay[user_id] = stocks
+            if not self._apply(user_id, self._vector(stocks)):
+                return
+            self._pending += 1
+            if self._pending >= self.compact_every:
+                self.compact()
+
+    def compact(self):
+        """Fold the delta into the sparse matrix and refresh every neighbour list"""
+        with self._lock:
+            n = len(self.symbols)
+            cooc = self._cooc.copy()
+            cooc.resize((n, n))  # symbols first seen since the last build
+            rows = [a for a, row in self._delta.items() for _ in row]
+            cols = [b for row in self._delta.values() for b in row]
+            vals = [v for row in self._delta.values() for v in row.values()]
+            cooc = (cooc + sparse.csr_matrix((vals, (rows, cols)), shape=(n, n))).tocsr()
+            # Drop cancelled-out pairs (sells) left as float residue
+            cooc.data[np.abs(cooc.data) < 1e-12] = 0
+            cooc.eliminate_zeros()
+            self._cooc = cooc
+            self._delta.clear()
+            self._recompute_all()
+            self._pending = 0
+
+    def recommend(self, user_id, k=10):
+        """Top-k (symbol, score) pairs the user doesn't hold"""
+        # Under the lock: writes and builds change several structures at once
+        with self._lock:
+            return self._recommend(user_id, k)
+
+    def _recommend(self, user_id, k):
+        held = self.users.get(user_id)
+        if not held:
+            # Cold start: what most investors hold
+            return [(self.symbols[sid], None) for sid in self._popular[:k] if self._holders[sid] > 0]
+
+        neighbours = [self._neighbors[sid] for sid in held]
+        ids = np.concatenate([n[0] for n in neighbours])
+        if not len(ids):
+            return []
+        weights = np.concatenate([w * n[1] for w, n in zip(held.values(), neighbours)])
+        scores = np.bincount(ids, weights=weights, minlength=len(self.symbols))
+        scores[list(held)] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k)[:k]]
+        top = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.symbols[i], float(scores[i])) for i in top]
+
+    def rebuild(self):
+        with span("model", "holdings_index_build"):
+            self.build(load_portfolios())
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.rebuild)
+            except Exception as e:
+                logger.error(f"Holdings index rebuild failed: {str(e)}")
+            await asyncio.sleep(self.rebuild_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        return {
+            "users": len(self.users),
+            "symbols": len(self.symbols),
+            "stored_pairs": int(self._cooc.nnz),
+            "pending_updates": self._pending,
+            "built_at": self.built_at,
+            "last_build_seconds": self.last_build_seconds,
+        }
+
+
+holdings_index = HoldingsIndex()
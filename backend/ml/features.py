@@ -0,0 +1,83 @@
+import hashlib
+import os
+import numpy as np
+from ml.windows import LSTM_WINDOW, sliding_windows, window_labels
+
+FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR", "data/features")
+# Bump when the feature/label construction below changes to invalidate the cache
+FEATURE_VERSION = 2
+# Daily move that labels a bar Buy (+) or Sell (-) for the forest
+LABEL_THRESHOLD = 0.02
+
+
+def rolling_mean(values, window):
+    """Trailing mean over `window` rows (axis 0, so 1-D series or a dates x
+    symbols matrix); NaN until the window holds `window` valid values"""
+    values = np.asarray(values, dtype=float)
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        valid = ~np.isnan(values)
+        pad = np.zeros((1,) + values.shape[1:])
+        csum = np.concatenate([pad, np.cumsum(np.where(valid, values, 0.0), axis=0)])
+        count = np.concatenate([pad, np.cumsum(valid, axis=0)])
+        sums = csum[window:] - csum[:-window]
+        full = (count[window:] - count[:-window]) == window
+        out[window - 1:] = np.where(full, sums / window, np.nan)
+    return out
+
+
+def rf_dataset(closes):
+    """RF features [daily_return, ma7, ma21] and Sell/Hold/Buy labels (-1/0/1).
+
+    Same construction as the original pandas version in train_rf.py: rows
+    start once ma21 is defined, and the label is the bar's own return
+    bucketed at +-LABEL_THRESHOLD.
+    """
+    closes = np.asarray(closes, dtype=float)
+    daily_return = np.full(len(closes), np.nan)
+    daily_return[1:] = closes[1:] / closes[:-1] - 1
+    X = np.column_stack([daily_return, rolling_mean(closes, 7), rolling_mean(closes, 21)])
+    X = X[~np.isnan(X).any(axis=1)]
+    r = X[:, 0]
+    y = np.where(r > LABEL_THRESHOLD, 1, np.where(r < -LABEL_THRESHOLD, -1, 0))
+    return X, y
+
+
+def lstm_dataset(series, window=LSTM_WINDOW):
+    """(samples, window, 1) windows and up/down labels from a scaled series.
+
+    Window k covers series[k:k + window]; its label is whether the bar after
+    the one following the window closed higher, as in train_lstm.py. X is a
+    strided view over `series`, not a copy.
+    """
+    series = np.asarray(series)
+    return sliding_windows(series, window)[:, :, np.newaxis], window_labels(series, window)
+
+
+def _cache_path(symbol, dates, closes, window):
+    digest = hashlib.sha1()
+    digest.update(f"{FEATURE_VERSION}:{window}".encode())
+    digest.update(np.ascontiguousarray(dates).tobytes())
+    digest.update(np.ascontiguousarray(closes, dtype=float).tobytes())
+    return os.path.join(FEATURE_CACHE_DIR, f"{symbol}_{digest.hexdigest()[:16]}.npz")
+
+
+def symbol_features(symbol, dates, closes, window=LSTM_WINDOW):
+    """RF training tensors for one symbol, cached on disk by content hash.
+
+    LSTM windows aren't cached: they are strided views over the scaled
+    series (see ml/windows.py), so there is nothing to precompute.
+    """
+    path = _cache_path(symbol, dates, closes, window)
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            return {name: cached[name] for name in cached.files}
+
+    rf_X, rf_y = rf_dataset(closes)
+    features = {"rf_X": rf_X, "rf_y": rf_y}
+
+    os.makedirs(FEATURE_CACHE_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, **features)
+    os.replace(tmp, path)
+    return features
@@ -0,0 +1,222 @@
+import numpy as np
+from scipy.signal import lfilter
+
+# All indicators take (symbols, time) arrays (or a single (time,) series) and
+# return arrays of the same shape, NaN during each indicator's warm-up.
+# Interior gaps are forward-filled; leading NaNs (shorter history) stay NaN.
+
+
+def _prepare(x):
+    x = np.asarray(x, dtype=float)
+    ndim = x.ndim
+    x = np.atleast_2d(x)
+    valid = ~np.isnan(x)
+    # Forward-fill interior gaps
+    idx = np.where(valid, np.arange(x.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = np.take_along_axis(x, idx, axis=1)
+    # Back-fill the leading gap with the first valid value so recursive
+    # filters start cleanly; it is masked out again by _mask_warmup
+    first = np.where(valid.any(axis=1), valid.argmax(axis=1), x.shape[1])
+    seed = np.take_along_axis(x, np.minimum(first, x.shape[1] - 1)[:, None], axis=1)
+    filled = np.where(np.arange(x.shape[1]) < first[:, None], seed, filled)
+    return filled, first, ndim
+
+
+def _mask_warmup(y, first, warmup):
+    y[np.arange(y.shape[1]) < (first[:, None] + warmup - 1)] = np.nan
+    return y
+
+
+def _restore(y, ndim):
+    return y[0] if ndim == 1 else y
+
+
+def _rolling_sum(x, n):
+    c = np.cumsum(x, axis=1)
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= n:
+        out[:, n - 1] = c[:, n - 1]
+        out[:, n:] = c[:, n:] - c[:, :-n]
+    return out
+
+
+def _ewm(x, alpha):
+    """Recursive y[t] = alpha * x[t] + (1 - alpha) * y[t-1], seeded with x[0]"""
+    if x.shape[1] == 0:
+        return x.copy()
+    zi = (1 - alpha) * x[:, :1]
+    y, _ = lfilter([alpha], [1, alpha - 1], x, axis=1, zi=zi)
+    return y
+
+
+def sma(close, n=20):
+    filled, first, ndim = _prepare(close)
+    return _restore(_mask_warmup(_rolling_sum(filled, n) / n, first, n), ndim)
+
+
+def ema(close, n=20):
+    filled, first, ndim = _prepare(close)
+    return _restore(_mask_warmup(_ewm(filled, 2 / (n + 1)), first, 1), ndim)
+
+
+def _rsi_parts(filled, n):
+    delta = np.diff(filled, axis=1, prepend=filled[:, :1])
+    avg_gain = _ewm(np.clip(delta, 0, None), 1 / n)
+    avg_loss = _ewm(np.clip(-delta, 0, None), 1 / n)
+    return avg_gain, avg_loss
+
+
+def _rsi_from_averages(avg_gain, avg_loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+    return rsi
+
+
+def rsi(close, n=14):
+    """Relative strength index with Wilder (alpha = 1/n) smoothing"""
+    filled, first, ndim = _prepare(close)
+    rsi = _rsi_from_averages(*_rsi_parts(filled, n))
+    return _restore(_mask_warmup(rsi, first, n + 1), ndim)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """Returns (macd line, signal line, histogram)"""
+    filled, first, ndim = _prepare(close)
+    line = _ewm(filled, 2 / (fast + 1)) - _ewm(filled, 2 / (slow + 1))
+    sig = _ewm(line, 2 / (signal + 1))
+    hist = line - sig
+    line = _mask_warmup(line, first, slow)
+    sig = _mask_warmup(sig, first, slow + signal - 1)
+    hist = _mask_warmup(hist, first, slow + signal - 1)
+    return _restore(line, ndim), _restore(sig, ndim), _restore(hist, ndim)
+
+
+def bollinger(close, n=20, k=2.0):
+    """Returns (upper, middle, lower) bands using the population std"""
+    filled, first, ndim = _prepare(close)
+    mean = _rolling_sum(filled, n) / n
+    var = np.clip(_rolling_sum(filled ** 2, n) / n - mean ** 2, 0, None)
+    std = np.sqrt(var)
+    bands = [_mask_warmup(b, first, n) for b in (mean + k * std, mean, mean - k * std)]
+    return tuple(_restore(b, ndim) for b in bands)
+
+
+def _true_range(high, low, close):
+    prev_close = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    return np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+
+
+def atr(high, low, close, n=14):
+    """Average true range with Wilder smoothing"""
+    close, first, ndim = _prepare(close)
+    high, _, _ = _prepare(high)
+    low, _, _ = _prepare(low)
+    out = _ewm(_true_range(high, low, close), 1 / n)
+    return _restore(_mask_warmup(out, first, n), ndim)
+
+
+class IndicatorState:
+    """Latest indicator values for a batch of symbols, updated one bar at a time.
+
+    Built once from full (symbols, time) history with the vectorized
+    functions above; each update() then costs O(symbols) instead of a
+    recomputation over the whole history.
+    """
+
+    SMA_PERIODS = (20, 50)
+    EMA_PERIODS = (12, 20, 26)
+    MACD_FAST, MACD_SLOW = 12, 26
+    RSI_PERIOD = 14
+    ATR_PERIOD = 14
+    MACD_SIGNAL = 9
+    BB_PERIOD = 20
+    BB_K = 2.0
+
+    def __init__(self, close, high=None, low=None):
+        close, first, _ = _prepare(close)
+        high = close if high is None else _prepare(high)[0]
+        low = close if low is None else _prepare(low)[0]
+        self._count = close.shape[1] - first
+        window = max(self.SMA_PERIODS + (self.BB_PERIOD,))
+        self._window = np.full((close.shape[0], window), np.nan)
+        keep = min(window, close.shape[1])
+        self._window[:, window - keep:] = close[:, close.shape[1] - keep:]
+
+        self._ema = {n: self._ema_series(close, n)[:, -1] for n in self.EMA_PERIODS}
+        line = self._ema_series(close, self.MACD_FAST) - self._ema_series(close, self.MACD_SLOW)
+        self._signal = _ewm(line, 2 / (self.MACD_SIGNAL + 1))[:, -1]
+        avg_gain, avg_loss = _rsi_parts(close, self.RSI_PERIOD)
+        self._avg_gain, self._avg_loss = avg_gain[:, -1], avg_loss[:, -1]
+        self._atr = _ewm(_true_range(high, low, close), 1 / self.ATR_PERIOD)[:, -1]
+        self._prev_close = close[:, -1]
+
+    @staticmethod
+    def _ema_series(close, n):
+        return _ewm(close, 2 / (n + 1))
+
+    def update(self, close, high=None, low=None):
+        """Fold in one new bar per symbol ((symbols,) arrays) and return latest()"""
+        close = np.asarray(close, dtype=float)
+        high = close if high is None else np.asarray(high, dtype=float)
+        low = close if low is None else np.asarray(low, dtype=float)
+
+        self._window[:, :-1] = self._window[:, 1:]
+        self._window[:, -1] = close
+        for n in self.EMA_PERIODS:
+            alpha = 2 / (n + 1)
+            self._ema[n] = alpha * close + (1 - alpha) * self._ema[n]
+        alpha = 2 / (self.MACD_SIGNAL + 1)
+        line = self._ema[self.MACD_FAST] - self._ema[self.MACD_SLOW]
+        self._signal = alpha * line + (1 - alpha) * self._signal
+
+        delta = close - self._prev_close
+        self._avg_gain += (np.clip(delta, 0, None) - self._avg_gain) / self.RSI_PERIOD
+        self._avg_loss += (np.clip(-delta, 0, None) - self._avg_loss) / self.RSI_PERIOD
+        true_range = np.maximum.reduce([high - low, np.abs(high - self._prev_close), np.abs(low - self._prev_close)])
+        self._atr += (true_range - self._atr) / self.ATR_PERIOD
+        self._prev_close = close
+        self._count += 1
+        return self.latest()
+
+    def _warm(self, values, warmup):
+        return np.where(self._count >= warmup, values, np.nan)
+
+    def latest(self):
+        latest = {}
+        for n in self.SMA_PERIODS:
+            latest[f"sma_{n}"] = self._warm(self._window[:, -n:].mean(axis=1), n)
+        for n in self.EMA_PERIODS:
+            latest[f"ema_{n}"] = self._warm(self._ema[n], 1)
+        line = self._ema[self.MACD_FAST] - self._ema[self.MACD_SLOW]
+        signal_warmup = self.MACD_SLOW + self.MACD_SIGNAL - 1
+        latest["macd"] = self._warm(line, self.MACD_SLOW)
+        latest["macd_signal"] = self._warm(self._signal, signal_warmup)
+        latest["macd_hist"] = self._warm(line - self._signal, signal_warmup)
+        latest[f"rsi_{self.RSI_PERIOD}"] = self._warm(
+            _rsi_from_averages(self._avg_gain, self._avg_loss), self.RSI_PERIOD + 1
+        )
+        latest[f"atr_{self.ATR_PERIOD}"] = self._warm(self._atr, self.ATR_PERIOD)
+        recent = self._window[:, -self.BB_PERIOD:]
+        mid, std = recent.mean(axis=1), recent.std(axis=1)
+        latest["bb_upper"] = self._warm(mid + self.BB_K * std, self.BB_PERIOD)
+        latest["bb_middle"] = self._warm(mid, self.BB_PERIOD)
+        latest["bb_lower"] = self._warm(mid - self.BB_K * std, self.BB_PERIOD)
+        return latest
+
+
+def latest_indicators(bars):
+    """{symbol: {indicator: value}} for a fetch_history() OHLCV frame"""
+    symbols = list(bars["Close"].columns)
+    state = IndicatorState(
+        bars["Close"].to_numpy().T, bars["High"].to_numpy().T, bars["Low"].to_numpy().T
+    )
+    latest = state.latest()
+    return {
+        symbol: {
+            name: (None if np.isnan(values[i]) else round(float(values[i]), 4))
+            for name, values in latest.items()
+        }
+        for i, symbol in enumerate(symbols)
+    }
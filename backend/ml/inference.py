@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+from ml.windows import LSTM_WINDOW, latest_windows
+from services.metrics import span
+
+# Must match the feature engineering in ml/features.py
+RF_FEATURES = ["daily_return", "ma7", "ma21"]
+# Closes needed per symbol: the LSTM window, and ma21 + one return for the RF
+HISTORY_LENGTH = max(LSTM_WINDOW, 21 + 1)
+
+
+def tail_matrix(closes, length=HISTORY_LENGTH):
+    """Last `length` valid closes of every column, right-aligned.
+
+    closes is a dates x symbols DataFrame whose columns can have NaN gaps
+    (symbols trading on different calendars). Returns a (symbols, length)
+    array, NaN-padded on the left for symbols with shorter history.
+    """
+    values = closes.to_numpy(dtype=float).T
+    valid = ~np.isnan(values)
+    # Position of each valid value counted from the end: 0 = latest close
+    rank = np.cumsum(valid[:, ::-1], axis=1)[:, ::-1] - 1
+    take = valid & (rank < length)
+    rows, cols = np.nonzero(take)
+    tail = np.full((values.shape[0], length), np.nan)
+    tail[rows, length - 1 - rank[rows, cols]] = values[rows, cols]
+    return tail
+
+
+def rf_features(tail):
+    """(symbols, 3) matrix of [daily_return, ma7, ma21] at the latest bar"""
+    daily_return = tail[:, -1] / tail[:, -2] - 1
+    ma7 = tail[:, -7:].mean(axis=1)
+    ma21 = tail[:, -21:].mean(axis=1)
+    return np.column_stack([daily_return, ma7, ma21])
+
+
+def lstm_windows(tail, scaler, window=LSTM_WINDOW):
+    """(symbols, window, 1) batch of scaled closes for the LSTM"""
+    return scaler.transform(latest_windows(tail, window))
+
+
+def predict_batch(closes, rf_model, lstm_model, scaler):
+    """Score every symbol of the closes matrix with one predict call per model.
+
+    Returns a DataFrame indexed by symbol with the LSTM's probability of an up
+    move, the RF's Sell/Hold/Buy probabilities and a combined up_score in
+    [0, 1]. Symbols without enough history are left out.
+    """
+    tail = tail_matrix(closes)
+    ready = ~np.isnan(tail).any(axis=1)
+    symbols = closes.columns[ready]
+    if not len(symbols):
+        return pd.DataFrame(columns=["p_up", "p_sell", "p_hold", "p_buy", "up_score"])
+    tail = tail[ready]
+
+    with span("model", "rf_predict"):
+        rf_probs = rf_model.predict_proba(pd.DataFrame(rf_features(tail), columns=RF_FEATURES))
+    # The forest may not have seen every label (-1 / 0 / 1) during training
+    by_class = {label: rf_probs[:, i] for i, label in enumerate(rf_model.classes_)}
+    zeros = np.zeros(len(tail))
+    p_sell, p_hold, p_buy = (by_class.get(label, zeros) for label in (-1, 0, 1))
+
+    with span("model", "lstm_predict"):
+        p_up = lstm_model.predict(lstm_windows(tail, scaler), verbose=0).reshape(-1)
+
+    return pd.DataFrame({
+        "p_up": p_up,
+        "p_sell": p_sell,
+        "p_hold": p_hold,
+        "p_buy": p_buy,
+        # Both models weigh equally; a Hold from the forest counts as neutral
+        "up_score": 0.5 * p_up + 0.5 * (p_buy + 0.5 * p_hold),
+    }, index=symbols)
+
+
+def score_to_action(up_score):
+    if up_score >= 0.7:
+        return "Strong Buy"
+    if up_score >= 0.55:
+        return "Buy"
+    if up_score <= 0.3:
+        return "Strong Sell"
+    if up_score <= 0.45:
+        return "Sell"
+    return "Hold"
@@ -0,0 +1,82 @@
+import numpy as np
+
+
+def sigmoid(z):
+    """Logistic function; the clip keeps np.exp from overflowing in float32"""
+    return 1 / (1 + np.exp(-np.clip(z, -60, 60)))
+
+
+class NumpyLSTM:
+    """Forward pass of the recommender's LSTM(units) -> Dense(1, sigmoid) model.
+
+    Mirrors the Keras layers (tanh activation, sigmoid recurrent activation)
+    using weights exported by export_lstm(), so serving needs only NumPy.
+    Exposes the bits of the Keras model API the rest of the code uses:
+    predict(), input_shape and count_params().
+    """
+
+    def __init__(self, kernel, recurrent_kernel, bias, dense_kernel, dense_bias, window):
+        self.kernel = np.asarray(kernel, dtype=np.float32)
+        self.recurrent_kernel = np.asarray(recurrent_kernel, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.dense_kernel = np.asarray(dense_kernel, dtype=np.float32)
+        self.dense_bias = np.asarray(dense_bias, dtype=np.float32)
+        self.units = self.recurrent_kernel.shape[0]
+        self.input_shape = (None, int(window), self.kernel.shape[0])
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as weights:
+            return cls(
+                weights["kernel"], weights["recurrent_kernel"], weights["bias"],
+                weights["dense_kernel"], weights["dense_bias"], int(weights["window"]),
+            )
+
+    def count_params(self):
+        return sum(w.size for w in (self.kernel, self.recurrent_kernel, self.bias,
+                                    self.dense_kernel, self.dense_bias))
+
+    def predict(self, x, verbose=0):
+        """(batch, timesteps, features) -> (batch, 1) probability of an up move"""
+        x = np.asarray(x, dtype=np.float32)
+        batch, steps, _ = x.shape
+        u = self.units  # gates are packed as [input, forget, cell, output]
+        # Input projections for every timestep in one matmul; only the
+        # recurrent part has to run step by step
+        projected = x @ self.kernel + self.bias
+        h = np.zeros((batch, u), dtype=np.float32)
+        c = np.zeros((batch, u), dtype=np.float32)
+        for t in range(steps):
+            z = projected[:, t] + h @ self.recurrent_kernel
+            i = sigmoid(z[:, :u])
+            f = sigmoid(z[:, u:2 * u])
+            g = np.tanh(z[:, 2 * u:3 * u])
+            o = sigmoid(z[:, 3 * u:])
+            c = f * c + i * g
+            h = o * np.tanh(c)
+        return sigmoid(h @ self.dense_kernel + self.dense_bias)
+
+
+def export_lstm(model, path):
+    """Write a trained Keras LSTM -> Dense model's weights to an .npz file"""
+    lstm_layer = next(layer for layer in model.layers if layer.__class__.__name__ == "LSTM")
+    dense_layer = model.layers[-1]
+    kernel, recurrent_kernel, bias = lstm_layer.get_weights()
+    dense_kernel, dense_bias = dense_layer.get_weights()
+    np.savez(
+        path,
+        kernel=kernel,
+        recurrent_kernel=recurrent_kernel,
+        bias=bias,
+        dense_kernel=dense_kernel,
+        dense_bias=dense_bias,
+        window=model.input_shape[1],
+    )
+
+
+# Convert an existing .h5 model (needs TensorFlow, e.g. in the training env):
+# run from backend/: python -m ml.lstm_runtime
+if __name__ == "__main__":
+    from tensorflow.keras.models import load_model
+    export_lstm(load_model("ml/models/lstm_model.h5"), "ml/models/lstm_model.npz")
+    print("✅ LSTM weights exported to ml/models/lstm_model.npz")
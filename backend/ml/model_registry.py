@@ -0,0 +1,239 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from ml.lstm_runtime import NumpyLSTM
+from ml.windows import WindowScaler
+from services.metrics import traced
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = os.getenv("MODEL_DIR", "ml/models")
+# How often (seconds) get() stats the model files to look for a retrained artifact
+RELOAD_CHECK_INTERVAL = float(os.getenv("MODEL_RELOAD_CHECK_INTERVAL", "30"))
+
+MODEL_FILES = {
+    "rf": "rf_model.pkl",
+    "lstm": "lstm_model.h5",
+    "scaler": "lstm_scaler.npy",  # see WindowScaler.from_artifact
+}
+# Weights exported by train_lstm.py for the NumPy runtime
+LSTM_EXPORT = "lstm_model.npz"
+# Names the promoted version under versions/ (see ml/train.py). Without it the
+# files directly in MODEL_DIR are served.
+CURRENT_FILE = "CURRENT"
+# "numpy" serves the exported weights without TensorFlow (falling back to the
+# .h5 when no export exists); "keras" always loads the .h5 through TensorFlow
+LSTM_RUNTIME = os.getenv("LSTM_RUNTIME", "numpy")
+
+
+def _rss_bytes():
+    """Current resident set size of this process, or None if unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ModelRegistry:
+    """Process-wide, thread-safe holder for the recommender models.
+
+    Models are loaded once (at startup via warm_up() or lazily on the first
+    get()) and shared by every request. The model files are re-checked every
+    `check_interval` seconds and reloaded when their content hash changes.
+    All artifacts of one load come from the same directory: the version
+    named by CURRENT_FILE, read once per check, or MODEL_DIR itself.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, check_interval=RELOAD_CHECK_INTERVAL, lstm_runtime=LSTM_RUNTIME):
+        self.model_dir = model_dir
+        self.lstm_runtime = lstm_runtime
+        self.check_interval = check_interval
+        self._load_lock = threading.Lock()
+        self._models = None
+        self._fingerprint = None
+        self._version = None
+        self._loaded_at = None
+        self._load_seconds = None
+        self._warmup_seconds = None
+        self._rss_delta = None
+        self._load_count = 0
+        self._last_check = 0.0
+        self._last_error = None
+
+    def _active_dir(self):
+        """Directory of the promoted version, or model_dir when none was promoted"""
+        try:
+            with open(os.path.join(self.model_dir, CURRENT_FILE)) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return self.model_dir
+        return os.path.join(self.model_dir, "versions", version) if version else self.model_dir
+
+    def _path(self, name, directory=None):
+        directory = directory or self._active_dir()
+        if name == "lstm" and self.lstm_runtime == "numpy":
+            exported = os.path.join(directory, LSTM_EXPORT)
+            if os.path.exists(exported):
+                return exported
+        return os.path.join(directory, MODEL_FILES[name])
+
+    def _stat_files(self, directory):
+        fingerprint = {"directory": directory}
+        for name in MODEL_FILES:
+            st = os.stat(self._path(name, directory))
+            fingerprint[name] = (st.st_mtime_ns, st.st_size)
+        return fingerprint
+
+    def _hash_files(self, directory):
+        digest = hashlib.sha256()
+        for name in sorted(MODEL_FILES):
+            with open(self._path(name, directory), "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        return digest.hexdigest()[:12]
+
+    @traced("model", "load")
+    def _load_files(self, directory):
+        # TensorFlow/sklearn are imported here rather than at module level so
+        # workers that never serve predictions don't pay for them at boot
+        import joblib
+
+        rf_model = joblib.load(self._path("rf", directory))
+        lstm_path = self._path("lstm", directory)
+        if lstm_path.endswith(".npz"):
+            lstm_model = NumpyLSTM.load(lstm_path)
+        else:
+            from tensorflow.keras.models import load_model
+            lstm_model = load_model(lstm_path)
+        scaler = WindowScaler.from_artifact(np.load(self._path("scaler", directory)))
+
+        return rf_model, lstm_model, scaler
+
+    def _reload(self):
+        """Load all artifacts and swap them in. Caller holds _load_lock."""
+        try:
+            directory = self._active_dir()
+            fingerprint = self._stat_files(directory)
+            version = self._hash_files(directory)
+            rss_before = _rss_bytes()
+            started = time.perf_counter()
+            models = self._load_files(directory)
+            load_seconds = time.perf_counter() - started
+            rss_after = _rss_bytes()
+        except Exception as e:
+            self._last_error = str(e)
+            logger.error(f"Model loading failed: {str(e)}")
+            return
+
+        self._models = models
+        self._fingerprint = fingerprint
+        self._version = version
+        self._loaded_at = datetime.now().isoformat()
+        self._load_seconds = load_seconds
+        self._rss_delta = rss_after - rss_before if None not in (rss_before, rss_after) else None
+        self._load_count += 1
+        self._last_error = None
+        logger.info(f"Loaded models version {version} in {load_seconds:.2f}s")
+
+    def _check_for_update(self):
+        """Reload if the files on disk changed. Caller holds _load_lock."""
+        try:
+            directory = self._active_dir()
+            fingerprint = self._stat_files(directory)
+        except OSError as e:
+            self._last_error = str(e)
+            return
+        if fingerprint == self._fingerprint:
+            return
+        # mtime/size changed; only reload if the content actually differs
+        if self._hash_files(directory) == self._version:
+            self._fingerprint = fingerprint
+            return
+        logger.info("Model files changed on disk - reloading")
+        self._reload()
+
+    def get(self):
+        """Return (rf_model, lstm_model, scaler), loading them on first use"""
+        models = self._models
+        if models is not None and time.monotonic() - self._last_check < self.check_interval:
+            return models
+
+        # While another thread (re)loads, keep serving the current models
+        if not self._load_lock.acquire(blocking=models is None):
+            return models
+        try:
+            self._last_check = time.monotonic()
+            if self._models is None:
+                self._reload()
+            else:
+                self._check_for_update()
+        finally:
+            self._load_lock.release()
+
+        return self._models if self._models is not None else (None, None, None)
+
+    def reload(self):
+        """Force a reload from disk regardless of the file fingerprint"""
+        with self._load_lock:
+            self._last_check = time.monotonic()
+            self._reload()
+        return self.stats()
+
+    def warm_up(self):
+        """Load the models and run one dummy inference so the first request is fast"""
+        rf_model, lstm_model, scaler = self.get()
+        if rf_model is None:
+            return False
+
+        started = time.perf_counter()
+        rf_model.predict(np.zeros((1, rf_model.n_features_in_)))
+        lstm_model.predict(np.zeros((1,) + tuple(lstm_model.input_shape[1:])), verbose=0)
+        self._warmup_seconds = time.perf_counter() - started
+        return True
+
+    def stats(self):
+        files = {}
+        directory = self._active_dir()
+        for name in MODEL_FILES:
+            path = self._path(name, directory)
+            try:
+                st = os.stat(path)
+                files[name] = {
+                    "path": path,
+                    "bytes": st.st_size,
+                    "modified": datetime.fromtimestamp(st.st_mtime).isoformat(),
+                }
+            except OSError:
+                files[name] = {"path": path, "bytes": None, "modified": None}
+
+        lstm_params = lstm_runtime = None
+        if self._models is not None:
+            lstm_params = int(self._models[1].count_params())
+            lstm_runtime = "numpy" if isinstance(self._models[1], NumpyLSTM) else "keras"
+
+        return {
+            "loaded": self._models is not None,
+            "version": self._version,
+            "directory": self._fingerprint["directory"] if self._fingerprint else None,
+            "loaded_at": self._loaded_at,
+            "load_seconds": self._load_seconds,
+            "warmup_seconds": self._warmup_seconds,
+            "load_count": self._load_count,
+            "rss_delta_bytes": self._rss_delta,
+            "process_rss_bytes": _rss_bytes(),
+            "lstm_params": lstm_params,
+            "lstm_runtime": lstm_runtime,
+            "files": files,
+            "last_error": self._last_error,
+        }
+
+
+registry = ModelRegistry()
@@ -1,22 +1,100 @@
-import torch
-from transformers import pipeline
-from newsapi import NewsApiClient
+import os
+import hashlib
+import logging
+import threading
+import cachetools
+from services.news_store import news_store
+from services.metrics import span
 
-# Replace with your real key
-newsapi = NewsApiClient(api_key="ce1b85931a7e4b83b12f59686ed4606d")
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
-classifier = pipeline("sentiment-analysis", framework="pt")  # 'pt' = PyTorch
+BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
 
+# Article hash -> positivity in [0, 1]; each headline is only classified once
+_scores = cachetools.LRUCache(maxsize=50000)
+_scores_lock = threading.Lock()
 
-def get_news_sentiment(symbol):
-    try:
-        articles = newsapi.get_everything(q=symbol, language='en', page_size=5)
-        texts = " ".join([a['title'] + ". " + a.get("description", "") for a in articles['articles']])
-        if not texts.strip():
-            return 0.5  # neutral fallback
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier():
+    """Build the transformers pipeline on first use instead of at import time"""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                from transformers import pipeline
+                _classifier = pipeline("sentiment-analysis", framework="pt")  # 'pt' = PyTorch
+    return _classifier
+
+
+def _article_text(article):
+    return (article.get("title") or "") + ". " + (article.get("description") or "")
+
+
+def _article_key(article):
+    ident = article.get("url") or _article_text(article)
+    return hashlib.sha1(ident.encode("utf-8")).hexdigest()
+
+
+def score_articles(articles):
+    """Positivity score in [0, 1] for each article.
+
+    Cached articles are skipped; everything else goes through the model in
+    batches of BATCH_SIZE.
+    """
+    keys = [_article_key(a) for a in articles]
+    with _scores_lock:
+        missing = {k: a for k, a in zip(keys, articles) if k not in _scores}
 
-        result = classifier(texts[:512])[0]  # use first 512 chars
-        return 0.9 if result['label'] == 'POSITIVE' else 0.1
+    if missing:
+        texts = [_article_text(a) for a in missing.values()]
+        classifier = get_classifier()
+        with span("model", "sentiment"):
+            results = classifier(texts, batch_size=BATCH_SIZE, truncation=True)
+        with _scores_lock:
+            for key, result in zip(missing, results):
+                positive = result["label"] == "POSITIVE"
+                _scores[key] = result["score"] if positive else 1 - result["score"]
+
+    with _scores_lock:
+        return [_scores.get(k, 0.5) for k in keys]
+
+
+def fetch_symbol_articles(symbol, page_size=5):
+    """Latest articles for a symbol from the shared news store (deduplicated
+    by URL, refreshed in the background)"""
+    articles = news_store.symbol_articles(symbol)
+    return [a for a in articles if _article_text(a).strip(". ")][:page_size]
+
+
+def get_news_sentiment_batch(symbols, articles_by_symbol=None):
+    """{symbol: mean article positivity}, classifying all symbols' articles together"""
+    if articles_by_symbol is None:
+        articles_by_symbol = {}
+        for symbol in symbols:
+            try:
+                articles_by_symbol[symbol] = fetch_symbol_articles(symbol)
+            except Exception as e:
+                logger.error(f"News fetch for {symbol} failed: {str(e)}")
+                articles_by_symbol[symbol] = []
+
+    flat = [a for symbol in symbols for a in articles_by_symbol.get(symbol, [])]
+    try:
+        scores = iter(score_articles(flat)) if flat else iter(())
     except Exception as e:
-        print(f"Sentiment Error: {e}")
-        return 0.5
+        logger.error(f"Sentiment scoring failed: {str(e)}")
+        return {symbol: 0.5 for symbol in symbols}
+
+    sentiment = {}
+    for symbol in symbols:
+        symbol_scores = [next(scores) for _ in articles_by_symbol.get(symbol, [])]
+        # neutral fallback when there is no news
+        sentiment[symbol] = sum(symbol_scores) / len(symbol_scores) if symbol_scores else 0.5
+    return sentiment
+
+
+def get_news_sentiment(symbol):
+    return get_news_sentiment_batch([symbol])[symbol]
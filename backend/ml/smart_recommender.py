@@ -1,30 +1,61 @@
-import numpy as np
-import joblib
-import yfinance as yf
-from tensorflow.keras.models import load_model
-from sklearn.preprocessing import MinMaxScaler
 from datetime import datetime
-import os
 import logging
+from ml.model_registry import registry
+from ml.inference import predict_batch, score_to_action
+from services.market_data import fetch_close_matrix, unique_symbols
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def load_models():
-    """Load ML models with error handling"""
-    try:
-        rf_model = joblib.load("ml/models/rf_model.pkl")
-        lstm_model = load_model("ml/models/lstm_model.h5")
-        scaler_max = np.load("ml/models/lstm_scaler.npy")
-        
-        scaler = MinMaxScaler()
-        scaler.min_, scaler.scale_ = 0, 1 / scaler_max
-        scaler.data_max_ = scaler_max
-        
-        return rf_model, lstm_model, scaler
-    except Exception as e:
-        logger.error(f"Model loading failed: {str(e)}")
-        return None, None, None
+    """Return the shared, already-loaded ML models (loads them on first use)"""
+    return registry.get()
+
+def score_symbols(symbols, rf_model, lstm_model, scaler, closes=None):
+    """{symbol: suggestion} for every unique symbol, from one batch of bars and
+    one forward pass per model. Failed symbols map to an error entry."""
+    symbols = unique_symbols(symbols)
+    if closes is None:
+        # 3 months so every symbol has the 30-bar LSTM window
+        closes = fetch_close_matrix(symbols, period="3mo")
+
+    # One forward pass per model for all symbols
+    scores = predict_batch(closes, rf_model, lstm_model, scaler)
+
+    scored = {}
+    for symbol in symbols:
+        try:
+            # Get stock data
+            close = closes[symbol].dropna()
+            if close.empty:
+                raise Exception("No data from yfinance")
+            if symbol not in scores.index:
+                raise Exception("Not enough price history for the models")
+            
+            current_price = close.iloc[-1]
+            score = scores.loc[symbol]
+            action = score_to_action(score["up_score"])
+            
+            scored[symbol] = {
+                "symbol": symbol,
+                "current_price": round(current_price, 2),
+                "change_percent": round(close.pct_change().iloc[-1] * 100, 2),
+                "action": action,
+                "reason": f"LSTM sees a {score['p_up']:.0%} chance of an up move; "
+                          f"Random Forest: {score['p_buy']:.0%} buy / {score['p_sell']:.0%} sell",
+                "confidence": round(max(score["up_score"], 1 - score["up_score"]) * 100, 1),
+                "last_updated": datetime.now().isoformat()
+            }
+            
+        except Exception as e:
+            logger.error(f"Error processing {symbol}: {str(e)}")
+            scored[symbol] = {
+                "symbol": symbol,
+                "error": str(e),
+                "last_updated": datetime.now().isoformat()
+            }
+
+    return scored
 
 def generate_suggestion_smart(portfolio_data):
     """Generate suggestions with fallback data"""
@@ -47,36 +78,17 @@ def generate_suggestion_smart(portfolio_data):
                 "last_updated": datetime.now().isoformat()
             }]
 
+        # One bulk download for every holding instead of a round-trip per symbol
+        symbols = [s["symbol"] for s in portfolio_data["stocks"]]
+        scored = score_symbols(symbols, rf_model, lstm_model, scaler)
+
         suggestions = []
-        for stock in portfolio_data["stocks"]:
-            symbol = stock["symbol"]
-            
-            try:
-                # Get stock data
-                stock_data = yf.Ticker(symbol).history(period="1mo")
-                if stock_data.empty:
-                    raise Exception("No data from yfinance")
-                
-                current_price = stock_data["Close"].iloc[-1]
-                
-                # Generate recommendation (simplified for example)
-                suggestions.append({
-                    "symbol": symbol,
-                    "current_price": round(current_price, 2),
-                    "change_percent": round(stock_data["Close"].pct_change().iloc[-1] * 100, 2),
-                    "action": "Buy" if current_price > stock_data["Close"].mean() else "Hold",
-                    "reason": "Price above average" if current_price > stock_data["Close"].mean() else "Price below average",
-                    "confidence": 80.0 if current_price > stock_data["Close"].mean() else 60.0,
-                    "last_updated": datetime.now().isoformat()
-                })
-                
-            except Exception as e:
-                logger.error(f"Error processing {symbol}: {str(e)}")
-                suggestions.append({
-                    "symbol": symbol,
-                    "error": str(e),
-                    "last_updated": datetime.now().isoformat()
-                })
+        for symbol in symbols:
+            suggestion = scored.get(symbol.strip(), {
+                "error": "Invalid symbol",
+                "last_updated": datetime.now().isoformat()
+            })
+            suggestions.append({**suggestion, "symbol": symbol})
 
         return suggestions
 
@@ -0,0 +1,212 @@
+"""Train the RF and LSTM recommenders on a universe of symbols.
+
+Run from backend/:
+
+    python -m ml.train --symbols AAPL MSFT NVDA --period 2y --jobs 4
+    python -m ml.train --from-portfolios --no-promote
+
+Every run writes a versioned artifact set plus manifest.json under
+ml/models/versions/<version>/ and, unless --no-promote is given, points
+ml/models/CURRENT at it (the model registry picks the change up on its next
+file check).
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from ml.features import symbol_features, FEATURE_VERSION, FEATURE_CACHE_DIR
+from ml.inference import RF_FEATURES
+from ml.windows import LSTM_WINDOW, WindowDataset, WindowScaler
+from ml.lstm_runtime import export_lstm
+from ml.model_registry import MODEL_DIR, MODEL_FILES, LSTM_EXPORT, CURRENT_FILE
+from services.market_data import fetch_history, unique_symbols
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VERSIONS_DIR = os.path.join(MODEL_DIR, "versions")
+
+
+def load_universe(symbols, period):
+    """{symbol: (dates, closes)} from one batched history fetch"""
+    bars = fetch_history(symbols, period=period)
+    universe = {}
+    for symbol in symbols:
+        if bars.empty or symbol not in bars["Close"]:
+            logger.warning(f"No history for {symbol}, skipping")
+            continue
+        closes = bars["Close"][symbol].dropna()
+        if len(closes) > LSTM_WINDOW + 1:
+            universe[symbol] = (closes.index.values.astype("datetime64[D]"), closes.to_numpy())
+    return universe
+
+
+def _split(features, test_fraction):
+    """Chronological train/holdout split of one symbol's RF samples"""
+    X, y = features["rf_X"], features["rf_y"]
+    cut = len(X) - int(len(X) * test_fraction)
+    return X[:cut], y[:cut], X[cut:], y[cut:]
+
+
+def _stack(splits, part):
+    return np.concatenate([s[part] for s in splits])
+
+
+def _rf_accuracy(model, X, y):
+    if not len(X):
+        return None
+    return float((model.predict(pd.DataFrame(X, columns=RF_FEATURES)) == y).mean())
+
+
+def build_features(universe, jobs=None):
+    """Per-symbol feature tensors, built (or read from cache) on a process pool"""
+    symbols = list(universe)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(
+            symbol_features,
+            symbols,
+            [universe[s][0] for s in symbols],
+            [universe[s][1] for s in symbols],
+        )
+        return dict(zip(symbols, results))
+
+
+def train_universe(symbols, period="2y", jobs=None, epochs=10, test_fraction=0.2, promote=True):
+    # TensorFlow only loads when training actually starts
+    import joblib
+    from ml.train_rf import fit_rf
+    from ml.train_lstm import fit_lstm
+
+    started = time.perf_counter()
+    symbols = unique_symbols(s.upper() for s in symbols)
+    universe = load_universe(symbols, period)
+    if not universe:
+        raise ValueError("No usable history for any symbol")
+
+    features = build_features(universe, jobs)
+    splits = [_split(features[s], test_fraction) for s in universe]
+
+    rf_X, rf_y, rf_X_test, rf_y_test = (_stack(splits, i) for i in range(4))
+    rf_model = fit_rf(rf_X, rf_y, n_jobs=jobs or -1)
+
+    # Each window is scaled by its own max close, in training and in serving,
+    # so symbols at very different price levels share one input range. The
+    # series live in a memmap and windows are streamed in batches.
+    scaler = WindowScaler("window")
+    series_path = os.path.join(FEATURE_CACHE_DIR, f"lstm_series_{os.getpid()}.npy")
+    windows = WindowDataset.create(series_path, [c for _, c in universe.values()], scaler=scaler)
+    lstm_train, lstm_test = windows.split(test_fraction)
+    lstm_model = fit_lstm(
+        windows.as_tf_dataset(lstm_train, batch_size=16, seed=0),
+        epochs=epochs,
+        verbose=0,
+        input_shape=(LSTM_WINDOW, 1),
+    )
+
+    metrics = {
+        "rf_train_accuracy": _rf_accuracy(rf_model, rf_X, rf_y),
+        "rf_test_accuracy": _rf_accuracy(rf_model, rf_X_test, rf_y_test),
+        "lstm_test_accuracy": None,
+        "rf_label_counts": {str(k): int(v) for k, v in zip(*np.unique(rf_y, return_counts=True))},
+    }
+    if len(lstm_test):
+        hits = sum(
+            int(((lstm_model.predict(X, verbose=0).reshape(-1) > 0.5) == y).sum())
+            for X, y in windows.batches(lstm_test)
+        )
+        metrics["lstm_test_accuracy"] = hits / len(lstm_test)
+    del windows
+    os.remove(series_path)
+
+    version = datetime.now().strftime("%Y%m%d-%H%M%S")
+    out_dir = os.path.join(VERSIONS_DIR, version)
+    os.makedirs(out_dir, exist_ok=True)
+    joblib.dump(rf_model, os.path.join(out_dir, MODEL_FILES["rf"]))
+    lstm_model.save(os.path.join(out_dir, MODEL_FILES["lstm"]))
+    export_lstm(lstm_model, os.path.join(out_dir, LSTM_EXPORT))
+    np.save(os.path.join(out_dir, MODEL_FILES["scaler"]), scaler.to_artifact())
+
+    manifest = {
+        "version": version,
+        "trained_at": datetime.now().isoformat(),
+        "training_seconds": round(time.perf_counter() - started, 2),
+        "period": period,
+        "feature_version": FEATURE_VERSION,
+        "lstm_window": LSTM_WINDOW,
+        "lstm_scaling": scaler.mode,
+        "epochs": epochs,
+        "test_fraction": test_fraction,
+        "symbols": {
+            symbol: {"from": str(dates[0]), "to": str(dates[-1]), "bars": len(dates)}
+            for symbol, (dates, _) in universe.items()
+        },
+        "skipped_symbols": [s for s in symbols if s not in universe],
+        "samples": {"rf": len(rf_X), "lstm": len(lstm_train)},
+        "metrics": metrics,
+    }
+    # Written last and atomically: a manifest marks a complete version
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    if promote:
+        promote_version(out_dir)
+    return manifest
+
+
+def promote_version(version_dir, model_dir=MODEL_DIR):
+    """Serve a trained version by atomically replacing the CURRENT pointer.
+
+    Artifacts stay in their version directory, so the registry loads either
+    the old set or the new one, never a mix. Promoting an older version
+    rolls back.
+    """
+    version = os.path.basename(os.path.normpath(version_dir))
+    if not os.path.isfile(os.path.join(model_dir, "versions", version, "manifest.json")):
+        raise ValueError(f"Not a complete model version: {version_dir}")
+    tmp = os.path.join(model_dir, f".{CURRENT_FILE}.tmp")
+    with open(tmp, "w") as f:
+        f.write(version + "\n")
+    os.replace(tmp, os.path.join(model_dir, CURRENT_FILE))
+
+
+def _held_symbols():
+    from database import portfolio_collection
+    return [s for s in portfolio_collection.distinct("stocks.symbol") if isinstance(s, str)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the recommender models on many symbols")
+    parser.add_argument("--symbols", nargs="+", default=[], help="ticker symbols to train on")
+    parser.add_argument("--from-portfolios", action="store_true", help="add every symbol held in any portfolio")
+    parser.add_argument("--period", default="2y", help="history to train on, e.g. 6mo, 2y")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--test-fraction", type=float, default=0.2, help="latest share of each symbol held out")
+    parser.add_argument("--no-promote", action="store_true", help="only write the versioned artifacts")
+    args = parser.parse_args(argv)
+
+    symbols = args.symbols + (_held_symbols() if args.from_portfolios else [])
+    if not symbols:
+        parser.error("give --symbols and/or --from-portfolios")
+
+    manifest = train_universe(
+        symbols,
+        period=args.period,
+        jobs=args.jobs,
+        epochs=args.epochs,
+        test_fraction=args.test_fraction,
+        promote=not args.no_promote,
+    )
+    print(f"✅ Trained version {manifest['version']} on {len(manifest['symbols'])} symbols")
+    print(json.dumps(manifest["metrics"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,50 @@
-import yfinance as yf
 import numpy as np
-import pandas as pd
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Dense, LSTM
 from tensorflow.keras.optimizers import Adam
-from sklearn.preprocessing import MinMaxScaler
 import os
+from services.market_data import fetch_history
+from ml.features import lstm_dataset
+from ml.lstm_runtime import export_lstm
 
-def train_lstm(symbol='AAPL'):
-    df = yf.download(symbol, period="6mo", interval="1d")
-    data = df[['Close']].dropna()
-
-    # Scale data
-    scaler = MinMaxScaler()
-    scaled_data = scaler.fit_transform(data)
-
-    # Create X, y (30-day windows)
-    X = []
-    y = []
-
-    for i in range(30, len(scaled_data) - 1):
-        X.append(scaled_data[i-30:i])
-        next_day = scaled_data[i+1][0]
-        today = scaled_data[i][0]
-        y.append(1 if next_day > today else 0)  # 1 = Up, 0 = Down
+def fit_lstm(X, y=None, epochs=10, batch_size=16, verbose=1, input_shape=None):
+    """Fit the LSTM(50) -> Dense(1, sigmoid) up/down classifier.
 
-    X = np.array(X)
-    y = np.array(y)
-
-    # LSTM model
+    X is an array of windows with labels y, or a tf.data.Dataset of
+    (windows, labels) batches (see WindowDataset.as_tf_dataset) together
+    with input_shape.
+    """
     model = Sequential()
-    model.add(LSTM(units=50, return_sequences=False, input_shape=(X.shape[1], X.shape[2])))
+    model.add(LSTM(units=50, return_sequences=False, input_shape=input_shape or X.shape[1:]))
     model.add(Dense(1, activation='sigmoid'))
 
     model.compile(loss='binary_crossentropy', optimizer=Adam(0.001), metrics=['accuracy'])
-    model.fit(X, y, epochs=10, batch_size=16, verbose=1)
+    if y is None:
+        model.fit(X, epochs=epochs, verbose=verbose)
+    else:
+        model.fit(X, y, epochs=epochs, batch_size=batch_size, verbose=verbose)
+    return model
+
+def train_lstm(symbol='AAPL'):
+    # Same local bar store the API serves from (only the missing tail is downloaded)
+    df = fetch_history([symbol], period="6mo").xs(symbol, axis=1, level=1)
+    closes = df['Close'].dropna().to_numpy()
+
+    # Scale the way serving does (ModelRegistry: close / saved max)
+    scaler_max = np.array([closes.max()])
+    X, y = lstm_dataset(closes / scaler_max[0])  # 30-day windows, 1 = Up, 0 = Down
+    model = fit_lstm(X, y)
 
     # Save model and scaler
     os.makedirs("ml/models", exist_ok=True)
     model.save("ml/models/lstm_model.h5")
-    np.save("ml/models/lstm_scaler.npy", scaler.data_max_)
+    np.save("ml/models/lstm_scaler.npy", scaler_max)
+    # Weights for the TensorFlow-free serving runtime (ml/lstm_runtime.py)
+    export_lstm(model, "ml/models/lstm_model.npz")
 
-    print("✅ LSTM model saved to ml/models/lstm_model.h5")
+    print("✅ LSTM model saved to ml/models/lstm_model.h5 (+ lstm_model.npz)")
 
+# Single symbol; see ml/train.py for training on a whole universe.
+# Run from backend/: python -m ml.train_lstm
 if __name__ == "__main__":
     train_lstm()
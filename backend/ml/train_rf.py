@@ -1,29 +1,24 @@
-import yfinance as yf
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 import joblib
 import os
+from services.market_data import fetch_history
+from ml.features import rf_dataset
+from ml.inference import RF_FEATURES
 
-def train_rf(symbol='AAPL'):
-    stock = yf.Ticker(symbol)
-    df = stock.history(period='6mo')
-
-    # Feature Engineering
-    df['daily_return'] = df['Close'].pct_change()
-    df['ma7'] = df['Close'].rolling(7).mean()
-    df['ma21'] = df['Close'].rolling(21).mean()
-    df.dropna(inplace=True)
+def fit_rf(X, y, n_jobs=None):
+    """Fit the Sell/Hold/Buy forest; n_jobs=-1 uses every core"""
+    model = RandomForestClassifier(n_jobs=n_jobs)
+    model.fit(pd.DataFrame(X, columns=RF_FEATURES), y)
+    return model
 
-    # Labels: 1 = Buy, -1 = Sell, 0 = Hold
-    df['target'] = df['daily_return'].apply(
-        lambda x: 1 if x > 0.02 else (-1 if x < -0.02 else 0)
-    )
-
-    X = df[['daily_return', 'ma7', 'ma21']]
-    y = df['target']
+def train_rf(symbol='AAPL'):
+    # Same local bar store the API serves from (only the missing tail is downloaded)
+    df = fetch_history([symbol], period='6mo').xs(symbol, axis=1, level=1)
 
-    model = RandomForestClassifier()
-    model.fit(X, y)
+    # Features: daily_return, ma7, ma21; labels: 1 = Buy, -1 = Sell, 0 = Hold
+    X, y = rf_dataset(df['Close'].dropna().to_numpy())
+    model = fit_rf(X, y)
 
     # Save model
     model_path = "ml/models/rf_model.pkl"
@@ -32,5 +27,7 @@ def train_rf(symbol='AAPL'):
 
     print(f"✅ Random Forest model trained and saved to {model_path}")
 
+# Single symbol; see ml/train.py for training on a whole universe.
+# Run from backend/: python -m ml.train_rf
 if __name__ == "__main__":
     train_rf()
@@ -0,0 +1,140 @@
+import itertools
+import os
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Serving and training must agree on the window length
+LSTM_WINDOW = 30
+
+
+def sliding_windows(series, window=LSTM_WINDOW):
+    """Every labelled `window`-long window of a 1-D series, as a strided view.
+
+    Window k covers series[k:k + window]. Only windows that have a label
+    (see window_labels) are returned, so there are len(series) - window - 1.
+    No data is copied, whatever the length of the series.
+    """
+    samples = max(len(series) - window - 1, 0)
+    if samples == 0:
+        return np.empty((0, window), dtype=np.asarray(series).dtype)
+    return sliding_window_view(series, window)[:samples]
+
+
+def window_labels(series, window=LSTM_WINDOW):
+    """1 if the bar after the one following window k closed higher, else 0"""
+    series = np.asarray(series)
+    if len(series) <= window + 1:
+        return np.empty(0, dtype=int)
+    return (series[window + 1:] > series[window:-1]).astype(int)
+
+
+def latest_windows(matrix, window=LSTM_WINDOW):
+    """(rows, window, 1) batch of each row's most recent window (for serving)"""
+    return sliding_window_view(matrix, window, axis=1)[:, -1, :, np.newaxis]
+
+
+class WindowScaler:
+    """Scaling of raw-close LSTM input windows, shared by training and serving.
+
+    "window" divides every window by its own highest close, so windows of
+    any symbol or price level fall in (0, 1]. "global" multiplies by a fixed
+    factor (1 / max close of the training data), which is what single-symbol
+    artifacts from ml/train_lstm.py expect.
+    """
+
+    def __init__(self, mode="window", scale=1.0):
+        if mode not in ("window", "global"):
+            raise ValueError(f"Unknown scaling mode: {mode}")
+        self.mode = mode
+        self.scale = scale
+
+    @classmethod
+    def from_artifact(cls, scaler_max):
+        """Scaler for a saved lstm_scaler.npy: empty means per-window"""
+        scaler_max = np.asarray(scaler_max, dtype=float).reshape(-1)
+        return cls("window") if not len(scaler_max) else cls("global", 1 / scaler_max[0])
+
+    def to_artifact(self):
+        return np.empty(0) if self.mode == "window" else np.array([1 / self.scale])
+
+    def transform(self, windows):
+        """Scale a (..., window, 1) batch of raw closes"""
+        if self.mode == "window":
+            return windows / windows.max(axis=-2, keepdims=True)
+        return windows * self.scale
+
+
+class WindowDataset:
+    """LSTM training windows over a memory-mapped price file.
+
+    All symbols' close series are written back to back into one float32
+    .npy file and opened as a memmap; windows are strided views into it and
+    only the requested batch is ever copied into RAM, so memory stays flat
+    as history grows. Windows never straddle two symbols. Each batch is
+    scaled by `scaler` on the way out, exactly as serving scales it.
+    """
+
+    def __init__(self, path, offsets, window=LSTM_WINDOW, scaler=None):
+        self.path = path
+        self.window = window
+        self.scaler = scaler or WindowScaler()
+        # offsets[i]:offsets[i + 1] is symbol i's slice of the series file
+        self.offsets = np.asarray(offsets)
+        self.series = np.load(path, mmap_mode="r")
+        self._windows = sliding_window_view(self.series, window)
+
+    @classmethod
+    def create(cls, path, series_by_symbol, window=LSTM_WINDOW, scaler=None):
+        """Write each series to `path` and open it"""
+        lengths = [len(s) for s in series_by_symbol]
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(int(offsets[-1]),))
+        for start, series in zip(offsets, series_by_symbol):
+            out[start:start + len(series)] = np.asarray(series, dtype=np.float32)
+        out.flush()
+        del out
+        return cls(path, offsets, window, scaler)
+
+    def split(self, test_fraction=0.0):
+        """Window start positions, (train, test), with each symbol's latest
+        `test_fraction` of windows held out"""
+        train, test = [], []
+        for start, end in zip(self.offsets[:-1], self.offsets[1:]):
+            samples = max(int(end - start) - self.window - 1, 0)
+            cut = samples - int(samples * test_fraction)
+            train.append(np.arange(start, start + cut))
+            test.append(np.arange(start + cut, start + samples))
+        return np.concatenate(train).astype(np.int64), np.concatenate(test).astype(np.int64)
+
+    def take(self, starts):
+        """(X, y) for the given window start positions; copies only these rows"""
+        X = self.scaler.transform(self._windows[starts][:, :, np.newaxis])
+        after = self.series[starts + self.window]
+        y = (self.series[starts + self.window + 1] > after).astype(np.int64)
+        return X, y
+
+    def batches(self, starts, batch_size=256, shuffle=False, seed=None):
+        """Stream (X, y) batches so the full window tensor is never built"""
+        if shuffle:
+            starts = np.random.default_rng(seed).permutation(starts)
+        for i in range(0, len(starts), batch_size):
+            yield self.take(starts[i:i + batch_size])
+
+    def as_tf_dataset(self, starts, batch_size=256, shuffle=True, seed=None):
+        """tf.data view of batches(); reshuffled every epoch when shuffle is set"""
+        import tensorflow as tf
+
+        epoch = itertools.count()
+
+        def generate():
+            epoch_seed = None if seed is None else seed + next(epoch)
+            yield from self.batches(starts, batch_size, shuffle, epoch_seed)
+
+        return tf.data.Dataset.from_generator(generate, output_signature=(
+            tf.TensorSpec(shape=(None, self.window, 1), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.int64),
+        )).prefetch(2)
+
+    def __len__(self):
+        return int(sum(max(int(e - s) - self.window - 1, 0) for s, e in zip(self.offsets[:-1], self.offsets[1:])))
@@ -1,7 +1,13 @@
-from pydantic import BaseModel,EmailStr, Field, validator
-from typing import List, Optional
+from pydantic import BaseModel,EmailStr, Field, validator, field_serializer
+from typing import Annotated, List, Optional
+from datetime import date
 import re
 
+# Exchange tickers as yfinance spells them, e.g. AAPL, BRK-B, ^GSPC, RELIANCE.NS,
+# EURUSD=X. Symbols name files in the history store, so nothing path-like gets through.
+SYMBOL_PATTERN = r"^[A-Za-z0-9^][A-Za-z0-9.^=-]{0,14}$"
+Symbol = Annotated[str, Field(pattern=SYMBOL_PATTERN)]
+
 class User(BaseModel):
     name: str
     email: EmailStr
@@ -24,11 +30,28 @@ class LoginUser(BaseModel):
     password: str
 
 class PortfolioEntry(BaseModel):
-    symbol: str
+    symbol: Symbol
     quantity: int
     buy_price: float
-    buy_date: str  # Format: "YYYY-MM-DD"
+    buy_date: date  # Format: "YYYY-MM-DD"
+
+    @field_serializer("buy_date")
+    def serialize_buy_date(self, v):
+        # Stored in Mongo (and returned) as "YYYY-MM-DD"
+        return v.isoformat()
 
 class PortfolioRequest(BaseModel):
     stocks: List[PortfolioEntry]
 
+class PortfolioBulkRequest(BaseModel):
+    add: List[PortfolioEntry] = []
+    remove: List[str] = []
+
+class OptimizeRequest(BaseModel):
+    method: str = Field("mean_variance", pattern="^(mean_variance|risk_parity)$")
+    candidates: List[Symbol] = Field([], max_length=200)  # symbols to consider buying besides the holdings
+    risk_aversion: float = Field(5.0, gt=0)
+    max_weight: float = Field(0.25, gt=0, le=1)
+    confidence: float = Field(0.95, gt=0.5, lt=1)
+    lookback: int = Field(252, ge=20, le=756)  # trading days of returns
+    min_trade_pct: float = Field(0.5, ge=0, le=100)  # skip trades below this % of the portfolio
@@ -0,0 +1,38 @@
+from datetime import date, datetime
+from fastapi.responses import JSONResponse
+import numpy as np
+import orjson
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    """Types orjson doesn't serialize natively"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime, date)):
+        # pandas.Timestamp is a datetime subclass orjson doesn't pick up
+        return obj.isoformat()
+    if isinstance(obj, set):
+        return list(obj)
+    if hasattr(obj, "to_numpy"):
+        # pandas Series / Index
+        return obj.to_numpy()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson-backed JSON response with native NumPy, pandas and datetime support.
+
+    It is the app's default response class. FastAPI still runs
+    jsonable_encoder over plain return values, so handlers returning NumPy
+    data return this response directly to skip that pass. NaN and inf
+    serialize as null.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from ml.model_registry import registry
+from services.price_cache import price_cache
+from services.scheduler import scheduler
+from services.quote_stream import hub
+from auth import token_cache_stats
+from services.passwords import hasher
+from services.news_store import news_store
+from ml.collaborative import holdings_index
+from services.optimizer import covariance_cache
+import hmac
+import os
+
+router = APIRouter()
+
+# ✅ Admin endpoints are disabled unless ADMIN_TOKEN is configured
+def require_admin(x_admin_token: str = Header(None)):
+    admin_token = os.getenv("ADMIN_TOKEN")
+    # Constant-time comparison so response timing doesn't leak the token
+    if not admin_token or not hmac.compare_digest((x_admin_token or "").encode(), admin_token.encode()):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+# ✅ Model registry status: version, load time, memory footprint
+@router.get("/models", dependencies=[Depends(require_admin)])
+def model_status():
+    return registry.stats()
+
+# ✅ Force a reload of the model files from disk
+@router.post("/models/reload", dependencies=[Depends(require_admin)])
+def reload_models():
+    stats = registry.reload()
+    if stats["last_error"]:
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {stats['last_error']}")
+    return stats
+
+# ✅ Shared price cache counters (hits, misses, evictions)
+@router.get("/cache", dependencies=[Depends(require_admin)])
+def cache_status():
+    return price_cache.stats()
+
+# ✅ Background scheduler status and per-job timings
+@router.get("/scheduler", dependencies=[Depends(require_admin)])
+def scheduler_status():
+    return scheduler.stats()
+
+# ✅ Run one refresh now and wait for it
+@router.post("/scheduler/run", dependencies=[Depends(require_admin)])
+async def run_scheduler():
+    await scheduler.run_once()
+    return scheduler.stats()
+
+# ✅ Quote stream fan-out: subscribers, watched symbols, dropped slow clients
+@router.get("/stream", dependencies=[Depends(require_admin)])
+def stream_status():
+    return hub.stats()
+
+# ✅ Verified-token cache: size and hit ratio
+@router.get("/auth", dependencies=[Depends(require_admin)])
+def auth_cache_status():
+    return token_cache_stats()
+
+# ✅ bcrypt pool: in-flight hashes, completed, requests shed with 503
+@router.get("/passwords", dependencies=[Depends(require_admin)])
+def password_hashing_status():
+    return hasher.stats()
+
+# ✅ News store: articles, watched feeds, cache hits vs upstream calls
+@router.get("/news", dependencies=[Depends(require_admin)])
+def news_status():
+    return news_store.stats()
+
+# ✅ "Investors like you" index: users, symbols, pending deltas, last build
+@router.get("/recommender", dependencies=[Depends(require_admin)])
+def recommender_status():
+    return holdings_index.stats()
+
+# ✅ Covariance cache: entries, hits vs incremental vs full recomputes
+@router.get("/optimizer", dependencies=[Depends(require_admin)])
+def optimizer_status():
+    return covariance_cache.stats()
+
+# ✅ Rebuild the holdings index from Mongo now
+@router.post("/recommender/rebuild", dependencies=[Depends(require_admin)])
+def rebuild_recommender():
+    holdings_index.rebuild()
+    return holdings_index.stats()
@@ -1,19 +1,18 @@
 from fastapi import APIRouter
-import requests
-import os
 from datetime import datetime
+from services.news_store import news_store, http_client, HEADLINES
 
 router = APIRouter()
 
-NEWS_API_KEY = os.getenv("NEWS_API_KEY", "ea93d86409174f98b7aeb1b99c2efafc")
+async def close_http_client():
+    await news_store.stop()
+    await http_client.aclose()
 
 @router.get("/news")
 async def get_news():
     try:
-        url = f"https://newsapi.org/v2/top-headlines?category=business&language=en&apiKey={NEWS_API_KEY}"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        articles = response.json().get("articles", [])
+        # Served from the local news store; only a cold start waits on NewsAPI
+        articles = await news_store.headlines(12)
         news_list = []
         for article in articles[:12]:
             news_list.append({
@@ -1,75 +1,137 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from auth import decode_token
+from fastapi import APIRouter, Depends, HTTPException, Query
+from dependencies import get_current_user, get_portfolio as current_portfolio
 from database import portfolio_collection
-from models import PortfolioRequest, PortfolioEntry
+from models import PortfolioRequest, PortfolioEntry, PortfolioBulkRequest, OptimizeRequest
+from pymongo import ReturnDocument
+import re
 from ml.smart_recommender import generate_suggestion_smart  # or your actual model name
+from services.market_data import MarketDataUnavailable
+from services.valuation import value_portfolio
+from services.optimizer import optimize_portfolio
+from ml.collaborative import holdings_index
+from responses import FastJSONResponse
 
 router = APIRouter()
-security = HTTPBearer()
 
-# ✅ Decode JWT and get user_id
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    user = decode_token(token)
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return user
+def symbol_matcher(symbol):
+    """Case-insensitive exact match on a stock symbol"""
+    return re.compile(f"^{re.escape(symbol)}$", re.IGNORECASE)
 
-# ✅ Add stock to portfolio
+# ✅ Add stock to portfolio (single atomic push, creates the portfolio if needed)
 @router.post("/portfolio/add")
 def add_to_portfolio(entry: PortfolioEntry, user=Depends(get_current_user)):
     user_id = user["user_id"]
 
-    record = portfolio_collection.find_one({"user_id": user_id})
-    new_stock = entry.dict()
-
-    if record:
-        updated = record.get("stocks", [])
-        updated.append(new_stock)
-        portfolio_collection.update_one(
-            {"user_id": user_id},
-            {"$set": {"stocks": updated}}
-        )
-    else:
-        portfolio_collection.insert_one({"user_id": user_id, "stocks": [new_stock]})
+    record = portfolio_collection.find_one_and_update(
+        {"user_id": user_id},
+        {"$push": {"stocks": entry.dict()}},
+        projection={"_id": 0, "stocks": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    holdings_index.update_user(user_id, record["stocks"])
 
     return {"msg": "Stock added to portfolio"}
 
 # ✅ Get portfolio
 @router.get("/portfolio")
-def get_portfolio(user=Depends(get_current_user)):
-    user_id = user["user_id"]
-    record = portfolio_collection.find_one({"user_id": user_id})
+def get_portfolio(record=Depends(current_portfolio)):
     if not record:
         return {"stocks": []}
     return {"stocks": record["stocks"]}
 
-# ✅ Delete stock by symbol
+# ✅ Portfolio value, cost basis, P&L, weights and time-weighted return
+@router.get("/portfolio/value")
+def get_portfolio_value(user=Depends(get_current_user), record=Depends(current_portfolio)):
+    if not record or not record.get("stocks"):
+        raise HTTPException(status_code=404, detail="No portfolio found")
+
+    try:
+        return value_portfolio(user["user_id"], record["stocks"])
+    except MarketDataUnavailable as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except ValueError as e:
+        # Holdings that can't be valued as stored (bad symbol or date)
+        raise HTTPException(status_code=422, detail=str(e))
+
+# ✅ Risk (covariance, VaR) and mean-variance / risk-parity rebalancing trades
+@router.post("/portfolio/optimize")
+def optimize(request: OptimizeRequest, record=Depends(current_portfolio)):
+    if not record or not record.get("stocks"):
+        raise HTTPException(status_code=404, detail="No portfolio found")
+
+    try:
+        return optimize_portfolio(record["stocks"], **request.dict())
+    except MarketDataUnavailable as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+# ✅ Delete stock by symbol (single atomic pull)
 @router.delete("/portfolio/delete/{symbol}")
 def delete_stock(symbol: str, user=Depends(get_current_user)):
     user_id = user["user_id"]
-    record = portfolio_collection.find_one({"user_id": user_id})
-    if not record or "stocks" not in record:
+    record = portfolio_collection.find_one_and_update(
+        {"user_id": user_id, "stocks": {"$exists": True}},
+        {"$pull": {"stocks": {"symbol": symbol_matcher(symbol)}}},
+        projection={"_id": 0, "stocks": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if record is None:
         raise HTTPException(status_code=404, detail="No portfolio found")
+    holdings_index.update_user(user_id, record["stocks"])
 
-    updated_stocks = [s for s in record["stocks"] if s["symbol"].lower() != symbol.lower()]
-    portfolio_collection.update_one(
+    return {"msg": f"{symbol.upper()} removed from portfolio"}
+
+# ✅ Add and remove several stocks in one atomic write (removals run first)
+@router.post("/portfolio/bulk")
+def bulk_update_portfolio(data: PortfolioBulkRequest, user=Depends(get_current_user)):
+    user_id = user["user_id"]
+    if not data.add and not data.remove:
+        return {"msg": "Nothing to update", "added": 0, "removed": 0}
+
+    targets = list({s.strip().upper() for s in data.remove})
+    added = [stock.dict() for stock in data.add]
+    # One pipeline update: keep the lots not being removed, then append the new ones
+    before = portfolio_collection.find_one_and_update(
         {"user_id": user_id},
-        {"$set": {"stocks": updated_stocks}}
+        [{"$set": {"stocks": {"$concatArrays": [
+            {"$filter": {
+                "input": {"$ifNull": ["$stocks", []]},
+                "as": "lot",
+                "cond": {"$eq": [{"$in": [{"$toUpper": "$$lot.symbol"}, targets]}, False]},
+            }},
+            {"$literal": added},
+        ]}}}],
+        projection={"_id": 0, "stocks": 1},
+        upsert=bool(added),
+        return_document=ReturnDocument.BEFORE
     )
-    return {"msg": f"{symbol.upper()} removed from portfolio"}
+    # Count the removed lots in the snapshot the update was applied to
+    previous = (before or {}).get("stocks", [])
+    kept = [s for s in previous if str(s.get("symbol", "")).upper() not in targets]
+
+    holdings_index.update_user(user_id, kept + added)
+    return {"msg": "Portfolio updated", "added": len(added), "removed": len(previous) - len(kept)}
+
+# ✅ "Investors like you": symbols held alongside yours that you don't own yet
+@router.get("/portfolio/recommendations")
+def get_recommendations(k: int = Query(10, ge=1, le=50), user=Depends(get_current_user)):
+    recommendations = holdings_index.recommend(user["user_id"], k)
+    return {
+        "recommendations": [{"symbol": symbol, "score": score} for symbol, score in recommendations],
+        # No holdings yet: the most widely held symbols instead
+        "cold_start": user["user_id"] not in holdings_index.users,
+    }
 
 # ✅ Optional: Suggest stocks using ML
 @router.post("/portfolio/suggest")
-def suggest_portfolio(user=Depends(get_current_user)):
-    user_id = user["user_id"]
-    record = portfolio_collection.find_one({"user_id": user_id})
+def suggest_portfolio(record=Depends(current_portfolio)):
     if not record or "stocks" not in record:
         raise HTTPException(status_code=404, detail="No portfolio found")
 
     suggestions = generate_suggestion_smart({"stocks": record["stocks"]})
-    return {"suggestions": suggestions}
+    return FastJSONResponse({"suggestions": suggestions})
 
 # ✅ Optional: Overwrite portfolio entirely
 @router.post("/portfolio")
@@ -80,4 +142,5 @@ def save_portfolio(data: PortfolioRequest, user=Depends(get_current_user)):
         {"$set": {"stocks": [stock.dict() for stock in data.stocks]}},
         upsert=True
     )
+    holdings_index.update_user(user_id, [stock.dict() for stock in data.stocks])
     return {"msg": "Portfolio saved successfully"}
@@ -1,33 +1,82 @@
-from fastapi import APIRouter, Query
-import yfinance as yf
+import os
+from fastapi import APIRouter, HTTPException, Query
+from services.market_data import fetch_history, fetch_info_and_closes, unique_symbols, is_valid_symbol
+from ml.indicators import latest_indicators
+from responses import FastJSONResponse
 
 router = APIRouter()
 
+# Each new symbol costs a backfill download, so bound what one request can ask for
+MAX_SYMBOLS_PER_REQUEST = int(os.getenv("MAX_SYMBOLS_PER_REQUEST", "50"))
+
+def parse_symbols(symbols):
+    """Comma-separated query value -> validated, de-duplicated symbol list (422 otherwise)"""
+    requested = [s.strip() for s in symbols.split(",") if s.strip()]
+    invalid = [s for s in requested if not is_valid_symbol(s)]
+    if invalid:
+        raise HTTPException(status_code=422, detail=f"Invalid symbols: {', '.join(invalid[:10])}")
+    symbol_list = unique_symbols(requested)
+    if not symbol_list:
+        raise HTTPException(status_code=422, detail="No symbols given")
+    if len(symbol_list) > MAX_SYMBOLS_PER_REQUEST:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_SYMBOLS_PER_REQUEST} symbols per request")
+    return symbol_list
+
+def _stock_info(symbol, info_by_symbol):
+    info = info_by_symbol[symbol]
+    if isinstance(info, Exception):
+        raise info
+    return {
+        "symbol": symbol,
+        "company": info.get("shortName", symbol),
+        "current_price": info.get("currentPrice", 0),
+    }
+
+# ✅ Price history per symbol. layout=columnar shares one date axis across all
+# symbols (nulls where a symbol has no bar), which is much smaller for charts
 @router.get("/stocks/data")
-def get_stock_data(symbols: str = Query(..., description="Comma-separated list of stock symbols")):
-    symbol_list = symbols.split(",")
+def get_stock_data(
+    symbols: str = Query(..., description="Comma-separated list of stock symbols"),
+    period: str = Query("7d", pattern=r"^\d{1,3}(d|wk|mo|y)$", description="History window, e.g. 7d, 1mo, 1y"),
+    layout: str = Query("rows", pattern="^(rows|columnar)$", description="rows or columnar"),
+):
+    symbol_list = parse_symbols(symbols)
     result = []
 
+    # One bulk history download + concurrent info lookups for the whole list
+    info_by_symbol, closes = fetch_info_and_closes(symbol_list, period=period)
+
     for symbol in symbol_list:
         try:
-            stock = yf.Ticker(symbol)
-            info = stock.info
-
-            hist = stock.history(period="7d")["Close"]
-            trend = hist.tolist()
-            dates = hist.index.strftime("%Y-%m-%d").tolist()
-
-            result.append({
-                "symbol": symbol,
-                "company": info.get("shortName", symbol),
-                "current_price": info.get("currentPrice", 0),
-                "trend": trend,
-                "dates": dates
-            })
+            entry = _stock_info(symbol, info_by_symbol)
+            if layout == "columnar":
+                entry["close"] = closes[symbol].to_numpy()
+            else:
+                hist = closes[symbol].dropna()
+                entry["trend"] = hist.to_numpy()
+                entry["dates"] = hist.index.strftime("%Y-%m-%d").tolist()
+            result.append(entry)
         except Exception as e:
             result.append({
                 "symbol": symbol,
                 "error": str(e)
             })
 
-    return {"data": result}
+    # Returned directly so the float arrays go straight to orjson
+    if layout == "columnar":
+        dates = closes.index.strftime("%Y-%m-%d").tolist() if len(closes) else []
+        return FastJSONResponse({"dates": dates, "data": result})
+    return FastJSONResponse({"data": result})
+
+@router.get("/stocks/indicators")
+def get_indicators(symbols: str = Query(..., description="Comma-separated list of stock symbols")):
+    symbol_list = parse_symbols(symbols)
+    # SMA/EMA/RSI/MACD/Bollinger/ATR for every symbol from one batch of stored bars
+    bars = fetch_history(symbol_list, period="1y")
+    indicators = latest_indicators(bars) if not bars.empty else {}
+
+    return {"data": [
+        {"symbol": symbol, "indicators": indicators[symbol]} if symbol in indicators
+        else {"symbol": symbol, "error": "No data from yfinance"}
+        for symbol in symbol_list
+    ]}
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from services.quote_stream import hub, symbol_list
+import asyncio
+import json
+
+router = APIRouter()
+
+HEARTBEAT_SECONDS = 15
+
+# ✅ WebSocket quotes: send {"subscribe": [...]} / {"unsubscribe": [...]}
+@router.websocket("/quotes")
+async def quotes_ws(websocket: WebSocket):
+    await websocket.accept()
+    sub = hub.subscribe()
+
+    async def receive():
+        while True:
+            try:
+                message = await websocket.receive_json()
+                if not isinstance(message, dict):
+                    raise ValueError("expected a JSON object")
+                subscribe = symbol_list(message.get("subscribe", []))
+                unsubscribe = symbol_list(message.get("unsubscribe", []))
+            except ValueError as e:
+                # Bad message (including invalid JSON): report it, keep the connection
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+            hub.add_symbols(sub, subscribe)
+            hub.remove_symbols(sub, unsubscribe)
+
+    async def send():
+        while not sub.closed:
+            batch = await sub.next_batch(timeout=HEARTBEAT_SECONDS)
+            if sub.closed:
+                break
+            await websocket.send_json({"type": "quotes" if batch else "heartbeat", "data": batch})
+
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(send())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.unsubscribe(sub)
+        if sub.closed and websocket.client_state.name == "CONNECTED":
+            await websocket.close()
+
+# ✅ Server-Sent Events quotes for a fixed symbol list
+@router.get("/quotes/sse")
+async def quotes_sse(symbols: str = Query(..., description="Comma-separated list of stock symbols")):
+    async def events():
+        sub = hub.subscribe(symbols.split(","))
+        try:
+            while not sub.closed:
+                batch = await sub.next_batch(timeout=HEARTBEAT_SECONDS)
+                if batch:
+                    yield f"data: {json.dumps(batch)}\n\n"
+                else:
+                    yield ": heartbeat\n\n"
+        finally:
+            hub.unsubscribe(sub)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
@@ -1,43 +1,39 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from auth import decode_token
-from database import portfolio_collection
+from dependencies import get_portfolio
 from ml.smart_recommender import generate_suggestion_smart
-import numpy as np
+from services.executors import run_inference
+from services.scheduler import scheduler
+from responses import FastJSONResponse
 
 router = APIRouter()
-security = HTTPBearer()
-
-def convert_numpy_types(obj):
-    if isinstance(obj, np.generic):
-        return obj.item()
-    elif isinstance(obj, dict):
-        return {k: convert_numpy_types(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_numpy_types(v) for v in obj]
-    return obj
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    user = decode_token(token)
-    if not user:
-        raise HTTPException(status_code=401, detail="Invalid token")
-    return user
 
 @router.get("/suggestions/smart")
-async def smart_suggestions(user: dict = Depends(get_current_user)):
-    user_id = user.get("user_id")
-    if not user_id:
-        raise HTTPException(status_code=400, detail="User ID not found in token")
-
-    record = portfolio_collection.find_one({"user_id": user_id})
+async def smart_suggestions(record: dict = Depends(get_portfolio)):
     if not record or "stocks" not in record or not record["stocks"]:
         return {"suggestions": []}
 
     try:
-        suggestions = generate_suggestion_smart({"stocks": record["stocks"]})
-        # Convert numpy types to native Python types
-        suggestions = convert_numpy_types(suggestions)
-        return {"suggestions": suggestions}
+        # Serve what the background scheduler already computed
+        symbols = [stock["symbol"] for stock in record["stocks"]]
+        suggestions = [
+            {**precomputed, "symbol": symbol} if precomputed else None
+            for symbol, precomputed in zip(symbols, scheduler.lookup(symbols))
+        ]
+
+        # Symbols added since the last refresh are scored live, off the event loop
+        missing = [stock for stock, s in zip(record["stocks"], suggestions) if s is None]
+        if missing:
+            live = await run_inference(generate_suggestion_smart, {"stocks": missing})
+            by_symbol = {s.get("symbol"): s for s in live}
+            if len(live) != len(missing) or any(stock["symbol"] not in by_symbol for stock in missing):
+                # The models couldn't be loaded: serve the recommender's fallback as-is
+                return FastJSONResponse({"suggestions": live, "as_of": scheduler.as_of})
+            suggestions = [
+                s if s is not None else by_symbol[stock["symbol"]]
+                for stock, s in zip(record["stocks"], suggestions)
+            ]
+
+        # Returned directly: orjson serializes the NumPy scalars as-is
+        return FastJSONResponse({"suggestions": suggestions, "as_of": scheduler.as_of})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating suggestions: {str(e)}")
\ No newline at end of file
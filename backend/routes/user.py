@@ -1,43 +1,72 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException
 from models import User, LoginUser
-from database import users_collection
+from database import async_users_collection
 from auth import create_token
-import bcrypt
-from pydantic import BaseModel
+from services.passwords import hasher, PasswordHasherBusy
+from pymongo.errors import DuplicateKeyError
+import logging
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+def busy():
+    # Shed load fast instead of queueing behind a burst of logins
+    return HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+
+async def upgrade_hash(user_id: str, password: str):
+    """Re-hash a password stored with an outdated bcrypt cost"""
+    try:
+        hashed_pw = await hasher.hash(password)
+    except PasswordHasherBusy:
+        return  # try again on the next login
+    await async_users_collection.update_one({"user_id": user_id}, {"$set": {"password": hashed_pw}})
+    logger.info(f"Upgraded password hash for {user_id} to {hasher.rounds} rounds")
 
 @router.post("/register")
-def register(user: User):
+async def register(user: User):
     # Check if user already exists
-    if users_collection.find_one({"email": user.email}):
+    if await async_users_collection.find_one({"email": user.email}):
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    # Hash password
-    hashed_pw = bcrypt.hashpw(user.password.encode('utf-8'), bcrypt.gensalt())
+    # Hash password (on the bounded bcrypt pool)
+    try:
+        hashed_pw = await hasher.hash(user.password)
+    except PasswordHasherBusy:
+        raise busy()
 
-    # Save to DB
-    users_collection.insert_one({
-        "name": user.name,
-        "email": user.email,
-        "user_id": user.user_id,
-        "age": user.age,
-        "password": hashed_pw,
-    })
+    # Save to DB (unique indexes on email / user_id catch concurrent duplicates)
+    try:
+        await async_users_collection.insert_one({
+            "name": user.name,
+            "email": user.email,
+            "user_id": user.user_id,
+            "age": user.age,
+            "password": hashed_pw,
+        })
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email or user ID already registered")
 
     return {"msg": "User registered successfully"}
 
 @router.post("/login")
-def login(user: LoginUser):
+async def login(user: LoginUser, background_tasks: BackgroundTasks):
     # Find user by user_id
-    record = users_collection.find_one({"user_id": user.user_id})
+    record = await async_users_collection.find_one({"user_id": user.user_id})
     if not record:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    # Verify password using bcrypt
-    if not bcrypt.checkpw(user.password.encode('utf-8'), record["password"]):
+    # Verify password using bcrypt (on the bounded bcrypt pool)
+    try:
+        valid = await hasher.verify(user.password, record["password"])
+    except PasswordHasherBusy:
+        raise busy()
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    # Transparently move old hashes to the current cost, after responding
+    if hasher.needs_rehash(record["password"]):
+        background_tasks.add_task(upgrade_hash, user.user_id, user.password)
+
     # Generate JWT token
     token = create_token({"user_id": user.user_id})
 
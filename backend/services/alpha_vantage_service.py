@@ -2,40 +2,60 @@ import os
 from datetime import datetime, timedelta
 from alpha_vantage.timeseries import TimeSeries
 from alpha_vantage.techindicators import TechIndicators
-import cachetools
-import time
+from services.price_cache import price_cache, quote_ttl
+from services.market_data import fetch_history
+from services.rate_limiter import get_limiter, SingleFlight, INTERACTIVE
+from services.metrics import span
+from ml.indicators import latest_indicators
 import logging
 import pandas as pd
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared by every service instance so concurrent callers coalesce
+_in_flight = SingleFlight()
+
 class AlphaVantageService:
     def __init__(self):
         self.api_key = os.getenv('ALPHA_VANTAGE_KEY', 'demo')
         self.ts = TimeSeries(key=self.api_key, output_format='pandas')
         self.ti = TechIndicators(key=self.api_key, output_format='pandas')
-        self.cache = cachetools.TTLCache(maxsize=1000, ttl=300)  # 5 minute cache
-        self.last_call = 0
-        self.min_interval = 15  # Free tier: 4 calls/minute (60/4=15s)
+        self.cache = price_cache  # shared with the yfinance paths
+        self.indicator_ttl = 300  # 5 minute cache
+        self.cross_check = os.getenv('ALPHA_VANTAGE_CROSS_CHECK', '0') == '1'
+        # Token bucket shared by everything using this API key
+        # (ALPHA_VANTAGE_CALLS_PER_MINUTE / ALPHA_VANTAGE_CALLS_PER_DAY)
+        self.limiter = get_limiter(self.api_key)
+        self.max_wait = 30  # seconds a caller waits for a call slot
         
-    def _throttle(self):
+    def _throttle(self, priority=INTERACTIVE):
         """Enforce rate limiting"""
-        elapsed = time.time() - self.last_call
-        if elapsed < self.min_interval:
-            time.sleep(self.min_interval - elapsed)
-        self.last_call = time.time()
+        with span("alpha_vantage", "rate_limit_wait"):
+            acquired = self.limiter.acquire(priority, timeout=self.max_wait)
+        if not acquired:
+            raise RuntimeError(f"No Alpha Vantage call slot within {self.max_wait}s")
         
-    def get_quote(self, symbol):
+    def get_quote(self, symbol, priority=INTERACTIVE):
         """Get real-time quote with caching and throttling"""
-        cache_key = f"quote_{symbol}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
+        cache_key = f"av_quote_{symbol}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
             
-        self._throttle()
+        # Concurrent requests for the same symbol share one upstream call
+        return _in_flight.do(cache_key, lambda: self._fetch_quote(symbol, cache_key, priority))
         
+    def _fetch_quote(self, symbol, cache_key, priority):
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+            
         try:
-            data, _ = self.ts.get_quote_endpoint(symbol)
+            self._throttle(priority)
+            
+            with span("alpha_vantage", "quote"):
+                data, _ = self.ts.get_quote_endpoint(symbol)
             if data.empty:
                 return None
                 
@@ -48,39 +68,68 @@ class AlphaVantageService:
                 'updated': datetime.now().isoformat()
             }
             
-            self.cache[cache_key] = quote
+            self.cache.set(cache_key, quote, quote_ttl())
             return quote
             
         except Exception as e:
             logger.error(f"Failed to get quote for {symbol}: {str(e)}")
             return None
             
-    def get_technical_indicators(self, symbol):
-        """Get SMA and RSI indicators"""
-        cache_key = f"tech_{symbol}"
-        if cache_key in self.cache:
-            return self.cache[cache_key]
+    def get_technical_indicators(self, symbol, cross_check=None, priority=INTERACTIVE):
+        """Get SMA and RSI indicators, computed locally from stored daily bars.
+
+        The Alpha Vantage indicator endpoints (two throttled calls) are only
+        hit when cross_check is enabled, to compare against the local values.
+        """
+        cross_check = self.cross_check if cross_check is None else cross_check
+        cache_key = f"av_tech_{symbol}_{cross_check}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
             
-        self._throttle()
-        
         try:
+            bars = fetch_history([symbol], period="1y")
+            if bars.empty:
+                return None
+            local = latest_indicators(bars)[symbol]
+            indicators = {
+                'sma_50': local['sma_50'],
+                'rsi_14': local['rsi_14'],
+                'indicators': local,
+                'updated': datetime.now().isoformat()
+            }
+            if cross_check:
+                indicators['remote'] = _in_flight.do(
+                    f"av_remote_tech_{symbol}", lambda: self._get_remote_indicators(symbol, priority)
+                )
+            
+            self.cache.set(cache_key, indicators, self.indicator_ttl)
+            return indicators
+            
+        except Exception as e:
+            logger.error(f"Failed to get technicals for {symbol}: {str(e)}")
+            return None
+
+    def _get_remote_indicators(self, symbol, priority=INTERACTIVE):
+        """SMA-50 / RSI-14 from Alpha Vantage, used as a cross-check only"""
+        try:
+            self._throttle(priority)
+            
             # Get SMA (50-day)
-            sma, _ = self.ti.get_sma(symbol=symbol, interval='daily', time_period=50)
+            with span("alpha_vantage", "sma"):
+                sma, _ = self.ti.get_sma(symbol=symbol, interval='daily', time_period=50)
             
-            self._throttle()
+            self._throttle(priority)
             
             # Get RSI (14-day)
-            rsi, _ = self.ti.get_rsi(symbol=symbol, interval='daily', time_period=14)
+            with span("alpha_vantage", "rsi"):
+                rsi, _ = self.ti.get_rsi(symbol=symbol, interval='daily', time_period=14)
             
-            indicators = {
+            return {
                 'sma_50': sma.iloc[0]['SMA'],
                 'rsi_14': rsi.iloc[0]['RSI'],
-                'updated': datetime.now().isoformat()
             }
             
-            self.cache[cache_key] = indicators
-            return indicators
-            
         except Exception as e:
-            logger.error(f"Failed to get technicals for {symbol}: {str(e)}")
-            return None
\ No newline at end of file
+            logger.error(f"Failed to cross-check technicals for {symbol}: {str(e)}")
+            return None
@@ -0,0 +1,16 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# Dedicated pool for CPU-heavy model work so it never runs on the event loop
+# and doesn't compete with FastAPI's default threadpool for sync handlers.
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+
+
+async def run_inference(func, *args, **kwargs):
+    """Run func(*args, **kwargs) on the inference pool and await the result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor, partial(func, *args, **kwargs))
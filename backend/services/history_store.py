@@ -0,0 +1,250 @@
+import os
+import re
+import json
+import threading
+import logging
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from services.price_cache import (
+    market_now, market_is_open, last_session_close, period_start, INTRADAY_TTL, BAR_FIELDS,
+)
+from models import SYMBOL_PATTERN
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HISTORY_DIR = os.getenv("HISTORY_STORE_PATH", "data/history")
+# How far back a symbol is backfilled the first time it is seen
+BACKFILL_PERIOD = os.getenv("HISTORY_BACKFILL_PERIOD", "1y")
+
+DATE_DTYPE = np.dtype("<i8")   # days since epoch (datetime64[D] as int64)
+VALUE_DTYPE = np.dtype("<f8")
+COLUMN_FILES = ("dates.i8", "ohlcv.f8")
+# Relative difference at which a re-downloaded bar counts as re-adjusted
+ADJUSTMENT_RTOL = float(os.getenv("HISTORY_ADJUSTMENT_RTOL", "1e-6"))
+# Seconds a symbol whose download came back empty is not asked for again
+MISS_TTL = float(os.getenv("HISTORY_MISS_TTL", "300"))
+
+
+class HistoryStore:
+    """Columnar, append-only store of daily OHLCV bars, one directory per symbol.
+
+    Each symbol has two flat binary columns that are memory-mapped for reads:
+    dates.i8 (n,) and ohlcv.f8 (n, 5). After the initial backfill, update()
+    only downloads bars from the last finalized session on, and the trailing
+    provisional bar (today's, while the market is open) is overwritten in
+    place. The last finalized bar is fetched again to detect splits and
+    dividends, which trigger a full rewrite. Files only ever grow or are
+    replaced whole, so readers holding an older mapping stay valid.
+
+    `_lock` guards the in-memory meta and mappings and is only held briefly;
+    downloads run without it and writes take a per-symbol lock.
+    """
+
+    def __init__(self, root=HISTORY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._write_locks = {}
+        self._meta = {}
+        self._maps = {}
+
+    # -- files ---------------------------------------------------------------
+
+    def _dir(self, symbol):
+        # Symbols come from query strings; never let one name a path outside root
+        if not re.fullmatch(SYMBOL_PATTERN, symbol):
+            raise ValueError(f"Invalid symbol: {symbol!r}")
+        return os.path.join(self.root, symbol)
+
+    def _load_meta(self, symbol):
+        if symbol not in self._meta:
+            try:
+                with open(os.path.join(self._dir(symbol), "meta.json")) as f:
+                    self._meta[symbol] = json.load(f)
+            except FileNotFoundError:
+                self._meta[symbol] = None
+        return self._meta[symbol]
+
+    def _symbol_lock(self, symbol):
+        with self._lock:
+            return self._write_locks.setdefault(symbol, threading.Lock())
+
+    def _save_meta(self, symbol, meta, replace_columns=False):
+        directory = self._dir(symbol)
+        path = os.path.join(directory, "meta.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        # Readers must never map new column files with the old row count
+        with self._lock:
+            if replace_columns:
+                for name in COLUMN_FILES:
+                    os.replace(os.path.join(directory, name + ".tmp"), os.path.join(directory, name))
+            os.replace(path + ".tmp", path)
+            self._meta[symbol] = meta
+            self._maps.pop(symbol, None)
+
+    def _write_rows(self, symbol, offset, dates, values, truncate=False):
+        directory = self._dir(symbol)
+        os.makedirs(directory, exist_ok=True)
+        for name, column, dtype in zip(COLUMN_FILES, (dates, values), (DATE_DTYPE, VALUE_DTYPE)):
+            path = os.path.join(directory, name)
+            if truncate:
+                # Full rewrite: new inode, so existing mappings keep the old data.
+                # _save_meta moves the files into place together with the meta.
+                with open(path + ".tmp", "wb") as f:
+                    f.write(np.ascontiguousarray(column, dtype=dtype).tobytes())
+                continue
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                f.seek(offset * dtype.itemsize * (column.shape[1] if column.ndim > 1 else 1))
+                f.write(np.ascontiguousarray(column, dtype=dtype).tobytes())
+
+    def _columns(self, symbol):
+        """Memory-mapped (dates, ohlcv) arrays for symbol, cached until the next write"""
+        meta = self._load_meta(symbol)
+        if not meta or not meta["rows"]:
+            return np.empty(0, DATE_DTYPE), np.empty((0, len(BAR_FIELDS)), VALUE_DTYPE)
+        if symbol not in self._maps:
+            directory = self._dir(symbol)
+            rows = meta["rows"]
+            dates = np.memmap(os.path.join(directory, "dates.i8"), DATE_DTYPE, "r", shape=(rows,))
+            values = np.memmap(os.path.join(directory, "ohlcv.f8"), VALUE_DTYPE, "r", shape=(rows, len(BAR_FIELDS)))
+            self._maps[symbol] = (dates, values)
+        return self._maps[symbol]
+
+    # -- sync ----------------------------------------------------------------
+
+    def _fresh(self, meta, start, now):
+        if meta is None or meta["covered_from"] > start.isoformat():
+            return False
+        if meta.get("missing"):
+            return now.timestamp() - meta["synced_at"] < MISS_TTL
+        synced_at = datetime.fromtimestamp(meta["synced_at"], now.tzinfo)
+        if synced_at < last_session_close(now):
+            return False
+        if market_is_open(now) and (now - synced_at).total_seconds() > INTRADAY_TTL:
+            return False
+        return True
+
+    def update(self, symbols, start, download, now=None):
+        """Bring symbols up to date from start, fetching only what is missing.
+
+        `download(symbols, start)` must return {symbol: OHLCV DataFrame}. All
+        symbols that need a tail are fetched with a single call.
+        """
+        now = now or market_now()
+        with self._lock:
+            backfill, tails, planned = [], {}, {}
+            for symbol in symbols:
+                meta = self._load_meta(symbol)
+                if self._fresh(meta, start, now):
+                    continue
+                planned[symbol] = meta
+                if meta is None or meta["covered_from"] > start.isoformat() or not meta["final_rows"]:
+                    backfill.append(symbol)
+                else:
+                    # Start at the last final bar, which is downloaded again as a check
+                    dates, _ = self._columns(symbol)
+                    tails[symbol] = pd.Timestamp(int(dates[meta["final_rows"] - 1]), unit="D").date()
+
+        def write(symbol, apply):
+            # Skipped if a concurrent update synced the symbol since it was planned
+            with self._symbol_lock(symbol):
+                return self._meta.get(symbol) is not planned[symbol] or apply()
+
+        if backfill:
+            backfill_start = min(start, period_start(BACKFILL_PERIOD, now))
+            downloaded = download(backfill, backfill_start)
+            for symbol in backfill:
+                write(symbol, lambda: self._rewrite(symbol, downloaded.get(symbol), backfill_start, now))
+
+        if tails:
+            downloaded = download(list(tails), min(tails.values()))
+            readjusted = [symbol for symbol, tail_start in tails.items()
+                          if not write(symbol, lambda: self._append(symbol, downloaded.get(symbol), tail_start, now))]
+            if readjusted:
+                # A split or dividend changed the adjusted history: fetch it all again
+                logger.info(f"Adjusted history changed, rewriting: {', '.join(readjusted)}")
+                covered_from = min(datetime.fromisoformat(planned[s]["covered_from"]).date() for s in readjusted)
+                downloaded = download(readjusted, covered_from)
+                for symbol in readjusted:
+                    write(symbol, lambda: self._rewrite(symbol, downloaded.get(symbol), covered_from, now))
+
+    def _to_columns(self, bars):
+        dates = bars.index.values.astype("datetime64[D]").astype(DATE_DTYPE)
+        return dates, bars[BAR_FIELDS].to_numpy(dtype=VALUE_DTYPE)
+
+    def _final_count(self, dates, now):
+        # A bar is final once its session has closed
+        last_closed = np.datetime64(last_session_close(now).date(), "D").astype(DATE_DTYPE)
+        return int(np.searchsorted(dates, last_closed, side="right"))
+
+    def _rewrite(self, symbol, bars, covered_from, now):
+        meta = {"covered_from": covered_from.isoformat(), "synced_at": now.timestamp()}
+        if bars is None or bars.empty:
+            # Unknown ticker or a failed download. Stored bars are never replaced
+            # by nothing; a symbol without any is remembered in memory for
+            # MISS_TTL only, so a transient failure doesn't hide it for a session
+            stored = self._load_meta(symbol)
+            if stored is None or stored.get("missing"):
+                self._meta[symbol] = {"rows": 0, "final_rows": 0, "missing": True, **meta}
+            return
+        dates, values = self._to_columns(bars)
+        self._write_rows(symbol, 0, dates, values, truncate=True)
+        self._save_meta(symbol, {"rows": len(dates), "final_rows": self._final_count(dates, now), **meta},
+                        replace_columns=True)
+
+    def _append(self, symbol, bars, tail_start, now):
+        """Append bars after the last final one, which `bars` must repeat unchanged.
+
+        Bars are split- and dividend-adjusted, so a corporate action rescales
+        the whole history. If the repeated bar no longer matches what is
+        stored, nothing is written and False is returned so the caller can
+        rewrite the symbol from scratch.
+        """
+        if bars is None or bars.empty:
+            # Failed download (a good one repeats the last final bar): keep the
+            # symbol due so the next update retries
+            return True
+        meta = dict(self._meta[symbol])
+        dates, values = self._to_columns(bars)
+        keep = dates >= np.datetime64(tail_start, "D").astype(DATE_DTYPE)
+        dates, values = dates[keep], values[keep]
+        with self._lock:
+            stored_dates, stored_values = self._columns(symbol)
+        last = meta["final_rows"] - 1
+        if not len(dates) or dates[0] != stored_dates[last] or not np.allclose(
+                values[0], stored_values[last], rtol=ADJUSTMENT_RTOL, equal_nan=True):
+            return False
+        # Overwrite the provisional rows after the last final bar
+        dates, values = dates[1:], values[1:]
+        self._write_rows(symbol, meta["final_rows"], dates, values)
+        meta["rows"] = meta["final_rows"] + len(dates)
+        meta["final_rows"] += self._final_count(dates, now)
+        meta["synced_at"] = now.timestamp()
+        self._save_meta(symbol, meta)
+        return True
+
+    # -- reads ---------------------------------------------------------------
+
+    def window(self, symbol, start=None, end=None):
+        """Zero-copy (dates, ohlcv) views of the stored bars in [start, end]"""
+        with self._lock:
+            dates, values = self._columns(symbol)
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(start, "D").astype(DATE_DTYPE))
+        hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, "D").astype(DATE_DTYPE), side="right")
+        return dates[lo:hi], values[lo:hi]
+
+    def frame(self, symbol, start=None, end=None):
+        """Stored bars in [start, end] as an OHLCV DataFrame indexed by date"""
+        dates, values = self.window(symbol, start, end)
+        index = pd.DatetimeIndex(np.asarray(dates).astype("datetime64[D]"), name="Date")
+        return pd.DataFrame(values, index=index, columns=BAR_FIELDS)
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(os.listdir(self.root))
+
+
+history_store = HistoryStore()
@@ -0,0 +1,158 @@
+import os
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from services.price_cache import price_cache, period_start, quote_ttl, BAR_FIELDS, INTRADAY_TTL
+from services.history_store import history_store
+from models import SYMBOL_PATTERN
+from services.metrics import span
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Upper bound on concurrent upstream calls that yfinance can't batch (e.g. .info)
+MAX_FETCH_WORKERS = int(os.getenv("MARKET_DATA_WORKERS", "8"))
+
+_pool = ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS, thread_name_prefix="market-data")
+
+
+class MarketDataUnavailable(Exception):
+    """The market data provider returned no usable prices for a request"""
+
+
+def is_valid_symbol(symbol):
+    return re.fullmatch(SYMBOL_PATTERN, symbol) is not None
+
+
+def unique_symbols(symbols):
+    """Drop blanks, invalid tickers and duplicates while keeping the caller's order"""
+    seen = []
+    for symbol in symbols:
+        symbol = symbol.strip()
+        if is_valid_symbol(symbol) and symbol not in seen:
+            seen.append(symbol)
+    return seen
+
+
+def _download(symbols, period=None, interval="1d", start=None):
+    """One yf.download for all symbols -> {symbol: OHLCV DataFrame}"""
+    import yfinance as yf  # deferred: slow to import and only needed on a cache miss
+    with span("yfinance", "download"):
+        df = yf.download(
+            symbols,
+            period=period,
+            start=start,
+            interval=interval,
+            group_by="column",
+            auto_adjust=True,
+            threads=min(len(symbols), MAX_FETCH_WORKERS),
+            progress=False,
+        )
+    if df.empty:
+        return {}
+    if not isinstance(df.columns, pd.MultiIndex):
+        # Older yfinance returns flat columns for a single ticker
+        df.columns = pd.MultiIndex.from_product([df.columns, symbols])
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+
+    frames = {}
+    for symbol in symbols:
+        if symbol in df["Close"]:
+            bars = df.xs(symbol, axis=1, level=1)[BAR_FIELDS].dropna(subset=["Close"])
+            if not bars.empty:
+                frames[symbol] = bars
+    return frames
+
+
+def fetch_history(symbols, period="1mo", interval="1d", max_age=INTRADAY_TTL):
+    """OHLCV bars for all symbols, served from local storage where fresh.
+
+    Daily bars come from history_store, other intervals from the price
+    cache; whatever is stale or missing is fetched together in one request.
+    Returns a DataFrame with (field, symbol) MultiIndex columns, e.g.
+    df["Close"]["AAPL"], indexed by the union of all symbols' bar dates.
+    While the market is open, intraday bars older than max_age seconds are
+    refreshed.
+    """
+    symbols = unique_symbols(symbols)
+    if not symbols:
+        return pd.DataFrame()
+
+    start = period_start(period)
+
+    if interval == "1d":
+        # Daily bars come from the columnar store, which only fetches missing tails
+        history_store.update(symbols, start, lambda syms, since: _download(syms, start=since))
+        frames = {symbol: history_store.frame(symbol, start) for symbol in symbols}
+        return _combine(symbols, frames)
+
+    frames = {}
+    stale = []
+    for symbol in symbols:
+        bars = price_cache.get_bars(symbol, interval, start, max_age=max_age)
+        if bars is None:
+            stale.append(symbol)
+        else:
+            frames[symbol] = bars
+
+    if stale:
+        downloaded = _download(stale, period, interval)
+        for symbol, bars in downloaded.items():
+            price_cache.put_bars(symbol, interval, bars, covered_from=start)
+        frames.update(downloaded)
+
+    return _combine(symbols, frames)
+
+
+def _combine(symbols, frames):
+    frames = {s: frames[s] for s in symbols if s in frames and not frames[s].empty}
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index()
+
+
+def fetch_close_matrix(symbols, period="1mo", interval="1d", max_age=INTRADAY_TTL):
+    """Aligned close-price matrix: one row per date, one column per symbol.
+
+    Symbols with no data come back as all-NaN columns so callers can index
+    every requested symbol without a KeyError.
+    """
+    symbols = unique_symbols(symbols)
+    df = fetch_history(symbols, period=period, interval=interval, max_age=max_age)
+    if df.empty:
+        return pd.DataFrame(columns=symbols, dtype=float)
+    return df["Close"].reindex(columns=symbols)
+
+
+def _fetch_info(symbol):
+    cache_key = f"info_{symbol}"
+    info = price_cache.get(cache_key)
+    if info is not None:
+        return info
+    try:
+        import yfinance as yf
+        with span("yfinance", "info"):
+            info = yf.Ticker(symbol).info
+        price_cache.set(cache_key, info, quote_ttl())
+        return info
+    except Exception as e:
+        logger.error(f"Failed to get info for {symbol}: {str(e)}")
+        return e
+
+
+def fetch_info(symbols):
+    """Ticker metadata for each symbol, fetched concurrently on a bounded pool.
+
+    Returns {symbol: info_dict}; a failed lookup maps to the raised exception.
+    """
+    symbols = unique_symbols(symbols)
+    return dict(zip(symbols, _pool.map(_fetch_info, symbols)))
+
+
+def fetch_info_and_closes(symbols, period="1mo", interval="1d"):
+    """Run the bulk history download and the per-symbol info lookups in parallel"""
+    closes = _pool.submit(fetch_close_matrix, symbols, period, interval)
+    info = fetch_info(symbols)
+    return info, closes.result()
@@ -0,0 +1,290 @@
+import os
+import asyncio
+import bisect
+import collections
+import functools
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pymongo import monitoring
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds; covers cache hits (~ms) up to throttled upstream calls (~30s)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Opt-in sampling profiler: requests slower than this (ms) get their stack
+# samples dumped as folded stacks (flamegraph.pl / speedscope input)
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_REQUEST_MS", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                     for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram per label set (one lock, O(log buckets) observe)"""
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: (list(v[0]), v[1], v[2]) for k, v in self._series.items()}
+        for labelvalues, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                cumulative += n
+                names = self.labelnames + ("le",)
+                lines.append(f"{self.name}_bucket{_labels(names, labelvalues + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labelvalues)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = collections.Counter()
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labelvalues, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics rendered in the Prometheus text format.
+
+    Histograms/counters are updated inline; gauges are read at scrape time
+    from callbacks that modules register for their own stats (cache hit
+    ratios, queue depths), so nothing is computed between scrapes.
+    """
+
+    def __init__(self):
+        self.request_seconds = Histogram(
+            "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+        # Spans: upstream APIs, Mongo commands and model inference
+        self.span_seconds = Histogram(
+            "span_duration_seconds", "Latency of upstream calls and model inference", ("service", "operation"))
+        self.span_errors = Counter(
+            "span_errors_total", "Spans that raised", ("service", "operation"))
+        self._gauges = collections.defaultdict(list)
+        self._gauge_meta = {}
+
+    def register_gauges(self, name, help, labelnames, collect):
+        """collect() -> {labelvalues tuple: number}; None values are skipped"""
+        self._gauge_meta[name] = (help, tuple(labelnames))
+        self._gauges[name].append(collect)
+
+    def render(self):
+        lines = []
+        for metric in (self.request_seconds, self.span_seconds, self.span_errors):
+            lines += metric.render()
+        for name, collectors in self._gauges.items():
+            help, labelnames = self._gauge_meta[name]
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+            for collect in collectors:
+                try:
+                    values = collect()
+                except Exception as e:
+                    logger.error(f"Metrics collector for {name} failed: {str(e)}")
+                    continue
+                for labelvalues, value in values.items():
+                    if value is not None:
+                        lines.append(f"{name}{_labels(labelnames, labelvalues)} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+@contextmanager
+def span(service, operation):
+    """Time a block as one upstream call or model step, e.g. with span("yfinance", "download")"""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        metrics.span_errors.inc(service, operation)
+        raise
+    finally:
+        metrics.span_seconds.observe(time.perf_counter() - started, service, operation)
+
+
+def traced(service, operation=None):
+    """Decorator form of span(); operation defaults to the function name"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(service, operation or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener: times every Mongo command (sync and Motor).
+
+    Passed as event_listeners to the clients created in database.py.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        metrics.span_seconds.observe(event.duration_micros / 1e6, "mongo", event.command_name)
+
+    def failed(self, event):
+        metrics.span_seconds.observe(event.duration_micros / 1e6, "mongo", event.command_name)
+        metrics.span_errors.inc("mongo", event.command_name)
+
+
+class SamplingProfiler:
+    """Samples every thread's stack while profiled requests are in flight.
+
+    One daemon thread takes a snapshot of sys._current_frames() every
+    PROFILE_INTERVAL and adds the folded stack to each active request's
+    collector. It only runs while at least one request is being profiled.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self._active = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                collectors = list(self._active)
+            frames = sys._current_frames()
+            stacks = []
+            for ident, frame in frames.items():
+                if ident == me:
+                    continue
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stacks.append(";".join(reversed(parts)))
+            for collector in collectors:
+                collector.update(stacks)
+            time.sleep(self.interval)
+
+    def start(self):
+        """Begin collecting samples; returns the handle for stop()"""
+        samples = _Samples()
+        with self._lock:
+            self._active.add(samples)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+        return samples
+
+    def stop(self, samples):
+        with self._lock:
+            self._active.discard(samples)
+
+
+class _Samples(collections.Counter):
+    """Folded stack -> sample count; hashed by identity so it can sit in a set"""
+
+    __hash__ = object.__hash__
+
+    def __eq__(self, other):
+        return self is other
+
+
+profiler = SamplingProfiler()
+
+
+def dump_profile(samples, method, route, seconds):
+    """Write folded stacks ("frame;frame;frame count" per line)"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = route.strip("/").replace("/", "_").replace("{", "").replace("}", "") or "root"
+    path = os.path.join(PROFILE_DIR, f"{datetime.now():%Y%m%d-%H%M%S-%f}_{method}_{slug}.folded")
+    with open(path, "w") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+    logger.info(f"Slow request {method} {route} took {seconds * 1000:.0f}ms; profile written to {path}")
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by route template.
+
+    With PROFILE_SLOW_REQUEST_MS set, each request is also sampled and the
+    stacks of those slower than the threshold are written to PROFILE_DIR.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        samples = profiler.start() if PROFILE_SLOW_MS > 0 else None
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            # The router stores the matched route in the scope; unmatched
+            # paths share one label so raw URLs can't blow up cardinality
+            route = getattr(scope.get("route"), "path", "unmatched")
+            metrics.request_seconds.observe(elapsed, scope["method"], route, status["code"])
+            if samples is not None:
+                profiler.stop(samples)
+                if elapsed * 1000 >= PROFILE_SLOW_MS and samples:
+                    # File I/O: keep it off the event loop
+                    await asyncio.to_thread(dump_profile, samples, scope["method"], route, elapsed)
@@ -0,0 +1,261 @@
+import os
+import asyncio
+import logging
+import threading
+import time
+import httpx
+from services.rate_limiter import SingleFlight
+from services.metrics import metrics, span
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NEWS_API_KEY = os.getenv("NEWS_API_KEY", "ea93d86409174f98b7aeb1b99c2efafc")
+NEWS_API_URL = "https://newsapi.org/v2"
+
+HEADLINES = "headlines"
+# A feed younger than this is served as-is
+NEWS_TTL = float(os.getenv("NEWS_TTL", "300"))
+# A stale feed is still served (while it refreshes in the background) up to this age
+NEWS_MAX_STALE = float(os.getenv("NEWS_MAX_STALE", "3600"))
+# Feeds nobody asked for in this long stop being refreshed and are dropped
+NEWS_WATCH_WINDOW = float(os.getenv("NEWS_WATCH_WINDOW", "3600"))
+MAX_ARTICLES_PER_FEED = 50
+
+# Shared async client so NewsAPI connections are pooled across requests
+http_client = httpx.AsyncClient(
+    timeout=10,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+)
+
+
+async def fetch_newsapi(feed):
+    """Raw NewsAPI articles for a feed: business headlines or one symbol"""
+    if feed == HEADLINES:
+        url = f"{NEWS_API_URL}/top-headlines"
+        params = {"category": "business", "language": "en", "pageSize": MAX_ARTICLES_PER_FEED}
+    else:
+        url = f"{NEWS_API_URL}/everything"
+        params = {"q": feed, "language": "en", "sortBy": "publishedAt", "pageSize": 20}
+    with span("newsapi", "articles"):
+        response = await http_client.get(url, params={**params, "apiKey": NEWS_API_KEY})
+        response.raise_for_status()
+    return response.json().get("articles", [])
+
+
+class NewsStore:
+    """In-memory article store with stale-while-revalidate feeds.
+
+    Articles are deduplicated by URL; each feed (business headlines or one
+    symbol) is a list of URLs, newest first. Fresh feeds are served from
+    memory, stale ones are served while a single background refresh runs,
+    and concurrent cold misses share one upstream call. Upstream traffic
+    therefore depends on the number of watched feeds and NEWS_TTL, not on
+    the number of users.
+
+    Fetches run on the event loop the store was started on. The data is
+    guarded by a thread lock, so worker threads can read it too, and get()
+    hands their misses over to that loop.
+    """
+
+    def __init__(self, fetch=fetch_newsapi, ttl=NEWS_TTL, max_stale=NEWS_MAX_STALE,
+                 watch_window=NEWS_WATCH_WINDOW, clock=time.monotonic):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.watch_window = watch_window
+        self.clock = clock
+        self.articles = {}  # url -> article
+        self.feeds = {}     # feed -> {"urls": [...], "fetched_at": t}
+        self.watched = {}   # feed -> last time it was requested
+        self.counts = {"hits": 0, "stale_hits": 0, "misses": 0, "upstream_calls": 0, "upstream_errors": 0}
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._in_flight = SingleFlight()
+        self._background = set()  # revalidation tasks, referenced until done
+        self._event_loop = None
+        self._task = None
+
+    @staticmethod
+    def feed_key(symbol):
+        return symbol.strip().upper()
+
+    async def _refresh(self, feed):
+        """Fetch one feed and merge its articles into the store"""
+        with self._lock:
+            self.counts["upstream_calls"] += 1
+        try:
+            raw = await self.fetch(feed)
+        except Exception:
+            with self._lock:
+                self.counts["upstream_errors"] += 1
+            raise
+
+        with self._lock:
+            urls = [] if feed not in self.feeds else list(self.feeds[feed]["urls"])
+            for article in raw:
+                url = article.get("url")
+                if not url or article.get("title") == "[Removed]":
+                    continue
+                stored = self.articles.setdefault(url, {**article, "feeds": set()})
+                stored["feeds"].add(feed)
+                if url not in urls:
+                    urls.append(url)
+            # ISO-8601 UTC timestamps sort chronologically as strings
+            urls.sort(key=lambda u: self.articles[u].get("publishedAt") or "", reverse=True)
+            self.feeds[feed] = {"urls": urls[:MAX_ARTICLES_PER_FEED], "fetched_at": self.clock()}
+            self._prune()
+
+    def _prune(self):
+        """Drop articles no feed points at any more. Caller holds _lock."""
+        live = {url for f in self.feeds.values() for url in f["urls"]}
+        for url in [u for u in self.articles if u not in live]:
+            del self.articles[url]
+
+    def _revalidate(self, feed):
+        """Refresh a stale feed in the background, at most once at a time.
+        Caller holds _lock; may be called from any thread."""
+        if feed in self._refreshing or self._event_loop is None:
+            return
+        self._refreshing.add(feed)
+        self._event_loop.call_soon_threadsafe(self._start_revalidation, feed)
+
+    def _start_revalidation(self, feed):
+        task = asyncio.create_task(self._run_revalidation(feed))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _run_revalidation(self, feed):
+        try:
+            await self._in_flight.do_async(feed, lambda: self._refresh(feed))
+        except Exception as e:
+            logger.error(f"News refresh for {feed} failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(feed)
+
+    def _cached(self, feed, limit):
+        with self._lock:
+            return [self.articles[u] for u in self.feeds[feed]["urls"][:limit]]
+
+    def peek(self, feed, limit=MAX_ARTICLES_PER_FEED):
+        """Articles without ever blocking: None on a cold miss, stale data
+        (with a background refresh started) when past the TTL"""
+        now = self.clock()
+        with self._lock:
+            self.watched[feed] = now
+            entry = self.feeds.get(feed)
+            if entry is None or now - entry["fetched_at"] >= self.max_stale:
+                return None
+            if now - entry["fetched_at"] < self.ttl:
+                self.counts["hits"] += 1
+            else:
+                self.counts["stale_hits"] += 1
+                self._revalidate(feed)
+            return [self.articles[u] for u in entry["urls"][:limit]]
+
+    async def aget(self, feed, limit=MAX_ARTICLES_PER_FEED):
+        """Articles for a feed, fetching only on a cold (or expired) miss"""
+        articles = self.peek(feed, limit)
+        if articles is not None:
+            return articles
+        with self._lock:
+            self.counts["misses"] += 1
+        try:
+            await self._in_flight.do_async(feed, lambda: self._refresh(feed))
+        except Exception:
+            # Anything we still have beats an error
+            if feed in self.feeds:
+                return self._cached(feed, limit)
+            raise
+        return self._cached(feed, limit)
+
+    def get(self, feed, limit=MAX_ARTICLES_PER_FEED, timeout=30):
+        """Blocking aget() for worker threads; the fetch runs on the store's loop"""
+        articles = self.peek(feed, limit)
+        if articles is not None:
+            return articles
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError("NewsStore.get() would block the event loop; await aget() instead")
+        if self._event_loop is None:
+            raise RuntimeError("News store is not running")
+        return asyncio.run_coroutine_threadsafe(self.aget(feed, limit), self._event_loop).result(timeout)
+
+    async def headlines(self, limit=MAX_ARTICLES_PER_FEED):
+        return await self.aget(HEADLINES, limit)
+
+    def symbol_articles(self, symbol, limit=MAX_ARTICLES_PER_FEED):
+        return self.get(self.feed_key(symbol), limit)
+
+    async def refresh_due(self):
+        """Scheduled pass: refresh watched feeds past their TTL, forget unwatched ones"""
+        now = self.clock()
+        due, dropped = [], False
+        with self._lock:
+            for feed, last_seen in list(self.watched.items()):
+                if now - last_seen > self.watch_window:
+                    del self.watched[feed]
+                    dropped = self.feeds.pop(feed, None) is not None or dropped
+                    continue
+                entry = self.feeds.get(feed)
+                if entry is None or now - entry["fetched_at"] >= self.ttl:
+                    due.append(feed)
+            if dropped:
+                self._prune()
+
+        results = await asyncio.gather(
+            *(self._in_flight.do_async(feed, lambda feed=feed: self._refresh(feed)) for feed in due),
+            return_exceptions=True,
+        )
+        for feed, result in zip(due, results):
+            if isinstance(result, Exception):
+                logger.error(f"News refresh for {feed} failed: {str(result)}")
+
+    async def _loop(self):
+        while True:
+            await self.refresh_due()
+            await asyncio.sleep(self.ttl)
+
+    def start(self):
+        # Headlines are wanted by every dashboard, so keep them warm from the start
+        with self._lock:
+            self.watched.setdefault(HEADLINES, self.clock())
+        self._event_loop = asyncio.get_running_loop()
+        if self._task is None:
+            self._task = self._event_loop.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._background):
+            task.cancel()
+
+    def stats(self):
+        return {
+            "articles": len(self.articles),
+            "feeds": len(self.feeds),
+            "watched_feeds": len(self.watched),
+            **self.counts,
+        }
+
+
+news_store = NewsStore()
+
+
+def _news_hit_ratio():
+    counts = news_store.counts
+    served = counts["hits"] + counts["stale_hits"]
+    lookups = served + counts["misses"]
+    return {("news",): served / lookups if lookups else None}
+
+
+metrics.register_gauges("cache_hit_ratio", "Hit ratio of in-process caches", ("cache",), _news_hit_ratio)
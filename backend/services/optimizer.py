@@ -0,0 +1,261 @@
+import os
+import threading
+from datetime import datetime
+from statistics import NormalDist
+import cachetools
+import numpy as np
+from services.market_data import fetch_close_matrix, unique_symbols, MarketDataUnavailable
+
+TRADING_DAYS = 252
+# Incrementally updated moments are recomputed from scratch after this many
+# updates, bounding float drift and picking up any revised historical bars
+COVARIANCE_REFRESH_EVERY = int(os.getenv("COVARIANCE_REFRESH_EVERY", "63"))
+MIN_HISTORY = 20
+
+
+class CovarianceCache:
+    """Rolling-window return moments (n, sum, sum of outer products) per
+    symbol universe and lookback.
+
+    When new daily bars arrive, the moments are moved forward by adding the
+    new rows' outer products and subtracting those of the rows that left
+    the window. A repeat request costs O(new rows x N^2) instead of
+    O(lookback x N^2).
+    """
+
+    def __init__(self, maxsize=256, refresh_every=COVARIANCE_REFRESH_EVERY):
+        self.refresh_every = refresh_every
+        self._entries = cachetools.LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "incremental": 0, "full": 0}
+
+    def moments(self, symbols, dates, returns, lookback):
+        """(n, sum, cross) over the last `lookback` rows of a (dates, symbols)
+        matrix of finalized daily returns"""
+        key = (tuple(symbols), lookback)
+        start = max(len(dates) - lookback, 0)
+        first, last = dates[start], dates[-1]
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry and entry["first"] == first and entry["last"] == last:
+            self.counts["hits"] += 1
+            return entry["n"], entry["sum"], entry["cross"]
+
+        old_first, old_last = np.searchsorted(dates, [entry["first"], entry["last"]]) if entry else (0, -1)
+        contiguous = (
+            entry is not None
+            and entry["updates"] < self.refresh_every
+            and old_last < len(dates) and dates[old_last] == entry["last"]
+            and old_first < len(dates) and dates[old_first] == entry["first"]
+            and old_last - old_first + 1 == entry["n"]
+            and old_first <= start <= old_last + 1
+        )
+        if contiguous:
+            added, dropped = returns[old_last + 1:], returns[old_first:start]
+            n = entry["n"] + len(added) - len(dropped)
+            total = entry["sum"] + added.sum(axis=0) - dropped.sum(axis=0)
+            cross = entry["cross"] + added.T @ added - dropped.T @ dropped
+            updates = entry["updates"] + 1
+            self.counts["incremental"] += 1
+        else:
+            window = returns[start:]
+            n, total, cross = len(window), window.sum(axis=0), window.T @ window
+            updates = 0
+            self.counts["full"] += 1
+
+        with self._lock:
+            self._entries[key] = {"first": first, "last": last, "n": n, "sum": total,
+                                  "cross": cross, "updates": updates}
+        return n, total, cross
+
+    def stats(self):
+        return {"entries": len(self._entries), **self.counts}
+
+
+covariance_cache = CovarianceCache()
+
+
+def shrink_covariance(cov, window):
+    """Ledoit-Wolf shrinkage of the sample covariance towards its diagonal.
+
+    With more symbols than days the sample covariance is singular, so some
+    portfolios would look riskless. The shrinkage intensity is estimated
+    from the same window of (days, symbols) returns; only its O(days x
+    symbols) terms are recomputed, the covariance itself comes from the cache.
+    """
+    x = window - window.mean(axis=0)
+    t = len(x)
+    sample = cov * (t - 1) / t
+    off_diagonal = sample - np.diag(np.diag(sample))
+    distance = (off_diagonal ** 2).sum()
+    if distance <= 0:
+        return cov
+    # Variance of the off-diagonal sample entries: sum_t ||x_t x_t'||^2 - t ||S||^2, diagonal left out
+    squared = (x ** 2).sum(axis=1)
+    spread = ((squared ** 2 - (x ** 4).sum(axis=1)).sum() / t - distance) / t
+    intensity = min(max(spread / distance, 0.0), 1.0)
+    return (1 - intensity) * cov + intensity * np.diag(np.diag(cov))
+
+
+def _project_capped_simplex(v, cap):
+    """Euclidean projection onto {w : sum(w) = 1, 0 <= w <= cap}"""
+    lo, hi = v.min() - cap, v.max()
+    for _ in range(60):
+        tau = (lo + hi) / 2
+        if np.clip(v - tau, 0, cap).sum() > 1:
+            lo = tau
+        else:
+            hi = tau
+    return np.clip(v - (lo + hi) / 2, 0, cap)
+
+
+def mean_variance_weights(mu, cov, risk_aversion=5.0, max_weight=1.0, iterations=2000, tol=1e-10):
+    """Long-only weights maximizing mu.w - risk_aversion/2 * w'Cw with
+    sum(w) = 1 and w <= max_weight (accelerated projected gradient)"""
+    n = len(mu)
+    cap = max(max_weight, 1 / n)
+    # Step size from the largest eigenvalue (power iteration)
+    v = np.ones(n) / np.sqrt(n)
+    for _ in range(50):
+        v = cov @ v
+        v /= np.linalg.norm(v) or 1
+    lipschitz = risk_aversion * float(v @ cov @ v) or 1.0
+
+    w = _project_capped_simplex(np.full(n, 1 / n), cap)
+    y, t = w, 1.0
+    for _ in range(iterations):
+        grad = risk_aversion * (cov @ y) - mu
+        w_next = _project_capped_simplex(y - grad / lipschitz, cap)
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        y = w_next + (t - 1) / t_next * (w_next - w)
+        if np.linalg.norm(w_next - w) < tol:
+            w = w_next
+            break
+        w, t = w_next, t_next
+    return w
+
+
+def risk_parity_weights(cov, iterations=50, tol=1e-10):
+    """Long-only weights with equal risk contributions, via Newton's method on
+    the convex form min 1/2 y'Cy - sum(log y) / n, w = y / sum(y)"""
+    n = len(cov)
+    b = np.full(n, 1 / n)
+    y = 1 / np.sqrt(np.diag(cov))
+    y /= y.sum()
+    for _ in range(iterations):
+        grad = cov @ y - b / y
+        if np.linalg.norm(grad) < tol:
+            break
+        step = np.linalg.solve(cov + np.diag(b / y ** 2), grad)
+        t = 1.0
+        # Damped so y stays strictly positive
+        while np.any(y - t * step <= 0):
+            t /= 2
+        y = y - t * step
+    return y / y.sum()
+
+
+def _risk(weights, mu, cov, window, value, confidence):
+    """Annualized return/volatility and 1-day VaR for each row of a weights
+    matrix, evaluated together"""
+    z = NormalDist().inv_cdf(confidence)
+    daily_mu, daily_var = weights @ mu, np.einsum("ij,jk,ik->i", weights, cov, weights)
+    daily_sigma = np.sqrt(np.maximum(daily_var, 0))
+    history = window @ weights.T  # (days, portfolios)
+    historical = -np.quantile(history, 1 - confidence, axis=0)
+    parametric = z * daily_sigma - daily_mu
+    with np.errstate(divide="ignore", invalid="ignore"):
+        contributions = np.where(daily_var[:, None] > 0, weights * (weights @ cov) / daily_var[:, None], 0.0)
+    return [{
+        "expected_return_pct": round(float(daily_mu[i] * TRADING_DAYS * 100), 2),
+        "volatility_pct": round(float(daily_sigma[i] * np.sqrt(TRADING_DAYS) * 100), 2),
+        "var_historical": round(float(historical[i] * value), 2),
+        "var_parametric": round(float(parametric[i] * value), 2),
+    } for i in range(len(weights))], contributions
+
+
+def optimize_portfolio(stocks, method="mean_variance", candidates=(), risk_aversion=5.0, max_weight=0.25,
+                       confidence=0.95, lookback=TRADING_DAYS, min_trade_pct=0.5):
+    """Target weights, risk before/after and the trades to get there.
+
+    The universe is the held symbols plus any candidates. Symbols without
+    `lookback` days of history are left as they are and reported under
+    "excluded". VaR is one-day, in currency, at `confidence`.
+    """
+    held = {}
+    for stock in stocks:
+        symbol = stock.get("symbol", "").strip().upper()
+        if symbol:
+            held[symbol] = held.get(symbol, 0.0) + float(stock["quantity"])
+    if not held:
+        raise ValueError("No holdings to optimize")
+    symbols = unique_symbols(list(held) + [c.strip().upper() for c in candidates])
+
+    # ~1.45 calendar days per trading day, plus a margin for holidays
+    closes = fetch_close_matrix(symbols, period=f"{int(lookback * 1.45) + 15}d").ffill()
+    if closes.empty:
+        raise MarketDataUnavailable("No price data for portfolio holdings")
+    returns = closes.pct_change(fill_method=None).iloc[1:]
+    finalized = returns.iloc[:-1].iloc[-lookback:]
+    complete = finalized.notna().all() & returns.iloc[-1].notna()
+    eligible = [s for s in symbols if len(finalized) >= MIN_HISTORY and complete[s]]
+    excluded = [s for s in symbols if s not in eligible]
+    if len(eligible) < 2:
+        raise ValueError("Need at least two symbols with enough price history")
+
+    matrix = returns[eligible].to_numpy()
+    dates = returns.index.values.astype("datetime64[D]")
+    # Finalized rows go through the cache; the latest (possibly provisional)
+    # row is added on top every time
+    n, total, cross = covariance_cache.moments(eligible, dates[:-1], matrix[:-1], lookback)
+    latest = matrix[-1]
+    n, total, cross = n + 1, total + latest, cross + np.outer(latest, latest)
+    mu = total / n
+    window = matrix[-n:]
+    cov = shrink_covariance((cross - n * np.outer(mu, mu)) / (n - 1), window)
+
+    quantity = np.array([held.get(s, 0.0) for s in eligible])
+    price = closes[eligible].iloc[-1].to_numpy()
+    value = quantity * price
+    portfolio_value = value.sum()
+    if portfolio_value <= 0:
+        raise ValueError("No priced holdings to optimize")
+    current = value / portfolio_value
+
+    if method == "risk_parity":
+        target = risk_parity_weights(cov)
+    else:
+        # The solver works in annual units so risk_aversion has its usual scale
+        target = mean_variance_weights(mu * TRADING_DAYS, cov * TRADING_DAYS, risk_aversion, max_weight)
+
+    risk, contributions = _risk(np.vstack([current, target]), mu, cov, window, portfolio_value, confidence)
+
+    shares = np.rint(target * portfolio_value / price - quantity)
+    trade_value = shares * price
+    min_trade = portfolio_value * min_trade_pct / 100
+    trades = [{
+        "symbol": symbol,
+        "action": "BUY" if shares[i] > 0 else "SELL",
+        "shares": int(abs(shares[i])),
+        "price": round(float(price[i]), 2),
+        "value": round(float(abs(trade_value[i])), 2),
+    } for i, symbol in enumerate(eligible) if shares[i] and abs(trade_value[i]) >= min_trade]
+    trades.sort(key=lambda t: -t["value"])
+
+    return {
+        "as_of": datetime.now().isoformat(),
+        "method": method,
+        "history_days": int(n),
+        "portfolio_value": round(float(portfolio_value), 2),
+        "risk": {"confidence": confidence, "current": risk[0], "target": risk[1]},
+        "weights": [{
+            "symbol": symbol,
+            "current_weight": round(float(current[i]), 4),
+            "target_weight": round(float(target[i]), 4),
+            "current_risk_contribution": round(float(contributions[0, i]), 4),
+            "target_risk_contribution": round(float(contributions[1, i]), 4),
+        } for i, symbol in enumerate(eligible)],
+        "trades": trades,
+        "excluded": excluded,
+    }
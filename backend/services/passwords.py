@@ -0,0 +1,84 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from services.metrics import metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# bcrypt cost factor for new hashes; stored hashes with a lower cost are
+# upgraded on the user's next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt releases the GIL, so a small thread pool hashes in parallel without
+# touching FastAPI's shared threadpool
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Hashes allowed to wait for a worker before new ones are rejected
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "8"))
+
+
+class PasswordHasherBusy(Exception):
+    """Raised instead of queueing when the hashing pool is saturated"""
+
+
+def hash_rounds(hashed):
+    """Cost factor of a stored hash, e.g. 12 for b"$2b$12$..." """
+    try:
+        return int(hashed.split(b"$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated bounded pool with load shedding.
+
+    At most workers + max_queue hashes are in flight; beyond that callers
+    get PasswordHasherBusy right away (the API answers 503) rather than
+    piling up behind a login storm.
+    """
+
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, max_queue=PASSWORD_HASH_QUEUE, rounds=BCRYPT_ROUNDS):
+        self.rounds = rounds
+        self.max_in_flight = workers + max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def _run(self, func, *args):
+        # Only touched from the event loop, so a plain counter is enough
+        if self.in_flight >= self.max_in_flight:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def hash(self, password):
+        return await self._run(bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt(self.rounds))
+
+    async def verify(self, password, hashed):
+        return await self._run(bcrypt.checkpw, password.encode("utf-8"), hashed)
+
+    def needs_rehash(self, hashed):
+        rounds = hash_rounds(hashed)
+        return rounds is not None and rounds < self.rounds
+
+    def stats(self):
+        return {
+            "rounds": self.rounds,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+hasher = PasswordHasher()
+
+metrics.register_gauges("password_hash_in_flight", "bcrypt jobs running or queued", (),
+                        lambda: {(): hasher.in_flight})
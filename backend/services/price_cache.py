@@ -0,0 +1,255 @@
+import os
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime, timedelta, time as dtime
+from zoneinfo import ZoneInfo
+import cachetools
+import pandas as pd
+from services.metrics import metrics
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = dtime(9, 30)
+MARKET_CLOSE = dtime(16, 0)
+
+CACHE_PATH = os.getenv("PRICE_CACHE_PATH", "data/price_cache.sqlite")
+MEMORY_MAXSIZE = int(os.getenv("PRICE_CACHE_MAXSIZE", "5000"))
+QUOTE_TTL_OPEN = 60         # quotes move while the market is open
+QUOTE_TTL_CLOSED = 30 * 60  # ...and barely at all once it's closed
+INTRADAY_TTL = 60           # bars of a session that is still trading
+# Intraday bars older than this are deleted from the disk tier (yfinance
+# serves 1-minute bars for the last 7 days only)
+INTRADAY_RETENTION_DAYS = float(os.getenv("INTRADAY_RETENTION_DAYS", "7"))
+PRUNE_INTERVAL = 3600
+
+BAR_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def market_now():
+    return datetime.now(MARKET_TZ)
+
+
+def market_is_open(now=None):
+    """Regular US session, Mon-Fri 9:30-16:00 New York time (holidays ignored)"""
+    now = now or market_now()
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def last_session_close(now=None):
+    """Datetime of the most recent regular-session close at or before now"""
+    now = now or market_now()
+    day = now.date()
+    if now.time() < MARKET_CLOSE:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return datetime.combine(day, MARKET_CLOSE, tzinfo=MARKET_TZ)
+
+
+def quote_ttl(now=None):
+    return QUOTE_TTL_OPEN if market_is_open(now) else QUOTE_TTL_CLOSED
+
+
+def period_start(period, now=None):
+    """Translate a yfinance period string ("7d", "1mo", "6mo", "1y") to a start date"""
+    now = now or market_now()
+    units = {"d": 1, "wk": 7, "mo": 31, "y": 366}
+    for suffix, days in units.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return (now - timedelta(days=int(period[:-len(suffix)]) * days)).date()
+    raise ValueError(f"Unsupported period: {period}")
+
+
+class _CountingLRU(cachetools.LRUCache):
+    def __init__(self, maxsize, on_evict):
+        super().__init__(maxsize=maxsize)
+        self._on_evict = on_evict
+
+    def popitem(self):
+        item = super().popitem()
+        self._on_evict()
+        return item
+
+
+class PriceCache:
+    """Shared two-tier cache for market data.
+
+    - memory: bounded LRU for hot values (quotes, ticker info, indicators),
+      each entry with its own TTL.
+    - disk: SQLite store of intraday OHLCV bars keyed by (symbol, interval, ts)
+      that survives restarts (daily bars live in services.history_store).
+      A per-(symbol, interval) sync record decides when the tail has to be
+      refreshed: bars synced after the last session close stay valid,
+      except while the market is open where they are refreshed every
+      INTRADAY_TTL seconds (or a caller's max_age). Bars older than
+      INTRADAY_RETENTION_DAYS are pruned at most once per PRUNE_INTERVAL.
+    """
+
+    def __init__(self, path=CACHE_PATH, maxsize=MEMORY_MAXSIZE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._memory = _CountingLRU(maxsize, self._count_eviction)
+        self._counters = {
+            "memory_hits": 0,
+            "memory_misses": 0,
+            "memory_expired": 0,
+            "memory_evictions": 0,
+            "disk_hits": 0,
+            "disk_misses": 0,
+            "disk_bars_written": 0,
+            "disk_bars_pruned": 0,
+        }
+        self._db = None
+        self._last_prune = 0.0
+
+    def _count_eviction(self):
+        self._counters["memory_evictions"] += 1
+
+    # -- memory tier ---------------------------------------------------------
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                self._counters["memory_misses"] += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._memory[key]
+                self._counters["memory_expired"] += 1
+                self._counters["memory_misses"] += 1
+                return None
+            self._counters["memory_hits"] += 1
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._memory[key] = (time.monotonic() + ttl, value)
+
+    # -- disk tier -----------------------------------------------------------
+
+    def _conn(self):
+        if self._db is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS bars ("
+                " symbol TEXT, interval TEXT, ts TEXT,"
+                " open REAL, high REAL, low REAL, close REAL, volume REAL,"
+                " PRIMARY KEY (symbol, interval, ts))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sync ("
+                " symbol TEXT, interval TEXT, covered_from TEXT, synced_at REAL,"
+                " PRIMARY KEY (symbol, interval))"
+            )
+        return self._db
+
+    def bars_fresh(self, symbol, interval, start, now=None, max_age=INTRADAY_TTL):
+        """True if stored bars for symbol cover [start, now] well enough to serve.
+        While the market is open they must also be synced within max_age seconds."""
+        now = now or market_now()
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT covered_from, synced_at FROM sync WHERE symbol=? AND interval=?",
+                (symbol, interval),
+            ).fetchone()
+        if row is None or row[0] > start.isoformat():
+            return False
+        synced_at = datetime.fromtimestamp(row[1], MARKET_TZ)
+        if synced_at < last_session_close(now):
+            return False
+        if market_is_open(now) and (now - synced_at).total_seconds() > max_age:
+            return False
+        return True
+
+    def get_bars(self, symbol, interval, start, now=None, max_age=INTRADAY_TTL):
+        """Stored bars since start as an OHLCV DataFrame, or None if stale/missing"""
+        if not self.bars_fresh(symbol, interval, start, now, max_age):
+            with self._lock:
+                self._counters["disk_misses"] += 1
+            return None
+
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT ts, open, high, low, close, volume FROM bars"
+                " WHERE symbol=? AND interval=? AND ts>=? ORDER BY ts",
+                (symbol, interval, start.isoformat()),
+            ).fetchall()
+            self._counters["disk_hits"] += 1
+
+        df = pd.DataFrame(rows, columns=["ts"] + BAR_FIELDS)
+        df.index = pd.to_datetime(df.pop("ts")).rename("Date")
+        return df
+
+    def put_bars(self, symbol, interval, df, covered_from, now=None):
+        """Upsert downloaded bars and mark symbol as synced from covered_from"""
+        now = now or market_now()
+        df = df.dropna(subset=["Close"])
+        index = df.index.tz_localize(None) if df.index.tz is not None else df.index
+        rows = [
+            (symbol, interval, ts.isoformat(), *(float(v) for v in values))
+            for ts, values in zip(index, df[BAR_FIELDS].itertuples(index=False))
+        ]
+        start = covered_from.isoformat()
+        with self._lock:
+            db = self._conn()
+            with db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                prev = db.execute(
+                    "SELECT covered_from, synced_at FROM sync WHERE symbol=? AND interval=?",
+                    (symbol, interval),
+                ).fetchone()
+                # Extend the covered range only if the new download overlaps the old one
+                if prev is not None and prev[0] < start:
+                    prev_synced = datetime.fromtimestamp(prev[1], MARKET_TZ).date().isoformat()
+                    if prev_synced >= start:
+                        start = prev[0]
+                db.execute(
+                    "INSERT OR REPLACE INTO sync VALUES (?, ?, ?, ?)",
+                    (symbol, interval, start, now.timestamp()),
+                )
+            self._counters["disk_bars_written"] += len(rows)
+            if time.monotonic() - self._last_prune > PRUNE_INTERVAL:
+                self._prune_bars(now)
+
+    def _prune_bars(self, now):
+        """Delete bars past the retention window. Caller holds _lock."""
+        cutoff = (now - timedelta(days=INTRADAY_RETENTION_DAYS)).date().isoformat()
+        db = self._conn()
+        with db:
+            deleted = db.execute("DELETE FROM bars WHERE ts < ?", (cutoff,)).rowcount
+            # What was deleted is no longer covered
+            db.execute("UPDATE sync SET covered_from = ? WHERE covered_from < ?", (cutoff, cutoff))
+        self._last_prune = time.monotonic()
+        self._counters["disk_bars_pruned"] += deleted
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_size"] = len(self._memory)
+            stats["memory_maxsize"] = self._memory.maxsize
+        lookups = stats["memory_hits"] + stats["memory_misses"]
+        stats["memory_hit_ratio"] = stats["memory_hits"] / lookups if lookups else None
+        lookups = stats["disk_hits"] + stats["disk_misses"]
+        stats["disk_hit_ratio"] = stats["disk_hits"] / lookups if lookups else None
+        return stats
+
+
+price_cache = PriceCache()
+
+
+def _hit_ratios():
+    stats = price_cache.stats()
+    return {("price_memory",): stats["memory_hit_ratio"], ("price_disk",): stats["disk_hit_ratio"]}
+
+
+metrics.register_gauges("cache_hit_ratio", "Hit ratio of in-process caches", ("cache",), _hit_ratios)
@@ -0,0 +1,173 @@
+import os
+import asyncio
+import time
+import logging
+from datetime import datetime
+from services.market_data import fetch_close_matrix, unique_symbols, is_valid_symbol
+from services.price_cache import market_is_open
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_OPEN = float(os.getenv("STREAM_POLL_INTERVAL", "5"))
+POLL_INTERVAL_CLOSED = 60.0
+# A subscriber that hasn't drained its updates for this long is disconnected
+SLOW_CLIENT_TIMEOUT = float(os.getenv("STREAM_SLOW_CLIENT_TIMEOUT", "30"))
+MAX_SYMBOLS_PER_CLIENT = 50
+
+
+def symbol_list(value):
+    """Validate a subscribe/unsubscribe payload: a list of ticker strings"""
+    if not isinstance(value, list) or not all(isinstance(s, str) for s in value):
+        raise ValueError("expected a list of symbols")
+    invalid = [s for s in value if not is_valid_symbol(s.strip())]
+    if invalid:
+        raise ValueError(f"invalid symbols: {', '.join(invalid[:10])}")
+    return value
+
+
+def fetch_latest_prices(symbols):
+    """Latest 1-minute close per symbol, one bulk request for all of them.
+    Cached bars are only reused if they are younger than one poll interval."""
+    closes = fetch_close_matrix(symbols, period="1d", interval="1m", max_age=POLL_INTERVAL_OPEN)
+    latest = closes.ffill().iloc[-1] if not closes.empty else {}
+    return {s: float(latest[s]) for s in symbols if s in latest and latest[s] == latest[s]}
+
+
+class Subscription:
+    """One client's view of the hub.
+
+    Pending updates are coalesced per symbol (latest price wins), so a slow
+    client holds at most one update per subscribed symbol no matter how many
+    ticks it missed.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = set(symbols)
+        self.pending = {}
+        self.closed = False
+        self.last_drained = time.monotonic()
+        self._ready = asyncio.Event()
+
+    def push(self, update):
+        self.pending[update["symbol"]] = update
+        self._ready.set()
+
+    def is_stale(self, now):
+        return bool(self.pending) and now - self.last_drained > SLOW_CLIENT_TIMEOUT
+
+    async def next_batch(self, timeout=None):
+        """Wait for updates and return them ([] on timeout or when closed)"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._ready.clear()
+        batch = list(self.pending.values())
+        self.pending = {}
+        self.last_drained = time.monotonic()
+        return batch
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+
+
+class QuoteHub:
+    """Fans out price changes to every subscriber.
+
+    One poller fetches the union of all subscribed symbols per tick (one
+    bulk upstream request), so N viewers of a symbol cost one fetch.
+    Only symbols whose price changed are pushed.
+    """
+
+    def __init__(self, fetch=fetch_latest_prices):
+        self.fetch = fetch
+        self.subscriptions = set()
+        self.prices = {}
+        self.ticks = 0
+        self.dropped_clients = 0
+        self._poller = None
+
+    def watched_symbols(self):
+        symbols = set()
+        for sub in self.subscriptions:
+            symbols |= sub.symbols
+        return sorted(symbols)
+
+    def subscribe(self, symbols=()):
+        sub = Subscription(())
+        self.subscriptions.add(sub)
+        self.add_symbols(sub, symbols)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self._poll())
+        return sub
+
+    def add_symbols(self, sub, symbols):
+        symbols = unique_symbols(s.upper() for s in symbols)
+        room = MAX_SYMBOLS_PER_CLIENT - len(sub.symbols)
+        new = [s for s in symbols if s not in sub.symbols][:max(room, 0)]
+        sub.symbols.update(new)
+        # Send what we already know right away
+        for symbol in new:
+            if symbol in self.prices:
+                sub.push(self.prices[symbol])
+
+    def remove_symbols(self, sub, symbols):
+        sub.symbols.difference_update(s.strip().upper() for s in symbols)
+
+    def unsubscribe(self, sub):
+        sub.close()
+        self.subscriptions.discard(sub)
+
+    def publish(self, prices):
+        """Push changed prices to their subscribers; returns the updates sent"""
+        now = time.monotonic()
+        updates = []
+        for symbol, price in prices.items():
+            previous = self.prices.get(symbol)
+            if previous is not None and previous["price"] == price:
+                continue
+            update = {
+                "symbol": symbol,
+                "price": round(price, 4),
+                "change": round(price - previous["price"], 4) if previous else 0.0,
+                "time": datetime.now().isoformat(),
+            }
+            self.prices[symbol] = update
+            updates.append(update)
+
+        for sub in list(self.subscriptions):
+            if sub.is_stale(now):
+                logger.warning("Dropping slow quote stream subscriber")
+                self.dropped_clients += 1
+                self.unsubscribe(sub)
+                continue
+            for update in updates:
+                if update["symbol"] in sub.symbols:
+                    sub.push(update)
+        return updates
+
+    async def _poll(self):
+        loop = asyncio.get_running_loop()
+        while self.subscriptions:
+            symbols = self.watched_symbols()
+            if symbols:
+                try:
+                    prices = await loop.run_in_executor(None, self.fetch, symbols)
+                    self.publish(prices)
+                    self.ticks += 1
+                except Exception as e:
+                    logger.error(f"Quote stream poll failed: {str(e)}")
+            await asyncio.sleep(POLL_INTERVAL_OPEN if market_is_open() else POLL_INTERVAL_CLOSED)
+
+    def stats(self):
+        return {
+            "subscribers": len(self.subscriptions),
+            "symbols": len(self.watched_symbols()),
+            "ticks": self.ticks,
+            "dropped_clients": self.dropped_clients,
+        }
+
+
+hub = QuoteHub()
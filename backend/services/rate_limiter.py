@@ -0,0 +1,180 @@
+import os
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+# Lower value = served first
+INTERACTIVE = 0
+BACKGROUND = 10
+
+
+class TokenBucket:
+    """`capacity` tokens, refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        """Seconds until one token is available (0 if available now)"""
+        self._refill()
+        # Refills accumulate rounding error; a token short by less than that is
+        # available, otherwise callers spin on waits too small to move the clock
+        return 0.0 if self.tokens >= 1 - 1e-9 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class RateLimiter:
+    """Thread-safe and asyncio-friendly limiter over one or more token buckets.
+
+    A call needs a token from every bucket (e.g. per-minute and per-day
+    quotas). Waiters are served strictly by (priority, arrival), so
+    interactive requests overtake queued background refreshes.
+    """
+
+    def __init__(self, buckets, clock=time.monotonic):
+        self.buckets = buckets
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+
+    def _try_take(self, ticket):
+        """Take tokens if ticket is first in line; else return seconds to wait"""
+        if self._queue[0] != ticket:
+            # Not our turn yet; re-check after the head is likely served
+            return max(max(b.wait_time() for b in self.buckets), 0.05)
+        wait = max(b.wait_time() for b in self.buckets)
+        if wait > 0:
+            return wait
+        for bucket in self.buckets:
+            bucket.take()
+        heapq.heappop(self._queue)
+        return 0.0
+
+    def _enqueue(self, priority):
+        ticket = (priority, next(self._seq))
+        heapq.heappush(self._queue, ticket)
+        return ticket
+
+    def _cancel(self, ticket):
+        self._queue.remove(ticket)
+        heapq.heapify(self._queue)
+        self._cond.notify_all()
+
+    def acquire(self, priority=INTERACTIVE, timeout=None):
+        """Block until a call is allowed. Returns False if timeout expires first."""
+        deadline = None if timeout is None else self.clock() + timeout
+        with self._cond:
+            ticket = self._enqueue(priority)
+            while True:
+                wait = self._try_take(ticket)
+                if wait == 0:
+                    self._cond.notify_all()
+                    return True
+                if deadline is not None:
+                    remaining = deadline - self.clock()
+                    if remaining <= 0:
+                        self._cancel(ticket)
+                        return False
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+
+    async def acquire_async(self, priority=INTERACTIVE, sleep=asyncio.sleep):
+        """Like acquire(), but waits with asyncio.sleep instead of blocking the loop"""
+        with self._cond:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_take(ticket)
+                    if wait == 0:
+                        self._cond.notify_all()
+                        return True
+                await sleep(wait)
+        except asyncio.CancelledError:
+            with self._cond:
+                if ticket in self._queue:
+                    self._cancel(ticket)
+            raise
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._queue)
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one upstream call.
+
+    The first caller runs fn; callers arriving while it is in flight wait for
+    and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event()}
+
+        if not leader:
+            call["done"].wait()
+            if "error" in call:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+    async def do_async(self, key, coro_fn):
+        """Async variant for coroutine functions (single event loop, no locking)"""
+        future = self._async_calls.get(key)
+        if future is None:
+            future = self._async_calls[key] = asyncio.ensure_future(coro_fn())
+            future.add_done_callback(lambda _: self._async_calls.pop(key, None))
+        # Shield so one cancelled waiter doesn't cancel the call for the others
+        return await asyncio.shield(future)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(api_key, calls_per_minute=None, calls_per_day=None, clock=time.monotonic):
+    """Process-wide limiter for an API key (one quota shared by every caller)"""
+    with _limiters_lock:
+        if api_key not in _limiters:
+            per_minute = calls_per_minute or float(os.getenv("ALPHA_VANTAGE_CALLS_PER_MINUTE", "4"))
+            per_day = calls_per_day or float(os.getenv("ALPHA_VANTAGE_CALLS_PER_DAY", "25"))
+            buckets = [
+                # capacity 1 keeps calls evenly spaced instead of bursting
+                TokenBucket(per_minute / 60, 1, clock),
+                TokenBucket(per_day / 86400, per_day, clock),
+            ]
+            _limiters[api_key] = RateLimiter(buckets, clock)
+        return _limiters[api_key]
@@ -0,0 +1,165 @@
+import os
+import asyncio
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from database import async_portfolio_collection
+from ml.model_registry import registry
+from ml.smart_recommender import score_symbols
+from ml.indicators import latest_indicators
+from services.market_data import fetch_history, unique_symbols
+from services.price_cache import market_is_open
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") == "1"
+OPEN_INTERVAL = int(os.getenv("SCHEDULER_OPEN_INTERVAL", "300"))      # seconds, market open
+CLOSED_INTERVAL = int(os.getenv("SCHEDULER_CLOSED_INTERVAL", "3600"))  # seconds, market closed
+MAX_CONCURRENT_JOBS = int(os.getenv("SCHEDULER_MAX_JOBS", "2"))
+CHUNK_SIZE = int(os.getenv("SCHEDULER_CHUNK_SIZE", "50"))
+
+
+class JobQueue:
+    """Runs blocking jobs on a dedicated pool, at most max_concurrency at a time,
+    and keeps timing metrics per job name."""
+
+    def __init__(self, max_concurrency=MAX_CONCURRENT_JOBS):
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="scheduler")
+        self._semaphore = None
+        self.pending = 0
+        self.metrics = {}
+
+    def _record(self, name, seconds, failed):
+        m = self.metrics.setdefault(name, {"runs": 0, "failures": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        m["runs"] += 1
+        m["failures"] += int(failed)
+        m["total_seconds"] += seconds
+        m["max_seconds"] = max(m["max_seconds"], seconds)
+        m["last_seconds"] = seconds
+        m["avg_seconds"] = m["total_seconds"] / m["runs"]
+
+    async def run(self, name, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.pending += 1
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                started = time.perf_counter()
+                try:
+                    result = await loop.run_in_executor(self._executor, func, *args)
+                except Exception as e:
+                    self._record(name, time.perf_counter() - started, failed=True)
+                    logger.error(f"Scheduled job {name} failed: {str(e)}")
+                    return None
+                self._record(name, time.perf_counter() - started, failed=False)
+                return result
+        finally:
+            self.pending -= 1
+
+
+def _refresh_chunk(symbols):
+    """Bars, indicators and model scores for one batch of symbols"""
+    bars = fetch_history(symbols, period="1y")
+    if bars.empty:
+        return {}
+    indicators = latest_indicators(bars)
+
+    rf_model, lstm_model, scaler = registry.get()
+    if None in [rf_model, lstm_model, scaler]:
+        raise Exception("Failed to load ML models")
+    scored = score_symbols(symbols, rf_model, lstm_model, scaler, closes=bars["Close"].reindex(columns=symbols))
+
+    for symbol, suggestion in scored.items():
+        if symbol in indicators:
+            suggestion["indicators"] = indicators[symbol]
+    return scored
+
+
+class SuggestionScheduler:
+    """Precomputes suggestions for the union of symbols held across all
+    portfolios, so the API serves them without touching upstream or models."""
+
+    def __init__(self, jobs=None):
+        self.jobs = jobs or JobQueue()
+        self.suggestions = {}
+        self.as_of = None
+        self.last_run_seconds = None
+        self._task = None
+        self._lock = None
+
+    async def held_symbols(self):
+        symbols = await async_portfolio_collection.distinct("stocks.symbol")
+        return unique_symbols(s for s in symbols if isinstance(s, str))
+
+    async def run_once(self, symbols=None):
+        """Refresh everything once; awaitable directly (e.g. from tests)"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            started = time.perf_counter()
+            symbols = symbols if symbols is not None else await self.held_symbols()
+            chunks = [symbols[i:i + CHUNK_SIZE] for i in range(0, len(symbols), CHUNK_SIZE)]
+            results = await asyncio.gather(*(self.jobs.run("refresh_chunk", _refresh_chunk, c) for c in chunks))
+
+            fresh = {}
+            for scored in results:
+                fresh.update(scored or {})
+            # Rebuilt from this cycle's symbols, so sold-off holdings drop out;
+            # a failed symbol keeps its last good suggestion
+            previous = self.suggestions
+            suggestions = {}
+            for symbol in symbols:
+                suggestion = fresh.get(symbol)
+                if suggestion is not None and ("error" not in suggestion or symbol not in previous):
+                    suggestions[symbol] = suggestion
+                elif symbol in previous:
+                    suggestions[symbol] = previous[symbol]
+            self.suggestions = suggestions
+            self.as_of = datetime.now().isoformat()
+            self.last_run_seconds = time.perf_counter() - started
+            logger.info(f"Precomputed suggestions for {len(symbols)} symbols in {self.last_run_seconds:.1f}s")
+
+    def next_interval(self):
+        return OPEN_INTERVAL if market_is_open() else CLOSED_INTERVAL
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Suggestion refresh failed: {str(e)}")
+            await asyncio.sleep(self.next_interval())
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def lookup(self, symbols):
+        """Precomputed suggestion per symbol (None where not available yet)"""
+        return [self.suggestions.get(symbol.strip()) for symbol in symbols]
+
+    def stats(self):
+        return {
+            "running": self._task is not None,
+            "symbols": len(self.suggestions),
+            "as_of": self.as_of,
+            "last_run_seconds": self.last_run_seconds,
+            "pending_jobs": self.jobs.pending,
+            "jobs": self.jobs.metrics,
+        }
+
+
+scheduler = SuggestionScheduler()
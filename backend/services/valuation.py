@@ -0,0 +1,164 @@
+import hashlib
+import json
+import threading
+from datetime import date, datetime
+import cachetools
+import numpy as np
+from services.market_data import fetch_close_matrix, unique_symbols, MarketDataUnavailable
+
+# user_id -> last valuation; reused while holdings and the latest bar are unchanged
+_cache = cachetools.LRUCache(maxsize=10000)
+_cache_lock = threading.Lock()
+
+
+def _normalize_lots(stocks):
+    return [{
+        "symbol": s["symbol"].strip().upper(),
+        "quantity": float(s["quantity"]),
+        "buy_price": float(s["buy_price"]),
+        "buy_date": s["buy_date"],
+    } for s in stocks if s.get("symbol", "").strip()]
+
+
+def _signature(lots):
+    return hashlib.sha1(json.dumps(lots, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _holdings_matrix(lots, symbols, dates):
+    """(dates, symbols) quantity held at each close, from the lots' buy dates"""
+    column = {s: i for i, s in enumerate(symbols)}
+    quantity = np.array([lot["quantity"] for lot in lots])
+    buy_dates = np.array([lot["buy_date"] for lot in lots], dtype="datetime64[D]")
+    lot_to_symbol = np.zeros((len(lots), len(symbols)))
+    lot_to_symbol[np.arange(len(lots)), [column[lot["symbol"]] for lot in lots]] = 1
+    held = dates[:, None] >= buy_dates[None, :]
+    return (held * quantity) @ lot_to_symbol
+
+
+def _growth(holdings, prices, start, end):
+    """Product of (1 + r_t) for t in (start, end], holding yesterday's positions.
+
+    Each daily return is measured on the positions held at the previous
+    close, so buying more shares (a cash flow) doesn't count as performance.
+    A symbol only counts on days it has a price on both closes (prices are
+    NaN before it listed).
+    """
+    if end <= start:
+        return 1.0
+    held = holdings[start:end]
+    prev, cur = prices[start:end], prices[start + 1:end + 1]
+    priced = ~np.isnan(prev) & ~np.isnan(cur)
+    before = np.where(priced, held * prev, 0.0).sum(axis=1)
+    after = np.where(priced, held * cur, 0.0).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.where(before > 0, after / before - 1, 0.0)
+    return float(np.prod(1 + returns))
+
+
+def _summarize(lots, symbols, prices, holdings, twr, as_of):
+    column = {s: i for i, s in enumerate(symbols)}
+    quantity = np.zeros(len(symbols))
+    cost = np.zeros(len(symbols))
+    for lot in lots:
+        quantity[column[lot["symbol"]]] += lot["quantity"]
+        cost[column[lot["symbol"]]] += lot["quantity"] * lot["buy_price"]
+
+    price = prices[-1]
+    prev_price = prices[-2] if len(prices) > 1 else prices[-1]
+    # Listed on the latest bar: no previous close, so no daily change
+    prev_price = np.where(np.isnan(prev_price), price, prev_price)
+    value = quantity * price
+    pnl = value - cost
+    # Daily change only for shares already held at the previous close
+    held_yesterday = holdings[-2] if len(holdings) > 1 else quantity
+    daily = held_yesterday * (price - prev_price)
+    total_value, total_cost = value.sum(), cost.sum()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = np.where(total_value > 0, value / total_value, 0.0)
+        pnl_pct = np.where(cost > 0, pnl / cost * 100, 0.0)
+        daily_pct = np.where(prev_price > 0, (price / prev_price - 1) * 100, 0.0)
+    prev_total = (held_yesterday * prev_price).sum()
+
+    return {
+        "as_of": as_of,
+        "total_value": round(float(total_value), 2),
+        "total_cost": round(float(total_cost), 2),
+        "unrealized_pnl": round(float(total_value - total_cost), 2),
+        "unrealized_pnl_pct": round(float((total_value / total_cost - 1) * 100), 2) if total_cost else 0.0,
+        "daily_change": round(float(daily.sum()), 2),
+        "daily_change_pct": round(float(daily.sum() / prev_total * 100), 2) if prev_total else 0.0,
+        "time_weighted_return_pct": round((twr - 1) * 100, 2),
+        "holdings": [{
+            "symbol": symbol,
+            "quantity": float(quantity[i]),
+            "avg_cost": round(float(cost[i] / quantity[i]), 2) if quantity[i] else 0.0,
+            "cost_basis": round(float(cost[i]), 2),
+            "price": round(float(price[i]), 2),
+            "market_value": round(float(value[i]), 2),
+            "weight": round(float(weight[i]), 4),
+            "unrealized_pnl": round(float(pnl[i]), 2),
+            "unrealized_pnl_pct": round(float(pnl_pct[i]), 2),
+            "daily_change": round(float(daily[i]), 2),
+            "daily_change_pct": round(float(daily_pct[i]), 2),
+        } for i, symbol in enumerate(symbols)],
+    }
+
+
+def value_portfolio(user_id, stocks):
+    """Valuation and P&L for a user's holdings, cached per user.
+
+    A repeat call with unchanged holdings and an unchanged latest bar is a
+    dictionary lookup. When only new bars arrived, the time-weighted return
+    is extended from the cached product over the new rows.
+    """
+    lots = _normalize_lots(stocks)
+    if not lots:
+        return None
+    symbols = unique_symbols(lot["symbol"] for lot in lots)
+    invalid = {lot["symbol"] for lot in lots} - set(symbols)
+    if invalid:
+        raise ValueError(f"Invalid symbols: {', '.join(sorted(invalid))}")
+    signature = _signature(lots)
+
+    first_buy = min(date.fromisoformat(lot["buy_date"]) for lot in lots)
+    days = max((date.today() - first_buy).days, 0) + 7
+    # Forward-fill only: before a symbol listed its prices stay NaN
+    closes = fetch_close_matrix(symbols, period=f"{days}d").ffill()
+    closes = closes.dropna(axis=1, how="all")
+    if closes.empty:
+        raise MarketDataUnavailable("No price data for portfolio holdings")
+    missing = set(symbols) - set(closes.columns)
+    if missing:
+        raise MarketDataUnavailable(f"No price data for {', '.join(sorted(missing))}")
+
+    dates = closes.index.values.astype("datetime64[D]")
+    last_bar = (str(dates[-1]), tuple(closes.iloc[-1].round(6)))
+    with _cache_lock:
+        entry = _cache.get(user_id)
+    if entry and entry["signature"] == signature and entry["last_bar"] == last_bar:
+        return entry["result"]
+
+    prices = closes.to_numpy()
+    holdings = _holdings_matrix(lots, symbols, dates)
+    # TWR over finalized rows is cached; the latest (possibly provisional) row
+    # is always recomputed
+    final = len(dates) - 2
+    start, growth = 0, 1.0
+    if entry and entry["signature"] == signature:
+        cached_final = np.searchsorted(dates, np.datetime64(entry["final_date"], "D"))
+        if cached_final < len(dates) and str(dates[cached_final]) == entry["final_date"] and cached_final <= final:
+            start, growth = cached_final, entry["growth"]
+    growth *= _growth(holdings, prices, start, final)
+    twr = growth * _growth(holdings, prices, max(final, 0), len(dates) - 1)
+
+    result = _summarize(lots, symbols, prices, holdings, twr, datetime.now().isoformat())
+    with _cache_lock:
+        _cache[user_id] = {
+            "signature": signature,
+            "last_bar": last_bar,
+            "final_date": str(dates[max(final, 0)]),
+            "growth": growth,
+            "result": result,
+        }
+    return result
@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# Tests import the app modules the same way main.py does, from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Nothing may touch the real data directories or a real Mongo. The Mongo
+# clients connect lazily, so importing database is safe.
+_scratch = tempfile.mkdtemp(prefix="stocksage-tests-")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("HISTORY_STORE_PATH", os.path.join(_scratch, "history"))
+os.environ.setdefault("PRICE_CACHE_PATH", os.path.join(_scratch, "price_cache.sqlite"))
+os.environ.setdefault("FEATURE_CACHE_DIR", os.path.join(_scratch, "features"))
+os.environ.setdefault("PROFILE_DIR", os.path.join(_scratch, "profiles"))
@@ -0,0 +1,22 @@
+import pytest
+from fastapi import HTTPException
+from routes.admin import require_admin
+
+
+@pytest.mark.parametrize("token", [None, "", "wrong", "s3cret-but-longer", "s3crét"])
+def test_wrong_or_missing_tokens_are_refused(monkeypatch, token):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    with pytest.raises(HTTPException) as error:
+        require_admin(token)
+    assert error.value.status_code == 403
+
+
+def test_unset_admin_token_refuses_everyone(monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    with pytest.raises(HTTPException):
+        require_admin("")
+
+
+def test_matching_token_is_accepted(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    assert require_admin("s3cret") is None
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ml import backtest
+
+
+@pytest.fixture(scope="module")
+def closes():
+    return backtest.synthetic_closes(n_symbols=12, n_days=600, seed=11)
+
+
+def test_synthetic_fixture_is_deterministic(closes):
+    again = backtest.synthetic_closes(n_symbols=12, n_days=600, seed=11)
+    pd.testing.assert_frame_equal(closes, again)
+    assert not closes.equals(backtest.synthetic_closes(n_symbols=12, n_days=600, seed=12))
+    # Staggered listings: leading NaNs only, never gaps after the first price
+    for symbol in closes:
+        listed = closes[symbol].loc[closes[symbol].first_valid_index():]
+        assert listed.notna().all()
+
+
+@pytest.mark.parametrize("strategy, params", [("sma", {"lookback": 21}), ("threshold", {"threshold": 0.01})])
+def test_signals_use_no_future_data(closes, strategy, params):
+    values = closes.to_numpy(dtype=float)
+    full = backtest.STRATEGIES[strategy](values, **params)
+    for t in (30, 200, 599):
+        truncated = backtest.STRATEGIES[strategy](values[:t + 1], **params)
+        np.testing.assert_array_equal(truncated, full[:t + 1])
+
+
+def test_positions_earn_the_next_bar_net_of_costs():
+    closes = np.array([[100.0], [110.0], [99.0], [99.0]])
+    positions = np.array([[1.0], [0.0], [1.0], [1.0]])
+    returns, held, trades = backtest.strategy_returns(closes, positions, cost_bps=10)
+    np.testing.assert_array_equal(held[:, 0], [0, 1, 0, 1])
+    np.testing.assert_array_equal(trades[:, 0], [0, 1, 1, 1])
+    np.testing.assert_allclose(returns[:, 0], [0, 0.1 - 0.001, -0.001, 0 - 0.001])
+
+
+def test_matches_a_day_by_day_replay(closes):
+    symbol = closes.columns[0]
+    series = closes[symbol].to_numpy()
+    result = backtest.backtest(closes[[symbol]], "sma", {"lookback": 21}, cost_bps=5)
+
+    equity, position = 1.0, 0.0
+    for t in range(1, len(series)):
+        if np.isnan(series[t - 1]):
+            continue
+        target = 0.0
+        history = series[:t][~np.isnan(series[:t])]
+        if len(history) >= 21 and series[t - 1] > history[-21:].mean():
+            target = 1.0
+        # Decided at yesterday's close, held over today's bar
+        equity *= 1 + target * (series[t] / series[t - 1] - 1) - abs(target - position) * 5 / 10000
+        position = target
+
+    assert result["symbols"][symbol]["total_return"] == pytest.approx(equity - 1, abs=1e-4)
+
+
+def test_reports_metrics_per_symbol_and_portfolio(closes):
+    result = backtest.backtest(closes, "sma")
+    assert set(result["symbols"]) == set(closes.columns)
+    assert result["symbol_years"] == round(closes.notna().to_numpy().sum() / backtest.TRADING_DAYS, 1)
+    for metrics in [result["portfolio"], *result["symbols"].values()]:
+        assert -1 <= metrics["max_drawdown"] <= 0
+        assert 0 <= metrics["exposure"] <= 1
+        assert metrics["hit_rate"] is None or 0 <= metrics["hit_rate"] <= 1
+    assert result["portfolio"]["trades"] == sum(m["trades"] for m in result["symbols"].values())
+
+
+def test_parallel_run_matches_serial(closes):
+    serial = backtest.backtest(closes, "threshold", jobs=1)
+    parallel = backtest.backtest(closes, "threshold", jobs=2)
+    assert parallel == serial
+
+
+def test_walk_forward_stitches_out_of_sample_folds(closes):
+    grid = {"lookback": [10, 21, 50]}
+    result = backtest.walk_forward(closes, "sma", grid, train_days=252, test_days=63, jobs=2)
+    assert result == backtest.walk_forward(closes, "sma", grid, train_days=252, test_days=63)
+
+    folds = result["folds"]
+    assert len(folds) == -(-(len(closes) - 252) // 63)
+    assert folds[0]["from"] == str(closes.index[252].date())
+    assert folds[-1]["to"] == str(closes.index[-1].date())
+    assert all(fold["params"] in backtest.expand_grid(grid) for fold in folds)
+    assert [p["params"] for p in result["full_period"]] == backtest.expand_grid(grid)
+
+
+def test_walk_forward_needs_a_training_window(closes):
+    with pytest.raises(ValueError):
+        backtest.walk_forward(closes.iloc[:100], "sma", {"lookback": [21]}, train_days=252)
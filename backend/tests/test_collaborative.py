@@ -0,0 +1,160 @@
+import threading
+import numpy as np
+import pytest
+from benchmarks.portfolios import synthetic_portfolios
+from ml.collaborative import HoldingsIndex, portfolio_weights
+
+
+def lot(symbol, quantity=10, buy_price=100.0):
+    return {"symbol": symbol, "quantity": quantity, "buy_price": buy_price, "buy_date": "2024-01-02"}
+
+
+@pytest.fixture(scope="module")
+def portfolios():
+    return dict(synthetic_portfolios(n_users=400, n_symbols=120, holdings=8, n_styles=6, seed=5))
+
+
+def built(portfolios, **kwargs):
+    index = HoldingsIndex(**kwargs)
+    index.build(portfolios.items())
+    return index
+
+
+def neighbours_by_symbol(index):
+    return {
+        index.symbols[sid]: dict(zip((index.symbols[i] for i in ids), sims))
+        for sid, (ids, sims) in enumerate(index._neighbors)
+    }
+
+
+def coholdings(index):
+    """{(symbol, symbol): weight} of the co-holding matrix including the pending delta"""
+    pairs = {}
+    for sid, symbol in enumerate(index.symbols):
+        ids, vals = index._row(sid)
+        pairs.update({(symbol, index.symbols[i]): v for i, v in zip(ids, vals) if abs(v) > 1e-12})
+    return pairs
+
+
+def assert_same_index(index, expected):
+    assert index.users.keys() == expected.users.keys()
+    actual_neighbours, expected_neighbours = neighbours_by_symbol(index), neighbours_by_symbol(expected)
+    for symbol, neighbours in expected_neighbours.items():
+        got = actual_neighbours.get(symbol, {})
+        assert got.keys() == neighbours.keys(), symbol
+        np.testing.assert_allclose([got[s] for s in neighbours], list(neighbours.values()), rtol=1e-9)
+    for user_id in expected.users:
+        got, want = index.recommend(user_id, 10), expected.recommend(user_id, 10)
+        assert [s for s, _ in got] == [s for s, _ in want], user_id
+        np.testing.assert_allclose([x for _, x in got], [x for _, x in want], rtol=1e-9)
+
+
+def test_portfolio_weights_share_of_cost_basis():
+    weights = portfolio_weights([lot("aapl", 10, 100), lot("AAPL", 10, 100), lot("MSFT", 20, 50),
+                                 lot("BAD", 0, 10), {"symbol": "NOPE"}, lot("", 1, 1)])
+    assert weights == {"AAPL": 2000 / 3000, "MSFT": 1000 / 3000}
+    assert portfolio_weights([]) == {} and portfolio_weights(None) == {}
+
+
+def test_recommendations_exclude_holdings_and_are_ranked(portfolios):
+    index = built(portfolios)
+    for user_id, stocks in list(portfolios.items())[:50]:
+        held = set(portfolio_weights(stocks))
+        recommendations = index.recommend(user_id, 10)
+        assert 0 < len(recommendations) <= 10
+        assert held.isdisjoint(s for s, _ in recommendations)
+        scores = [score for _, score in recommendations]
+        assert scores == sorted(scores, reverse=True)
+
+
+def test_recommends_symbols_from_the_users_investing_style():
+    portfolios = dict(synthetic_portfolios(n_users=1000, n_symbols=300, holdings=8, n_styles=10, seed=5))
+    # Hide one random holding per user; it should often come back in the top 10
+    rng = np.random.default_rng(0)
+    hidden = {user_id: int(rng.integers(len(stocks))) for user_id, stocks in portfolios.items()}
+    index = built({user_id: stocks[:hidden[user_id]] + stocks[hidden[user_id] + 1:]
+                   for user_id, stocks in portfolios.items()})
+    hits = sum(portfolios[u][hidden[u]]["symbol"] in {s for s, _ in index.recommend(u, 10)} for u in portfolios)
+    # Ten random picks from ~290 unheld symbols would hit ~3.5% of the time
+    assert hits / len(portfolios) > 0.2
+
+
+def test_cold_start_returns_the_most_held_symbols(portfolios):
+    index = built(portfolios)
+    popular = index.recommend("newcomer", 5)
+    assert [score for _, score in popular] == [None] * 5
+    holders = {}
+    for stocks in portfolios.values():
+        for symbol in portfolio_weights(stocks):
+            holders[symbol] = holders.get(symbol, 0) + 1
+    assert [holders[s] for s, _ in popular] == sorted(holders.values(), reverse=True)[:5]
+
+
+def test_incremental_updates_match_a_rebuild(portfolios):
+    index = built(portfolios, compact_every=10 ** 9)
+    current = dict(portfolios)
+    rng = np.random.default_rng(0)
+    users = list(current)
+    for step in range(150):
+        user_id = users[rng.integers(len(users))]
+        action = step % 3
+        if action == 0:
+            # Buy: includes symbols the index has never seen
+            current[user_id] = current[user_id] + [lot(f"NEW{step % 7}", int(rng.integers(1, 50)))]
+        elif action == 1:
+            current[user_id] = current[user_id][1:]
+        else:
+            current[f"fresh{step}"] = [lot("SYM0001"), lot(f"NEW{step % 7}")]
+            users.append(f"fresh{step}")
+            user_id = f"fresh{step}"
+        index.update_user(user_id, current[user_id])
+    # Sell everything
+    current[users[0]] = []
+    index.update_user(users[0], [])
+
+    expected = built({u: s for u, s in current.items() if s})
+    # The co-holding matrix is exact before compaction; neighbour lists after it
+    actual, wanted = coholdings(index), coholdings(expected)
+    assert actual.keys() == wanted.keys()
+    np.testing.assert_allclose([actual[k] for k in wanted], list(wanted.values()), rtol=1e-9)
+    index.compact()
+    assert not index._delta
+    assert_same_index(index, expected)
+
+
+def test_updates_during_a_rebuild_win_over_the_snapshot(portfolios):
+    index = built(portfolios)
+    user_id = next(iter(portfolios))
+
+    def snapshot():
+        for i, item in enumerate(portfolios.items()):
+            if i == 10:
+                index.update_user(user_id, [lot("LATE")])
+            yield item
+
+    index.build(snapshot())
+    assert list(index.users[user_id]) == [index.symbol_ids["LATE"]]
+    assert index._replay is None
+
+
+def test_queries_never_see_a_half_swapped_index():
+    small = dict(synthetic_portfolios(n_users=200, n_symbols=40, holdings=6, n_styles=4, seed=1))
+    large = dict(synthetic_portfolios(n_users=200, n_symbols=400, holdings=6, n_styles=4, seed=2))
+    index = built(small)
+    errors = []
+
+    def rebuild():
+        for i in range(20):
+            index.build((large if i % 2 == 0 else small).items())
+
+    builder = threading.Thread(target=rebuild)
+    builder.start()
+    while builder.is_alive():
+        try:
+            for user_id in ("user000001", "user000002", "nobody"):
+                index.recommend(user_id, k=5)
+        except Exception as e:
+            errors.append(e)
+            break
+    builder.join()
+    assert errors == []
@@ -0,0 +1,50 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from ml import features
+from ml.features import rolling_mean, rf_dataset, symbol_features
+
+
+def random_walk(n=120, seed=4):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(0.02 * rng.standard_normal(n)))
+
+
+def test_rolling_mean_matches_pandas():
+    closes = random_walk()
+    for window in (1, 7, 21):
+        expected = pd.Series(closes).rolling(window).mean().to_numpy()
+        np.testing.assert_allclose(rolling_mean(closes, window), expected, rtol=1e-12)
+    assert np.isnan(rolling_mean(closes[:5], 7)).all()
+
+
+def test_rf_dataset_matches_the_pandas_construction():
+    closes = random_walk()
+    df = pd.DataFrame({"Close": closes})
+    df["daily_return"] = df["Close"].pct_change()
+    df["ma7"] = df["Close"].rolling(7).mean()
+    df["ma21"] = df["Close"].rolling(21).mean()
+    df = df.dropna()
+    labels = np.select([df["daily_return"] > 0.02, df["daily_return"] < -0.02], [1, -1], 0)
+
+    X, y = rf_dataset(closes)
+    np.testing.assert_allclose(X, df[["daily_return", "ma7", "ma21"]].to_numpy(), rtol=1e-12)
+    np.testing.assert_array_equal(y, labels)
+
+
+def test_symbol_features_are_cached_by_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(features, "FEATURE_CACHE_DIR", str(tmp_path))
+    closes = random_walk()
+    dates = np.arange(len(closes), dtype="int64")
+
+    first = symbol_features("AAPL", dates, closes)
+    assert len(os.listdir(tmp_path)) == 1
+    again = symbol_features("AAPL", dates, closes)
+    for name in first:
+        np.testing.assert_array_equal(first[name], again[name])
+    assert len(os.listdir(tmp_path)) == 1
+
+    # A re-adjusted history is a different cache entry
+    symbol_features("AAPL", dates, closes * 0.5)
+    assert len(os.listdir(tmp_path)) == 2
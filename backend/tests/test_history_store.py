@@ -0,0 +1,138 @@
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+import pytest
+from services.history_store import HistoryStore, MISS_TTL
+from services.price_cache import MARKET_TZ, BAR_FIELDS
+
+DAYS = pd.bdate_range("2023-01-02", "2024-03-15")
+
+
+def at(*args):
+    return datetime(*args, tzinfo=MARKET_TZ)
+
+
+class Upstream:
+    """Stub for the download callback: adjusted bars up to the current day"""
+
+    def __init__(self):
+        self.scale = 1.0
+        self.now = None
+        self.calls = []
+        self.down = False  # simulate an upstream outage: every download comes back empty
+
+    def bars(self, start):
+        days = DAYS[(DAYS >= pd.Timestamp(start)) & (DAYS <= pd.Timestamp(self.now.date()))]
+        close = np.arange(1, len(DAYS) + 1, dtype=float)[DAYS.get_indexer(days)] * self.scale
+        return pd.DataFrame({field: close for field in BAR_FIELDS}, index=days)
+
+    def __call__(self, symbols, start):
+        self.calls.append((sorted(symbols), start))
+        if self.down:
+            return {}
+        return {symbol: self.bars(start) for symbol in symbols if symbol != "GONE"}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(root=str(tmp_path))
+
+
+def sync(store, upstream, now, symbols=("AAPL",), start=date(2024, 1, 2)):
+    upstream.now = now
+    store.update(list(symbols), start, upstream, now=now)
+
+
+def test_backfill_then_only_the_tail(store):
+    upstream = Upstream()
+    sync(store, upstream, at(2024, 3, 5, 18, 0))
+    assert upstream.calls == [(["AAPL"], date(2023, 3, 5))]  # one-year backfill
+    assert store.frame("AAPL").index[-1] == pd.Timestamp("2024-03-05")
+
+    # Same evening: nothing to fetch
+    sync(store, upstream, at(2024, 3, 5, 20, 0))
+    assert len(upstream.calls) == 1
+
+    # Next day during the session: from the last final bar, plus today's provisional bar
+    sync(store, upstream, at(2024, 3, 6, 11, 0))
+    assert upstream.calls[-1] == (["AAPL"], date(2024, 3, 5))
+    frame = store.frame("AAPL")
+    assert frame.index[-1] == pd.Timestamp("2024-03-06")
+    assert frame["Close"].tolist() == upstream.bars(date(2023, 3, 5))["Close"].tolist()
+
+    # The provisional bar is fetched again until its session has closed
+    sync(store, upstream, at(2024, 3, 7, 18, 0))
+    assert upstream.calls[-1] == (["AAPL"], date(2024, 3, 5))
+    sync(store, upstream, at(2024, 3, 8, 18, 0))
+    assert upstream.calls[-1] == (["AAPL"], date(2024, 3, 7))
+    assert store.frame("AAPL").index[-1] == pd.Timestamp("2024-03-08")
+
+
+def test_changed_adjustment_rewrites_the_symbol(store):
+    upstream = Upstream()
+    sync(store, upstream, at(2024, 3, 5, 18, 0))
+
+    upstream.scale = 0.5  # a 2:1 split rescales the whole adjusted history
+    sync(store, upstream, at(2024, 3, 6, 18, 0))
+    assert upstream.calls[-1] == (["AAPL"], date(2023, 3, 5))
+    frame = store.frame("AAPL", start=date(2024, 1, 2))
+    assert frame["Close"].tolist() == upstream.bars(date(2024, 1, 2))["Close"].tolist()
+
+
+def test_unknown_symbols_are_only_remembered_briefly(store, tmp_path):
+    upstream = Upstream()
+    sync(store, upstream, at(2024, 3, 5, 18, 0), symbols=("GONE",))
+    sync(store, upstream, at(2024, 3, 5, 18, 1), symbols=("GONE",))
+    assert len(upstream.calls) == 1
+    assert store.frame("GONE").empty and store.symbols() == []
+
+    later = datetime.fromtimestamp(at(2024, 3, 5, 18, 0).timestamp() + MISS_TTL + 1, MARKET_TZ)
+    sync(store, upstream, later, symbols=("GONE",))
+    assert len(upstream.calls) == 2
+
+
+def test_failed_downloads_keep_the_stored_bars_and_retry(store):
+    upstream = Upstream()
+    sync(store, upstream, at(2024, 3, 5, 18, 0))
+    stored = store.frame("AAPL")
+
+    upstream.down = True
+    sync(store, upstream, at(2024, 3, 6, 18, 0))
+    sync(store, upstream, at(2024, 3, 6, 18, 1))
+    assert len(upstream.calls) == 3  # the failed tail is not treated as synced
+    pd.testing.assert_frame_equal(store.frame("AAPL"), stored)
+
+    upstream.down = False
+    sync(store, upstream, at(2024, 3, 6, 18, 2))
+    assert store.frame("AAPL").index[-1] == pd.Timestamp("2024-03-06")
+
+
+def test_failed_rewrite_after_a_split_keeps_the_old_history(store):
+    upstream = Upstream()
+    sync(store, upstream, at(2024, 3, 5, 18, 0))
+    stored = store.frame("AAPL")
+
+    upstream.scale = 0.5
+    real = upstream.__call__
+
+    def outage_on_rewrite(symbols, start):
+        # The tail check sees the split; the full re-download then fails
+        upstream.down = len(upstream.calls) >= 2
+        return real(symbols, start)
+
+    store.update(["AAPL"], date(2024, 1, 2), outage_on_rewrite, now=at(2024, 3, 6, 18, 0))
+    assert len(upstream.calls) == 3
+    pd.testing.assert_frame_equal(store.frame("AAPL"), stored)
+
+
+def test_window_is_a_view_of_the_requested_range(store):
+    upstream = Upstream()
+    sync(store, upstream, at(2024, 3, 5, 18, 0))
+    dates, values = store.window("AAPL", date(2024, 3, 1), date(2024, 3, 4))
+    assert dates.tolist() == [np.datetime64(d, "D").astype(int) for d in ("2024-03-01", "2024-03-04")]
+    assert values.shape == (2, len(BAR_FIELDS))
+
+
+def test_symbols_cannot_name_paths(store):
+    with pytest.raises(ValueError):
+        store.frame("../../etc")
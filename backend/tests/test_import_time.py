@@ -0,0 +1,42 @@
+import os
+import sys
+import json
+import subprocess
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use only (model load, cache miss, sentiment scoring)
+HEAVY = ["tensorflow", "keras", "sklearn", "yfinance", "transformers", "torch"]
+# Data stack an auth-only worker should never need
+DATA = ["pandas", "scipy"]
+
+
+def imported_modules(enabled_routers=None, module="main"):
+    env = dict(os.environ, PRELOAD_MODELS="0")
+    env.pop("ENABLED_ROUTERS", None)
+    if enabled_routers is not None:
+        env["ENABLED_ROUTERS"] = enabled_routers
+    code = f"import sys, json, {module}; print(json.dumps(sorted(m.split('.')[0] for m in sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, env=env,
+                            capture_output=True, text=True, timeout=120)
+    if result.returncode:
+        pytest.skip(f"{module} does not import in this environment: {result.stderr.strip().splitlines()[-1]}")
+    return set(json.loads(result.stdout.strip().splitlines()[-1]))
+
+
+def test_full_app_defers_ml_and_data_clients():
+    loaded = imported_modules()
+    assert "main" in loaded
+    assert loaded.isdisjoint(HEAVY), sorted(loaded & set(HEAVY))
+
+
+def test_auth_worker_skips_the_data_stack():
+    loaded = imported_modules("auth")
+    assert loaded.isdisjoint(HEAVY + DATA), sorted(loaded & set(HEAVY + DATA))
+    assert "ml" not in loaded
+
+
+def test_lstm_serving_needs_only_numpy():
+    loaded = imported_modules(module="ml.lstm_runtime")
+    assert loaded.isdisjoint(HEAVY + DATA), sorted(loaded & set(HEAVY + DATA))
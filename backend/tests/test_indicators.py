@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ml.backtest import synthetic_closes
+from ml import indicators
+
+
+@pytest.fixture(scope="module")
+def closes():
+    # (dates, symbols) with staggered listings, so leading NaNs are covered too
+    return synthetic_closes(n_symbols=6, n_days=300, seed=3)
+
+
+def _columns(frame):
+    return [frame[c] for c in frame.columns]
+
+
+def _reference_rsi(series, n):
+    delta = series.diff().fillna(0)
+    gain = delta.clip(lower=0).ewm(alpha=1 / n, adjust=False).mean()
+    loss = (-delta).clip(lower=0).ewm(alpha=1 / n, adjust=False).mean()
+    return 100 - 100 / (1 + gain / loss)
+
+
+def _listed(series):
+    """The part of a column after its listing date"""
+    return series[series.first_valid_index():]
+
+
+def test_sma_and_ema_match_pandas(closes):
+    sma = indicators.sma(closes.to_numpy().T, 20)
+    ema = indicators.ema(closes.to_numpy().T, 12)
+    for i, series in enumerate(_columns(closes)):
+        offset = len(series) - len(_listed(series))
+        listed = _listed(series)
+        np.testing.assert_allclose(sma[i, offset:], listed.rolling(20).mean(), equal_nan=True)
+        np.testing.assert_allclose(ema[i, offset:], listed.ewm(span=12, adjust=False).mean(), equal_nan=True)
+        assert np.isnan(sma[i, :offset]).all() and np.isnan(ema[i, :offset]).all()
+
+
+def test_rsi_macd_bollinger_match_pandas(closes):
+    rsi = indicators.rsi(closes.to_numpy().T, 14)
+    line, signal, hist = indicators.macd(closes.to_numpy().T)
+    upper, middle, lower = indicators.bollinger(closes.to_numpy().T, 20, 2.0)
+    for i, series in enumerate(_columns(closes)):
+        listed = _listed(series)
+        offset = len(series) - len(listed)
+
+        expected_rsi = _reference_rsi(listed, 14)
+        expected_rsi.iloc[:14] = np.nan
+        np.testing.assert_allclose(rsi[i, offset:], expected_rsi, equal_nan=True)
+
+        fast = listed.ewm(span=12, adjust=False).mean()
+        slow = listed.ewm(span=26, adjust=False).mean()
+        expected_line = fast - slow
+        expected_signal = expected_line.ewm(span=9, adjust=False).mean()
+        np.testing.assert_allclose(line[i, offset + 25:], expected_line[25:])
+        np.testing.assert_allclose(signal[i, offset + 33:], expected_signal[33:])
+        np.testing.assert_allclose(hist[i, offset + 33:], (expected_line - expected_signal)[33:])
+
+        mean, std = listed.rolling(20).mean(), listed.rolling(20).std(ddof=0)
+        np.testing.assert_allclose(middle[i, offset:], mean, equal_nan=True)
+        np.testing.assert_allclose(upper[i, offset:], mean + 2 * std, equal_nan=True)
+        np.testing.assert_allclose(lower[i, offset:], mean - 2 * std, equal_nan=True)
+
+
+def test_atr_matches_wilder_smoothing(closes):
+    close = closes.iloc[:, 0].dropna()
+    high, low = close * 1.01, close * 0.98
+    prev = close.shift(1).fillna(close.iloc[0])
+    true_range = pd.concat([high - low, (high - prev).abs(), (low - prev).abs()], axis=1).max(axis=1)
+    expected = true_range.ewm(alpha=1 / 14, adjust=False).mean()
+    expected.iloc[:13] = np.nan
+    np.testing.assert_allclose(indicators.atr(high.to_numpy(), low.to_numpy(), close.to_numpy(), 14),
+                               expected, equal_nan=True)
+
+
+def test_interior_gaps_are_forward_filled():
+    series = np.arange(1.0, 41.0)
+    gappy = series.copy()
+    gappy[25] = np.nan
+    filled = series.copy()
+    filled[25] = filled[24]
+    np.testing.assert_allclose(indicators.sma(gappy, 5), indicators.sma(filled, 5), equal_nan=True)
+
+
+def test_incremental_state_matches_full_recomputation(closes):
+    values = closes.to_numpy().T
+    high, low = values * 1.01, values * 0.98
+    state = indicators.IndicatorState(values[:, :250], high[:, :250], low[:, :250])
+    for t in range(250, values.shape[1]):
+        latest = state.update(values[:, t], high[:, t], low[:, t])
+
+    full = indicators.IndicatorState(values, high, low).latest()
+    assert latest.keys() == full.keys()
+    for name in full:
+        np.testing.assert_allclose(latest[name], full[name], rtol=1e-9, equal_nan=True, err_msg=name)
+
+
+def test_latest_indicators_reports_each_symbol(closes):
+    subset = closes.iloc[:, :3]
+    bars = pd.concat({"Close": subset, "High": subset * 1.01, "Low": subset * 0.98}, axis=1)
+    latest = indicators.latest_indicators(bars)
+    assert list(latest) == list(subset.columns)
+    for symbol, values in latest.items():
+        assert values["sma_20"] == round(float(subset[symbol].iloc[-20:].mean()), 4)
+        assert 0 <= values["rsi_14"] <= 100
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ml import inference
+from ml.inference import tail_matrix, rf_features, predict_batch, HISTORY_LENGTH, LSTM_WINDOW
+from ml.windows import WindowScaler
+
+
+def closes_with_gaps():
+    dates = pd.bdate_range("2024-01-01", periods=60)
+    rng = np.random.default_rng(3)
+    closes = pd.DataFrame(100 + rng.standard_normal((60, 3)).cumsum(axis=0),
+                          index=dates, columns=["AAA", "BBB", "NEW"])
+    closes.iloc[::5, 1] = np.nan     # BBB trades on a different calendar
+    closes.iloc[:50, 2] = np.nan     # NEW only has 10 bars
+    return closes
+
+
+class StubForest:
+    classes_ = np.array([-1, 1])  # never saw a Hold
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_proba(self, features):
+        self.batches.append(features)
+        return np.tile([0.25, 0.75], (len(features), 1))
+
+
+class StubLSTM:
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, windows, verbose=0):
+        self.batches.append(windows)
+        return np.full((len(windows), 1), 0.5)
+
+
+def test_tail_matrix_right_aligns_the_latest_valid_closes():
+    closes = closes_with_gaps()
+    tail = tail_matrix(closes)
+    for i, symbol in enumerate(closes.columns):
+        expected = closes[symbol].dropna().to_numpy()[-HISTORY_LENGTH:]
+        np.testing.assert_array_equal(tail[i, -len(expected):], expected)
+    assert np.isnan(tail[2, :-10]).all()
+
+
+def test_rf_features_match_the_per_symbol_rolling_means():
+    closes = closes_with_gaps()
+    features = rf_features(tail_matrix(closes))
+    for i, symbol in enumerate(["AAA", "BBB"]):
+        close = closes[symbol].dropna()
+        expected = [close.pct_change().iloc[-1], close.rolling(7).mean().iloc[-1], close.rolling(21).mean().iloc[-1]]
+        np.testing.assert_allclose(features[i], expected)
+
+
+def test_one_predict_call_per_model_for_the_whole_portfolio():
+    rf, lstm = StubForest(), StubLSTM()
+    scores = predict_batch(closes_with_gaps(), rf, lstm, WindowScaler("global", 1.0))
+
+    assert list(scores.index) == ["AAA", "BBB"]  # NEW lacks the history
+    assert len(rf.batches) == len(lstm.batches) == 1
+    assert lstm.batches[0].shape == (2, LSTM_WINDOW, 1)
+    assert scores["p_hold"].tolist() == [0, 0]
+    assert scores["up_score"].tolist() == pytest.approx([0.5 * 0.5 + 0.5 * 0.75] * 2)
+
+
+@pytest.mark.parametrize("score, action", [
+    (0.8, "Strong Buy"), (0.6, "Buy"), (0.5, "Hold"), (0.4, "Sell"), (0.2, "Strong Sell"),
+])
+def test_score_to_action(score, action):
+    assert inference.score_to_action(score) == action
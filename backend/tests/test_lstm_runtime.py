@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from ml.lstm_runtime import NumpyLSTM, export_lstm
+
+tf = pytest.importorskip("tensorflow")
+
+
+@pytest.fixture(scope="module")
+def keras_model():
+    from ml.train_lstm import fit_lstm
+    rng = np.random.default_rng(0)
+    X = rng.random((64, 30, 1)).astype(np.float32)
+    y = (rng.random(64) > 0.5).astype(np.float32)
+    tf.keras.utils.set_random_seed(0)
+    return fit_lstm(X, y, epochs=1, verbose=0)
+
+
+@pytest.fixture(scope="module")
+def numpy_model(keras_model, tmp_path_factory):
+    path = tmp_path_factory.mktemp("lstm") / "lstm_model.npz"
+    export_lstm(keras_model, path)
+    return NumpyLSTM.load(path)
+
+
+def test_predictions_match_keras(keras_model, numpy_model):
+    rng = np.random.default_rng(1)
+    for batch in (1, 7, 128):
+        windows = rng.random((batch, 30, 1)).astype(np.float32)
+        expected = keras_model.predict(windows, verbose=0)
+        np.testing.assert_allclose(numpy_model.predict(windows), expected, atol=1e-5)
+
+
+def test_saturated_inputs_match_keras(keras_model, numpy_model):
+    # Large scaled values push the gates into saturation
+    windows = np.linspace(-20, 20, 30 * 4, dtype=np.float32).reshape(4, 30, 1)
+    np.testing.assert_allclose(numpy_model.predict(windows), keras_model.predict(windows, verbose=0), atol=1e-5)
+
+
+def test_exposes_the_keras_model_surface(keras_model, numpy_model):
+    assert numpy_model.input_shape == tuple(keras_model.input_shape)
+    assert numpy_model.count_params() == keras_model.count_params()
+    assert numpy_model.predict(np.zeros((3, 30, 1))).shape == (3, 1)
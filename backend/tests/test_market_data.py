@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+yf = pytest.importorskip("yfinance")
+from services import market_data
+
+FIELDS = ["Close", "High", "Low", "Open", "Volume"]
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """Replace yf.download with a stub that records each call"""
+    calls = []
+
+    def download(symbols, **kwargs):
+        calls.append(list(symbols))
+        dates = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=10)
+        # Upstream knows every symbol except ones starting with "NONE"
+        known = [s for s in symbols if not s.startswith("NONE")]
+        columns = pd.MultiIndex.from_product([FIELDS, known])
+        values = np.arange(len(dates) * len(columns), dtype=float).reshape(len(dates), -1) + 1
+        return pd.DataFrame(values, index=dates, columns=columns)
+
+    monkeypatch.setattr(yf, "download", download)
+    return calls
+
+
+def test_unique_symbols_keeps_order_and_drops_blanks():
+    assert market_data.unique_symbols(["MSFT", " ", "AAPL", "MSFT", "GOOG"]) == ["MSFT", "AAPL", "GOOG"]
+
+
+def test_history_for_many_symbols_is_one_download(downloads):
+    df = market_data.fetch_history(["BAT1", "BAT2", "BAT3", "BAT1"])
+    assert downloads == [["BAT1", "BAT2", "BAT3"]]
+    assert set(df["Close"].columns) == {"BAT1", "BAT2", "BAT3"}
+
+
+def test_close_matrix_has_a_column_for_every_symbol(downloads):
+    closes = market_data.fetch_close_matrix(["MAT1", "NONE1", "MAT2"])
+    assert list(closes.columns) == ["MAT1", "NONE1", "MAT2"]
+    assert closes["NONE1"].isna().all()
+    assert closes["MAT1"].notna().all()
+
+
+def test_info_failures_come_back_per_symbol(monkeypatch):
+    class Ticker:
+        def __init__(self, symbol):
+            self.symbol = symbol
+
+        @property
+        def info(self):
+            if self.symbol == "BAD":
+                raise RuntimeError("not found")
+            return {"shortName": self.symbol}
+
+    monkeypatch.setattr(yf, "Ticker", Ticker)
+    info = market_data.fetch_info(["GOOD", "BAD"])
+    assert info["GOOD"] == {"shortName": "GOOD"}
+    assert isinstance(info["BAD"], RuntimeError)
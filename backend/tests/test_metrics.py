@@ -0,0 +1,107 @@
+import threading
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from services import metrics as metrics_module
+from services.metrics import Histogram, MetricsMiddleware, metrics, span, traced
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/slow")
+    def slow():
+        time.sleep(0.05)
+        return {}
+
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+
+def _sample(name, **labels):
+    """Value of one rendered series, or None"""
+    wanted = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    for line in metrics.render().splitlines():
+        if line.startswith(f"{name}{{{wanted}}} "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("demo_seconds", "demo", ("op",), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value, "x")
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{op="x",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{op="x",le="1"} 3' in lines
+    assert 'demo_seconds_bucket{op="x",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{op="x"} 4' in lines
+
+
+def test_requests_are_labelled_by_route_template():
+    client = TestClient(_app())
+    before = _sample("http_request_duration_seconds_count", method="GET", route="/items/{item_id}", status=200) or 0
+    for i in range(3):
+        client.get(f"/items/{i}")
+    client.get("/no/such/path")
+
+    assert _sample("http_request_duration_seconds_count", method="GET", route="/items/{item_id}", status=200) == before + 3
+    assert _sample("http_request_duration_seconds_count", method="GET", route="unmatched", status=404) >= 1
+    assert "/items/1" not in metrics.render()
+
+
+def test_spans_count_errors():
+    @traced("test", "boom")
+    def boom():
+        raise RuntimeError("upstream down")
+
+    with span("test", "ok"):
+        pass
+    with pytest.raises(RuntimeError):
+        boom()
+
+    assert _sample("span_duration_seconds_count", service="test", operation="ok") >= 1
+    assert _sample("span_errors_total", service="test", operation="boom") >= 1
+    assert _sample("span_errors_total", service="test", operation="ok") is None
+
+
+def test_gauge_collectors_are_read_at_scrape_time():
+    value = {"n": 1}
+    metrics.register_gauges("test_queue_depth", "Test gauge", ("queue",), lambda: {("q",): value["n"]})
+    assert _sample("test_queue_depth", queue="q") == 1
+    value["n"] = 7
+    assert _sample("test_queue_depth", queue="q") == 7
+
+
+def test_slow_requests_dump_folded_stacks(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics_module, "PROFILE_SLOW_MS", 20)
+    monkeypatch.setattr(metrics_module, "PROFILE_DIR", str(tmp_path))
+    client = TestClient(_app())
+    client.get("/items/1")
+    client.get("/slow")
+
+    profiles = list(tmp_path.iterdir())
+    assert [p.name.split("_", 1)[1] for p in profiles] == ["GET_slow.folded"]
+    lines = profiles[0].read_text().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("slow (test_metrics.py" in line for line in lines)
+
+
+def test_profiles_are_written_off_the_event_loop(monkeypatch):
+    threads = []
+    monkeypatch.setattr(metrics_module, "PROFILE_SLOW_MS", 20)
+    monkeypatch.setattr(metrics_module, "dump_profile", lambda *args: threads.append(threading.current_thread()))
+    client = TestClient(_app())
+
+    @client.app.get("/slow_async")
+    async def slow_async():
+        time.sleep(0.05)
+        return {"loop": threading.current_thread().name}
+
+    loop_thread = client.get("/slow_async").json()["loop"]
+    assert len(threads) == 1 and threads[0].name != loop_thread
@@ -0,0 +1,43 @@
+import json
+import os
+import pytest
+from ml.model_registry import ModelRegistry, MODEL_FILES, CURRENT_FILE
+from ml.train import promote_version
+
+
+def write_version(model_dir, version, manifest=True):
+    directory = os.path.join(model_dir, "versions", version)
+    os.makedirs(directory)
+    for name in MODEL_FILES.values():
+        with open(os.path.join(directory, name), "w") as f:
+            f.write(version)
+    if manifest:
+        with open(os.path.join(directory, "manifest.json"), "w") as f:
+            json.dump({"version": version}, f)
+    return directory
+
+
+def test_promotion_moves_the_current_pointer(tmp_path):
+    model_dir = str(tmp_path)
+    registry = ModelRegistry(model_dir=model_dir)
+    assert registry._active_dir() == model_dir  # nothing promoted yet: flat files
+
+    first = write_version(model_dir, "v1")
+    promote_version(first, model_dir)
+    assert registry._active_dir() == first
+    # Every artifact of one load resolves inside the promoted version
+    assert {os.path.dirname(registry._path(name)) for name in MODEL_FILES} == {first}
+
+    second = write_version(model_dir, "v2")
+    promote_version(second, model_dir)
+    assert registry._active_dir() == second
+    promote_version(first, model_dir)  # rollback
+    with open(os.path.join(model_dir, CURRENT_FILE)) as f:
+        assert f.read().strip() == "v1"
+
+
+def test_incomplete_versions_cannot_be_promoted(tmp_path):
+    partial = write_version(str(tmp_path), "v1", manifest=False)
+    with pytest.raises(ValueError):
+        promote_version(partial, str(tmp_path))
+    assert not os.path.exists(os.path.join(tmp_path, CURRENT_FILE))
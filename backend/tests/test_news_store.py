@@ -0,0 +1,175 @@
+import asyncio
+from collections import Counter
+import pytest
+from services.news_store import NewsStore, HEADLINES
+
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN"]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubNewsAPI:
+    """Async stand-in for fetch_newsapi; counts calls per feed"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.fail = False
+
+    async def __call__(self, feed):
+        self.calls[feed] += 1
+        await asyncio.sleep(0.001)
+        if self.fail:
+            raise RuntimeError("NewsAPI down")
+        version = self.calls[feed]
+        return [
+            {"url": f"https://news.example/{feed}/{version}", "title": f"{feed} update {version}",
+             "publishedAt": f"2024-01-01T00:{version:02d}:00Z"},
+            # Wire stories show up under several feeds
+            {"url": "https://news.example/markets", "title": "Markets wrap", "publishedAt": "2024-01-01T00:00:00Z"},
+            {"url": f"https://news.example/{feed}/removed", "title": "[Removed]"},
+        ]
+
+
+def make_store(**kwargs):
+    clock = FakeClock()
+    api = StubNewsAPI()
+    store = NewsStore(fetch=api, ttl=300, max_stale=3600, watch_window=3600, clock=clock, **kwargs)
+    return store, api, clock
+
+
+async def settle(store):
+    # Let background revalidations finish
+    await asyncio.sleep(0)
+    while store._background:
+        await asyncio.gather(*store._background)
+
+
+def simulate(users, minutes=30):
+    """Every user loads the dashboard (headlines + one symbol) once a minute"""
+    store, api, clock = make_store()
+
+    async def run():
+        store._event_loop = asyncio.get_running_loop()
+        for minute in range(minutes):
+            clock.now = minute * 60.0
+            if minute % 5 == 0:
+                await store.refresh_due()
+            await asyncio.gather(*(
+                call for user in range(users)
+                for call in (store.headlines(12), store.aget(store.feed_key(SYMBOLS[user % len(SYMBOLS)])))
+            ))
+            await settle(store)
+
+    asyncio.run(run())
+    return store, api
+
+
+def test_upstream_calls_do_not_grow_with_users():
+    few, few_api = simulate(users=10)
+    many, many_api = simulate(users=1000)
+    assert many_api.calls == few_api.calls
+    # Six feeds refreshed about once per TTL over 30 minutes, never once per user
+    assert sum(many_api.calls.values()) <= 6 * (30 * 60 // 300 + 1)
+    # Only the first minute's requests waited on NewsAPI
+    assert many.counts["hits"] + many.counts["stale_hits"] == 1000 * 2 * 29
+
+
+def test_articles_are_deduplicated_and_newest_first():
+    store, api, clock = make_store()
+
+    async def run():
+        await store.aget("AAPL")
+        await store.aget("MSFT")
+        clock.now = 301
+        await store.refresh_due()
+        return await store.aget("AAPL")
+
+    articles = asyncio.run(run())
+    assert [a["url"] for a in articles] == [
+        "https://news.example/AAPL/2", "https://news.example/AAPL/1", "https://news.example/markets",
+    ]
+    assert store.articles["https://news.example/markets"]["feeds"] == {"AAPL", "MSFT"}
+    assert not any(a["title"] == "[Removed]" for a in store.articles.values())
+
+
+def test_concurrent_cold_misses_share_one_call():
+    store, api, clock = make_store()
+
+    async def run():
+        return await asyncio.gather(*(store.aget("AAPL") for _ in range(100)))
+
+    results = asyncio.run(run())
+    assert api.calls["AAPL"] == 1
+    assert all(r == results[0] for r in results)
+
+
+def test_stale_feed_is_served_while_one_refresh_runs():
+    store, api, clock = make_store()
+
+    async def run():
+        store._event_loop = asyncio.get_running_loop()
+        first = await store.aget("AAPL")
+        clock.now = 400
+        stale = [store.peek("AAPL") for _ in range(50)]
+        await settle(store)
+        return first, stale, store.peek("AAPL")
+
+    first, stale, fresh = asyncio.run(run())
+    assert all(s == first for s in stale)
+    assert api.calls["AAPL"] == 2
+    assert fresh[0]["url"] == "https://news.example/AAPL/2"
+    assert store.counts["stale_hits"] == 50
+
+
+def test_failed_refresh_keeps_serving_what_we_have():
+    store, api, clock = make_store()
+
+    async def run():
+        await store.aget("AAPL")
+        api.fail = True
+        clock.now = 4000  # past max_stale, so this is a miss
+        kept = await store.aget("AAPL")
+        with pytest.raises(RuntimeError):
+            await store.aget("MSFT")
+        return kept
+
+    kept = asyncio.run(run())
+    assert kept[0]["url"] == "https://news.example/AAPL/1"
+    assert store.counts["upstream_errors"] == 2
+
+
+def test_unwatched_feeds_are_dropped():
+    store, api, clock = make_store()
+
+    async def run():
+        await store.aget("AAPL")
+        await store.aget("MSFT")
+        clock.now = 3000
+        store.peek("MSFT")
+        clock.now = 3700
+        await store.refresh_due()
+
+    asyncio.run(run())
+    assert set(store.feeds) == {"MSFT"}
+    assert not any("AAPL" in url for url in store.articles)
+    assert api.calls["AAPL"] == 1
+
+
+def test_blocking_get_refuses_to_run_on_the_event_loop():
+    store, api, clock = make_store()
+
+    async def run():
+        store._event_loop = asyncio.get_running_loop()
+        with pytest.raises(RuntimeError):
+            store.get(HEADLINES)
+
+    asyncio.run(run())
+    idle, _, _ = make_store()
+    with pytest.raises(RuntimeError):
+        idle.get(HEADLINES)  # not started
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pydantic import ValidationError
+from ml.backtest import synthetic_closes
+from models import OptimizeRequest
+from services import optimizer
+from services.market_data import MarketDataUnavailable
+from services.optimizer import CovarianceCache, mean_variance_weights, risk_parity_weights
+
+
+def _covariance(n=8, days=120, seed=0):
+    rng = np.random.default_rng(seed)
+    returns = 0.01 * rng.standard_normal((days, n)) @ rng.uniform(0.5, 1.5, (n, n)) / n
+    return returns.mean(axis=0), np.cov(returns, rowvar=False)
+
+
+def test_mean_variance_matches_slsqp():
+    minimize = pytest.importorskip("scipy.optimize").minimize
+    mu, cov = _covariance()
+    mu, cov = mu * 252, cov * 252
+    weights = mean_variance_weights(mu, cov, risk_aversion=5.0, max_weight=0.3)
+
+    def objective(w):
+        return 2.5 * w @ cov @ w - mu @ w
+
+    reference = minimize(objective, np.full(len(mu), 1 / len(mu)), method="SLSQP",
+                         bounds=[(0, 0.3)] * len(mu),
+                         constraints=[{"type": "eq", "fun": lambda w: w.sum() - 1}], options={"ftol": 1e-15})
+    assert weights.sum() == pytest.approx(1)
+    assert weights.min() >= 0 and weights.max() <= 0.3 + 1e-12
+    assert objective(weights) == pytest.approx(objective(reference.x), abs=1e-10)
+
+
+def test_risk_parity_equalizes_risk_contributions():
+    _, cov = _covariance()
+    weights = risk_parity_weights(cov)
+    contributions = weights * (cov @ weights) / (weights @ cov @ weights)
+    np.testing.assert_allclose(contributions, 1 / len(weights), atol=1e-8)
+
+
+def test_incremental_moments_match_a_full_recompute():
+    rng = np.random.default_rng(1)
+    returns = 0.01 * rng.standard_normal((300, 5))
+    dates = pd.bdate_range("2020-01-01", periods=300).values.astype("datetime64[D]")
+    cache = CovarianceCache(refresh_every=100)
+    for end in range(260, 300, 7):
+        n, total, cross = cache.moments(["A"], dates[:end], returns[:end], 252)
+        window = returns[end - 252:end]
+        assert n == 252
+        np.testing.assert_allclose(total, window.sum(axis=0), atol=1e-14)
+        np.testing.assert_allclose(cross, window.T @ window, atol=1e-14)
+    cache.moments(["A"], dates[:295], returns[:295], 252)
+    assert cache.counts == {"hits": 1, "incremental": 5, "full": 1}
+
+
+@pytest.fixture
+def closes(monkeypatch):
+    closes = synthetic_closes(n_symbols=6, n_days=400, seed=5)
+    closes.iloc[:, 5] = np.nan
+    closes.iloc[-30:, 5] = 50.0  # listed a month ago: not enough history
+    monkeypatch.setattr(optimizer, "fetch_close_matrix", lambda symbols, period: closes[symbols])
+    monkeypatch.setattr(optimizer, "covariance_cache", CovarianceCache())
+    return closes
+
+
+def test_trades_move_the_portfolio_to_the_target(closes):
+    symbols = list(closes.columns)
+    stocks = [{"symbol": s.lower(), "quantity": 10} for s in symbols[:3]]
+    result = optimizer.optimize_portfolio(stocks, candidates=symbols[3:], max_weight=0.4, min_trade_pct=0)
+
+    assert result["excluded"] == [symbols[5]]
+    weights = {w["symbol"]: w for w in result["weights"]}
+    assert sum(w["target_weight"] for w in weights.values()) == pytest.approx(1, abs=1e-3)
+    assert max(w["target_weight"] for w in weights.values()) <= 0.4
+    for trade in result["trades"]:
+        signed = trade["value"] if trade["action"] == "BUY" else -trade["value"]
+        target = weights[trade["symbol"]]["target_weight"] * result["portfolio_value"]
+        current = weights[trade["symbol"]]["current_weight"] * result["portfolio_value"]
+        assert abs(current + signed - target) <= trade["price"]
+
+
+def test_missing_prices_and_bad_universes_raise(monkeypatch, closes):
+    with pytest.raises(ValueError):
+        optimizer.optimize_portfolio([{"symbol": closes.columns[0], "quantity": 1}])
+    monkeypatch.setattr(optimizer, "fetch_close_matrix", lambda symbols, period: pd.DataFrame())
+    with pytest.raises(MarketDataUnavailable):
+        optimizer.optimize_portfolio([{"symbol": "AAPL", "quantity": 1}, {"symbol": "MSFT", "quantity": 1}])
+
+
+@pytest.mark.parametrize("candidates", [["../etc"], ["AAPL"] * 201])
+def test_candidates_are_validated(candidates):
+    with pytest.raises(ValidationError):
+        OptimizeRequest(candidates=candidates)
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import bcrypt
+import pytest
+from services.passwords import PasswordHasher, PasswordHasherBusy, hash_rounds
+
+
+def test_hash_and_verify_round_trip():
+    hasher = PasswordHasher(workers=1, max_queue=0, rounds=4)
+
+    async def run():
+        hashed = await hasher.hash("s3cret")
+        return hashed, await hasher.verify("s3cret", hashed), await hasher.verify("wrong", hashed)
+
+    hashed, good, bad = asyncio.run(run())
+    assert hash_rounds(hashed) == 4
+    assert good and not bad
+    assert hasher.stats()["completed"] == 3
+
+
+def test_saturated_pool_sheds_instead_of_queueing():
+    hasher = PasswordHasher(workers=1, max_queue=1, rounds=4)
+    release = threading.Event()
+
+    def blocked(*_):
+        release.wait(5)
+        return True
+
+    async def run():
+        running = [asyncio.create_task(hasher._run(blocked)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.verify("s3cret", b"")
+        release.set()
+        return await asyncio.gather(*running)
+
+    assert asyncio.run(run()) == [True, True]
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.in_flight == 0
+
+
+def test_only_weaker_hashes_need_a_rehash():
+    hasher = PasswordHasher(rounds=12)
+    assert hasher.needs_rehash(bcrypt.hashpw(b"pw", bcrypt.gensalt(4)))
+    assert not hasher.needs_rehash(b"$2b$12$" + b"x" * 53)
+    assert not hasher.needs_rehash(b"not a bcrypt hash")
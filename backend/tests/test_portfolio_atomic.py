@@ -0,0 +1,127 @@
+import threading
+import pytest
+from models import PortfolioEntry, PortfolioBulkRequest
+
+mongomock = pytest.importorskip("mongomock")
+portfolio = pytest.importorskip("routes.portfolio")
+
+USER = {"user_id": "alice"}
+
+
+def _atomic(method, lock):
+    def call(*args, **kwargs):
+        with lock:
+            return method(*args, **kwargs)
+    return call
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = mongomock.MongoClient().db.portfolios
+    # MongoDB applies each single-document write atomically; mongomock doesn't
+    lock = threading.Lock()
+    for name in ("update_one", "find_one_and_update"):
+        monkeypatch.setattr(collection, name, _atomic(getattr(collection, name), lock))
+    monkeypatch.setattr(portfolio, "portfolio_collection", collection)
+    monkeypatch.setattr(portfolio.holdings_index, "update_user", lambda user_id, stocks: None)
+    return collection
+
+
+def entry(symbol, quantity=1):
+    return PortfolioEntry(symbol=symbol, quantity=quantity, buy_price=100.0, buy_date="2024-01-02")
+
+
+def stocks(collection, user_id="alice"):
+    return collection.find_one({"user_id": user_id})["stocks"]
+
+
+def test_concurrent_adds_lose_no_writes(collection):
+    threads_n, per_thread = 8, 25
+    barrier = threading.Barrier(threads_n)
+
+    def add(worker):
+        barrier.wait()
+        for i in range(per_thread):
+            portfolio.add_to_portfolio(entry(f"S{worker}X{i}"), user=USER)
+
+    threads = [threading.Thread(target=add, args=(w,)) for w in range(threads_n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    held = [s["symbol"] for s in stocks(collection)]
+    assert len(held) == threads_n * per_thread
+    assert len(set(held)) == len(held)
+    assert collection.count_documents({"user_id": "alice"}) == 1
+
+
+def test_concurrent_adds_and_deletes_keep_unrelated_lots(collection):
+    for symbol in ("KEEP", "DROP"):
+        portfolio.add_to_portfolio(entry(symbol), user=USER)
+
+    def add():
+        for i in range(50):
+            portfolio.add_to_portfolio(entry(f"NEW{i}"), user=USER)
+
+    adder = threading.Thread(target=add)
+    adder.start()
+    portfolio.delete_stock("drop", user=USER)
+    adder.join()
+
+    held = [s["symbol"] for s in stocks(collection)]
+    assert "DROP" not in held
+    assert held.count("KEEP") == 1
+    assert len(held) == 51
+
+
+def test_add_stores_the_date_as_a_string(collection):
+    portfolio.add_to_portfolio(entry("AAPL"), user=USER)
+    assert stocks(collection) == [{"symbol": "AAPL", "quantity": 1, "buy_price": 100.0, "buy_date": "2024-01-02"}]
+
+
+def test_delete_without_portfolio_is_404(collection):
+    with pytest.raises(portfolio.HTTPException) as error:
+        portfolio.delete_stock("AAPL", user=USER)
+    assert error.value.status_code == 404
+
+
+def test_bulk_counts_every_removed_lot(collection, monkeypatch):
+    indexed = {}
+    monkeypatch.setattr(portfolio.holdings_index, "update_user",
+                        lambda user_id, stocks: indexed.update({user_id: [s["symbol"] for s in stocks]}))
+    for symbol in ("AAPL", "aapl", "MSFT", "TSLA"):
+        portfolio.add_to_portfolio(entry(symbol), user=USER)
+
+    result = portfolio.bulk_update_portfolio(
+        PortfolioBulkRequest(add=[entry("NVDA")], remove=["AAPL", "TSLA", "GOOG"]), user=USER)
+
+    assert result == {"msg": "Portfolio updated", "added": 1, "removed": 3}
+    assert [s["symbol"] for s in stocks(collection)] == ["MSFT", "NVDA"]
+    assert indexed == {"alice": ["MSFT", "NVDA"]}
+
+
+def test_bulk_remove_without_portfolio_creates_nothing(collection):
+    result = portfolio.bulk_update_portfolio(PortfolioBulkRequest(remove=["AAPL"]), user=USER)
+    assert result["removed"] == 0
+    assert collection.count_documents({}) == 0
+
+
+def test_concurrent_bulk_updates_and_adds_lose_no_writes(collection):
+    portfolio.add_to_portfolio(entry("OLD"), user=USER)
+
+    def add():
+        for i in range(50):
+            portfolio.add_to_portfolio(entry(f"NEW{i}"), user=USER)
+
+    adder = threading.Thread(target=add)
+    adder.start()
+    removed = sum(
+        portfolio.bulk_update_portfolio(
+            PortfolioBulkRequest(add=[entry(f"BULK{i}")], remove=["OLD"]), user=USER)["removed"]
+        for i in range(20))
+    adder.join()
+
+    held = [s["symbol"] for s in stocks(collection)]
+    assert removed == 1 and "OLD" not in held
+    assert len(held) == 70
@@ -0,0 +1,76 @@
+from datetime import datetime, date
+import pandas as pd
+import pytest
+from services import price_cache as pc
+from services.price_cache import PriceCache, MARKET_TZ
+
+
+def at(*args):
+    return datetime(*args, tzinfo=MARKET_TZ)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PriceCache(path=str(tmp_path / "cache.sqlite"), maxsize=2)
+
+
+def bars(days):
+    index = pd.to_datetime(days)
+    return pd.DataFrame({field: [1.0] * len(days) for field in pc.BAR_FIELDS}, index=index)
+
+
+def test_market_hours():
+    assert pc.market_is_open(at(2024, 3, 5, 10, 0))      # Tuesday morning
+    assert not pc.market_is_open(at(2024, 3, 5, 16, 0))  # at the close
+    assert not pc.market_is_open(at(2024, 3, 9, 12, 0))  # Saturday
+    # Monday before the open: the last close was Friday's
+    assert pc.last_session_close(at(2024, 3, 11, 8, 0)) == at(2024, 3, 8, 16, 0)
+
+
+def test_memory_entries_expire_and_evict(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(pc.time, "monotonic", lambda: now[0])
+    cache.set("a", 1, ttl=10)
+    assert cache.get("a") == 1
+    now[0] += 11
+    assert cache.get("a") is None
+
+    for key in ("b", "c", "d"):
+        cache.set(key, key, ttl=60)
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert stats["memory_expired"] == 1
+    assert stats["memory_evictions"] == 1
+    assert stats["memory_size"] == 2
+
+
+def test_bars_of_closed_sessions_stay_fresh(cache):
+    synced = at(2024, 3, 8, 18, 0)  # Friday evening
+    cache.put_bars("AAPL", "1d", bars(["2024-03-06", "2024-03-07", "2024-03-08"]),
+                   covered_from=date(2024, 3, 6), now=synced)
+
+    # Over the weekend the stored bars are served as they are
+    weekend = at(2024, 3, 10, 12, 0)
+    df = cache.get_bars("AAPL", "1d", date(2024, 3, 7), now=weekend)
+    assert list(df.index) == list(pd.to_datetime(["2024-03-07", "2024-03-08"]))
+    # ...but not for a range before what was downloaded
+    assert cache.get_bars("AAPL", "1d", date(2024, 3, 1), now=weekend) is None
+    # ...and not once Monday's session has closed
+    assert cache.get_bars("AAPL", "1d", date(2024, 3, 7), now=at(2024, 3, 11, 17, 0)) is None
+
+
+def test_bars_refresh_while_the_market_is_open(cache):
+    synced = at(2024, 3, 5, 10, 0)
+    cache.put_bars("AAPL", "5m", bars(["2024-03-05 09:30", "2024-03-05 09:35"]),
+                   covered_from=date(2024, 3, 5), now=synced)
+    assert cache.bars_fresh("AAPL", "5m", date(2024, 3, 5), now=at(2024, 3, 5, 10, 0, 30))
+    assert not cache.bars_fresh("AAPL", "5m", date(2024, 3, 5), now=at(2024, 3, 5, 10, 5))
+
+
+def test_overlapping_downloads_extend_the_covered_range(cache):
+    cache.put_bars("MSFT", "1d", bars(["2024-03-04", "2024-03-05"]),
+                   covered_from=date(2024, 3, 4), now=at(2024, 3, 5, 17, 0))
+    cache.put_bars("MSFT", "1d", bars(["2024-03-05", "2024-03-06"]),
+                   covered_from=date(2024, 3, 5), now=at(2024, 3, 6, 17, 0))
+    df = cache.get_bars("MSFT", "1d", date(2024, 3, 4), now=at(2024, 3, 6, 18, 0))
+    assert len(df) == 3
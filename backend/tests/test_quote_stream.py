@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from services import quote_stream
+from services.quote_stream import QuoteHub, symbol_list
+
+
+def run_hub(body):
+    """Run body(hub) on an event loop with a hub whose poller never fetches"""
+    async def main():
+        hub = QuoteHub(fetch=lambda symbols: {})
+        try:
+            return await body(hub)
+        finally:
+            for sub in list(hub.subscriptions):
+                hub.unsubscribe(sub)
+            await asyncio.sleep(0)
+
+    return asyncio.run(main())
+
+
+def test_only_changed_prices_reach_their_subscribers():
+    async def body(hub):
+        apple, tesla = hub.subscribe(["aapl"]), hub.subscribe(["TSLA"])
+        hub.publish({"AAPL": 100.0, "TSLA": 200.0})
+        sent = hub.publish({"AAPL": 100.0, "TSLA": 201.0})
+        return sent, await apple.next_batch(0.1), await tesla.next_batch(0.1)
+
+    sent, apple, tesla = run_hub(body)
+    assert [u["symbol"] for u in sent] == ["TSLA"]
+    assert [u["price"] for u in apple] == [100.0]
+    assert [(u["price"], u["change"]) for u in tesla] == [(201.0, 1.0)]
+
+
+def test_a_slow_reader_holds_one_update_per_symbol():
+    async def body(hub):
+        sub = hub.subscribe(["AAPL", "MSFT"])
+        for tick in range(50):
+            hub.publish({"AAPL": 100.0 + tick, "MSFT": 300.0 + tick})
+        return await sub.next_batch(0.1)
+
+    batch = run_hub(body)
+    assert sorted((u["symbol"], u["price"]) for u in batch) == [("AAPL", 149.0), ("MSFT", 349.0)]
+
+
+def test_stalled_subscribers_are_dropped(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(quote_stream.time, "monotonic", lambda: now[0])
+
+    async def body(hub):
+        stalled = hub.subscribe(["AAPL"])
+        hub.publish({"AAPL": 1.0})
+        now[0] += quote_stream.SLOW_CLIENT_TIMEOUT + 1
+        hub.publish({"AAPL": 2.0})
+        return stalled
+
+    stalled = run_hub(body)
+    assert stalled.closed
+
+
+def test_subscription_messages_must_be_symbol_lists():
+    assert symbol_list(["AAPL", "BRK-B"]) == ["AAPL", "BRK-B"]
+    for bad in ("AAPL", [1, 2], ["../etc"]):
+        with pytest.raises(ValueError):
+            symbol_list(bad)
@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+import pytest
+from services.rate_limiter import TokenBucket, RateLimiter, SingleFlight, INTERACTIVE, BACKGROUND
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        # Simulated time: waiting just moves the clock forward
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+def test_bucket_refills_at_rate_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=0.5, capacity=2, clock=clock)
+    bucket.take()
+    bucket.take()
+    assert bucket.wait_time() == pytest.approx(2.0)
+    clock.now = 1.0
+    assert bucket.wait_time() == pytest.approx(1.0)
+    clock.now = 100.0
+    assert bucket.wait_time() == 0
+    assert bucket.tokens == 2
+
+
+def test_calls_are_spaced_by_the_per_minute_quota():
+    clock = FakeClock()
+    limiter = RateLimiter([TokenBucket(4 / 60, 1, clock), TokenBucket(25 / 86400, 25, clock)], clock)
+
+    async def run():
+        times = []
+        for _ in range(5):
+            await limiter.acquire_async(sleep=clock.sleep)
+            times.append(clock.now)
+        return times
+
+    times = asyncio.run(run())
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert times[0] == 0
+    assert gaps == pytest.approx([15.0] * 4)
+
+
+def test_daily_quota_is_enforced():
+    clock = FakeClock()
+    limiter = RateLimiter([TokenBucket(1, 1, clock), TokenBucket(3 / 86400, 3, clock)], clock)
+
+    async def run():
+        for _ in range(4):
+            await limiter.acquire_async(sleep=clock.sleep)
+
+    asyncio.run(run())
+    # The fourth call waits for a daily token, not the one-second spacing
+    assert clock.now == pytest.approx(86400 / 3, rel=1e-3)
+
+
+def test_interactive_requests_overtake_queued_background_work():
+    clock = FakeClock()
+    limiter = RateLimiter([TokenBucket(1, 1, clock)], clock)
+    limiter.buckets[0].take()
+    order = []
+
+    async def call(name, priority):
+        await limiter.acquire_async(priority, sleep=sleep)
+        order.append(name)
+
+    async def sleep(seconds):
+        # Hold every waiter until the interactive request has queued
+        await released.wait()
+        await clock.sleep(seconds)
+
+    async def run():
+        nonlocal released
+        released = asyncio.Event()
+        background = [asyncio.create_task(call(f"bg{i}", BACKGROUND)) for i in range(3)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call("interactive", INTERACTIVE))
+        await asyncio.sleep(0)
+        assert limiter.queue_depth() == 4
+        released.set()
+        await asyncio.gather(interactive, *background)
+
+    released = None
+    asyncio.run(run())
+    assert order == ["interactive", "bg0", "bg1", "bg2"]
+    assert limiter.queue_depth() == 0
+
+
+def test_acquire_times_out_and_leaves_the_queue():
+    clock = FakeClock()
+    limiter = RateLimiter([TokenBucket(1 / 60, 1, clock)], clock)
+    assert limiter.acquire(timeout=0.1)
+    # The condition wait is real time, so advance the fake clock past the deadline
+    timer = threading.Timer(0.05, lambda: setattr(clock, "now", 5.0))
+    timer.start()
+    assert not limiter.acquire(timeout=0.1)
+    timer.join()
+    assert limiter.queue_depth() == 0
+
+
+def test_cancelled_waiter_releases_its_place():
+    clock = FakeClock()
+    limiter = RateLimiter([TokenBucket(1, 1, clock)], clock)
+    limiter.buckets[0].take()
+
+    async def never(_):
+        await asyncio.Event().wait()
+
+    async def run():
+        task = asyncio.create_task(limiter.acquire_async(sleep=never))
+        await asyncio.sleep(0)
+        assert limiter.queue_depth() == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert limiter.queue_depth() == 0
+
+
+def test_single_flight_shares_one_call_between_threads():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "quote"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("AAPL", fetch))) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    while not calls:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["quote"] * 20
+
+
+def test_single_flight_propagates_errors_and_forgets_the_key():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        flight.do("AAPL", fail)
+    assert flight.do("AAPL", lambda: 1) == 1
+
+
+def test_single_flight_async_coalesces_and_survives_cancelled_waiters():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [1, 2, 3]
+
+    async def run():
+        waiters = [asyncio.create_task(flight.do_async("news", fetch)) for _ in range(10)]
+        await asyncio.sleep(0)
+        waiters[0].cancel()
+        results = await asyncio.gather(*waiters[1:])
+        return results, flight._async_calls
+
+    results, pending = asyncio.run(run())
+    assert len(calls) == 1
+    assert results == [[1, 2, 3]] * 9
+    assert pending == {}
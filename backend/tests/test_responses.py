@@ -0,0 +1,55 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from responses import dumps
+from routes import stock
+
+
+def test_numpy_and_pandas_values_serialize_like_plain_json():
+    payload = {
+        "trend": np.array([1.5, np.nan, 3.0]),
+        "count": np.int64(3),
+        "score": np.float32(0.5),
+        "when": pd.Timestamp("2024-01-02"),
+        "tags": {"a"},
+        "series": pd.Series([1, 2]),
+    }
+    assert json.loads(dumps(payload)) == {
+        "trend": [1.5, None, 3.0],
+        "count": 3,
+        "score": 0.5,
+        "when": "2024-01-02T00:00:00",
+        "tags": ["a"],
+        "series": [1, 2],
+    }
+
+
+@pytest.fixture
+def client(monkeypatch):
+    dates = pd.bdate_range("2024-01-01", periods=3)
+    closes = pd.DataFrame({"AAA": [1.0, 2.0, 3.0], "BBB": [np.nan, 5.0, 6.0]}, index=dates)
+    info = {s: {"shortName": f"{s} Inc", "currentPrice": 1} for s in closes.columns}
+    monkeypatch.setattr(stock, "fetch_info_and_closes", lambda symbols, period: (info, closes[symbols]))
+    app = FastAPI()
+    app.include_router(stock.router)
+    return TestClient(app)
+
+
+def test_rows_layout_keeps_each_symbols_own_dates(client):
+    data = client.get("/stocks/data", params={"symbols": "AAA,BBB"}).json()["data"]
+    assert data[1]["trend"] == [5.0, 6.0]
+    assert data[1]["dates"] == ["2024-01-02", "2024-01-03"]
+
+
+def test_columnar_layout_shares_one_date_axis(client):
+    body = client.get("/stocks/data", params={"symbols": "AAA,BBB", "layout": "columnar"}).json()
+    assert body["dates"] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    assert [entry["close"] for entry in body["data"]] == [[1.0, 2.0, 3.0], [None, 5.0, 6.0]]
+
+
+@pytest.mark.parametrize("period", ["7x", "99999d", "1d;drop"])
+def test_bad_periods_are_rejected(client, period):
+    assert client.get("/stocks/data", params={"symbols": "AAA", "period": period}).status_code == 422
@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from services import scheduler as scheduler_module
+from services.scheduler import JobQueue, SuggestionScheduler
+
+
+@pytest.fixture
+def refreshed(monkeypatch):
+    """Stub the chunk refresh; records each chunk and scores every symbol"""
+    chunks = []
+
+    def refresh(symbols):
+        chunks.append(list(symbols))
+        return {s: {"symbol": s, "action": "Buy"} if s != "BROKE" else {"symbol": s, "error": "no data"}
+                for s in symbols}
+
+    monkeypatch.setattr(scheduler_module, "_refresh_chunk", refresh)
+    monkeypatch.setattr(scheduler_module, "CHUNK_SIZE", 2)
+    return chunks
+
+
+def test_symbols_are_refreshed_in_chunks(refreshed):
+    scheduler = SuggestionScheduler(JobQueue(max_concurrency=2))
+    asyncio.run(scheduler.run_once(["AAPL", "MSFT", "TSLA"]))
+
+    assert sorted(refreshed) == [["AAPL", "MSFT"], ["TSLA"]]
+    assert scheduler.lookup(["TSLA", "NVDA"]) == [{"symbol": "TSLA", "action": "Buy"}, None]
+    assert scheduler.stats()["jobs"]["refresh_chunk"]["runs"] == 2
+    assert scheduler.as_of is not None
+
+
+def test_an_error_keeps_the_last_good_suggestion(refreshed):
+    scheduler = SuggestionScheduler(JobQueue())
+    scheduler.suggestions["BROKE"] = {"symbol": "BROKE", "action": "Hold"}
+    asyncio.run(scheduler.run_once(["BROKE", "NEW"]))
+    assert scheduler.lookup(["BROKE"]) == [{"symbol": "BROKE", "action": "Hold"}]
+
+
+def test_failed_jobs_are_counted_and_return_none():
+    jobs = JobQueue(max_concurrency=1)
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    async def run():
+        return await asyncio.gather(jobs.run("ok", lambda: 1), jobs.run("bad", fail))
+
+    assert asyncio.run(run()) == [1, None]
+    assert jobs.metrics["bad"]["failures"] == 1
+    assert jobs.metrics["ok"]["runs"] == 1
+    assert jobs.pending == 0
+
+
+def test_symbols_no_longer_held_are_dropped(refreshed):
+    scheduler = SuggestionScheduler(JobQueue())
+    asyncio.run(scheduler.run_once(["AAPL", "MSFT"]))
+    asyncio.run(scheduler.run_once(["MSFT", "TSLA"]))
+    assert scheduler.lookup(["AAPL", "MSFT", "TSLA"]) == [
+        None, {"symbol": "MSFT", "action": "Buy"}, {"symbol": "TSLA", "action": "Buy"}]
+    assert scheduler.stats()["symbols"] == 2
@@ -0,0 +1,58 @@
+import pytest
+from ml import sentiment
+
+
+class StubClassifier:
+    """Positive for headlines mentioning "beats", negative otherwise"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, batch_size=None, truncation=False):
+        self.calls.append(list(texts))
+        return [{"label": "POSITIVE" if "beats" in text else "NEGATIVE", "score": 0.9} for text in texts]
+
+
+@pytest.fixture
+def classifier(monkeypatch):
+    stub = StubClassifier()
+    monkeypatch.setattr(sentiment, "_classifier", stub)
+    sentiment._scores.clear()
+    return stub
+
+
+def article(n, title):
+    return {"title": title, "description": "", "url": f"https://news.example/{n}"}
+
+
+def test_articles_of_all_symbols_are_scored_in_one_pass(classifier):
+    articles = {
+        "AAPL": [article(1, "Apple beats estimates"), article(2, "Apple misses")],
+        "TSLA": [article(3, "Tesla beats deliveries")],
+        "NONE": [],
+    }
+    result = sentiment.get_news_sentiment_batch(list(articles), articles)
+
+    assert len(classifier.calls) == 1 and len(classifier.calls[0]) == 3
+    assert result["AAPL"] == pytest.approx((0.9 + 0.1) / 2)
+    assert result["TSLA"] == pytest.approx(0.9)
+    assert result["NONE"] == 0.5  # no news is neutral
+
+
+def test_each_article_is_classified_once(classifier):
+    first = [article(1, "Apple beats estimates"), article(2, "Apple misses")]
+    sentiment.score_articles(first)
+    scores = sentiment.score_articles(first + [article(3, "Tesla beats deliveries")])
+
+    assert [len(call) for call in classifier.calls] == [2, 1]
+    assert scores == pytest.approx([0.9, 0.1, 0.9])
+
+
+def test_classifier_failure_is_neutral_and_logged(monkeypatch, classifier, caplog):
+    def broken(*args, **kwargs):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(sentiment, "_classifier", broken)
+    result = sentiment.get_news_sentiment_batch(["AAPL"], {"AAPL": [article(1, "Apple beats estimates")]})
+    assert result == {"AAPL": 0.5}
+    assert "model unavailable" in caplog.text
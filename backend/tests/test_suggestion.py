@@ -0,0 +1,42 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import dependencies
+from ml import smart_recommender
+from routes import suggestion
+
+
+def _client(monkeypatch, stocks, precomputed):
+    monkeypatch.setattr(suggestion.scheduler, "lookup", lambda symbols: [precomputed.get(s) for s in symbols])
+    app = FastAPI()
+    app.include_router(suggestion.router)
+    app.dependency_overrides[dependencies.get_portfolio] = lambda: {"user_id": "alice", "stocks": stocks}
+    return TestClient(app)
+
+
+def test_live_results_are_matched_to_holdings_by_symbol(monkeypatch):
+    stocks = [{"symbol": s} for s in ("AAPL", "MSFT", "TSLA")]
+    # Live scoring returns the missing symbols in a different order
+    monkeypatch.setattr(suggestion, "generate_suggestion_smart", lambda record: [
+        {"symbol": s["symbol"], "action": "Buy"} for s in reversed(record["stocks"])])
+    client = _client(monkeypatch, stocks, {"MSFT": {"action": "Hold"}})
+
+    body = client.get("/suggestions/smart").json()
+    assert body["suggestions"] == [
+        {"symbol": "AAPL", "action": "Buy"},
+        {"symbol": "MSFT", "action": "Hold"},
+        {"symbol": "TSLA", "action": "Buy"},
+    ]
+
+
+def test_fallback_is_served_when_the_models_fail_to_load(monkeypatch):
+    def broken():
+        raise RuntimeError("model files missing")
+
+    monkeypatch.setattr(smart_recommender, "load_models", broken)
+    stocks = [{"symbol": s} for s in ("AAPL", "MSFT", "TSLA")]
+    client = _client(monkeypatch, stocks, {"MSFT": {"action": "Hold"}})
+
+    response = client.get("/suggestions/smart")
+    assert response.status_code == 200
+    assert [s["reason"] for s in response.json()["suggestions"]] == ["Fallback data - system error"]
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pydantic import ValidationError
+from models import PortfolioEntry
+from services import valuation
+from services.market_data import MarketDataUnavailable
+
+DATES = pd.to_datetime(["2024-03-04", "2024-03-05", "2024-03-06"])
+
+
+@pytest.fixture
+def closes(monkeypatch):
+    """Set the close matrix the stubbed market data returns"""
+    frame = {"value": pd.DataFrame(), "calls": 0}
+
+    def fetch_close_matrix(symbols, period):
+        frame["calls"] += 1
+        return frame["value"].reindex(columns=symbols)
+
+    monkeypatch.setattr(valuation, "fetch_close_matrix", fetch_close_matrix)
+    valuation._cache.clear()
+    return frame
+
+
+def lot(symbol, quantity, buy_price, buy_date="2024-03-04"):
+    return {"symbol": symbol, "quantity": quantity, "buy_price": buy_price, "buy_date": buy_date}
+
+
+def test_value_cost_and_returns(closes):
+    closes["value"] = pd.DataFrame({"AAPL": [100.0, 110.0, 121.0], "MSFT": [50.0, 50.0, 45.0]}, index=DATES)
+    result = valuation.value_portfolio("u1", [lot("AAPL", 10, 100), lot("msft", 20, 50)])
+
+    assert result["total_value"] == 10 * 121 + 20 * 45
+    assert result["unrealized_pnl"] == 10 * 21 - 20 * 5
+    assert result["daily_change"] == 10 * 11 - 20 * 5
+    by_symbol = {h["symbol"]: h for h in result["holdings"]}
+    assert by_symbol["MSFT"]["weight"] == pytest.approx(900 / 2110, abs=1e-4)
+    growth = (1100 + 1000) / 2000 * (1210 + 900) / (1100 + 1000)
+    assert result["time_weighted_return_pct"] == pytest.approx((growth - 1) * 100, abs=0.01)
+
+
+def test_buying_more_is_not_performance(closes):
+    closes["value"] = pd.DataFrame({"AAPL": [100.0, 100.0, 110.0]}, index=DATES)
+    result = valuation.value_portfolio("u2", [lot("AAPL", 1, 100), lot("AAPL", 99, 100, "2024-03-05")])
+    assert result["time_weighted_return_pct"] == pytest.approx(10.0)
+    assert result["holdings"][0]["quantity"] == 100
+
+
+def test_a_symbol_listed_later_is_not_back_filled(closes):
+    closes["value"] = pd.DataFrame({"AAPL": [100.0, 100.0, 100.0], "NEW": [np.nan, 10.0, 20.0]}, index=DATES)
+    result = valuation.value_portfolio("u3", [lot("AAPL", 1, 100), lot("NEW", 10, 10)])
+    # NEW only counts from its first pair of closes: (100 + 200) / (100 + 100)
+    assert result["time_weighted_return_pct"] == pytest.approx(50.0)
+
+
+def test_unchanged_holdings_and_bars_are_served_from_cache(closes):
+    closes["value"] = pd.DataFrame({"AAPL": [100.0, 110.0, 121.0]}, index=DATES)
+    first = valuation.value_portfolio("u4", [lot("AAPL", 1, 100)])
+    assert valuation.value_portfolio("u4", [lot("AAPL", 1, 100)]) is first
+
+    closes["value"] = pd.DataFrame({"AAPL": [100.0, 110.0, 132.0]}, index=DATES)
+    assert valuation.value_portfolio("u4", [lot("AAPL", 1, 100)])["total_value"] == 132
+
+
+def test_missing_prices_and_bad_symbols(closes):
+    closes["value"] = pd.DataFrame({"AAPL": [100.0, 110.0, 121.0]}, index=DATES)
+    with pytest.raises(MarketDataUnavailable):
+        valuation.value_portfolio("u5", [lot("AAPL", 1, 100), lot("GONE", 1, 10)])
+    with pytest.raises(ValueError):
+        valuation.value_portfolio("u5", [lot("../x", 1, 100)])
+
+
+def test_buy_dates_are_validated_and_stored_as_strings():
+    entry = PortfolioEntry(symbol="AAPL", quantity=1, buy_price=1.0, buy_date="2024-01-02")
+    assert entry.dict()["buy_date"] == "2024-01-02"
+    with pytest.raises(ValidationError):
+        PortfolioEntry(symbol="AAPL", quantity=1, buy_price=1.0, buy_date="2024-13-40")
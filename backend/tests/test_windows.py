@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+from ml.windows import (
+    LSTM_WINDOW, sliding_windows, window_labels, latest_windows, WindowScaler, WindowDataset,
+)
+from ml.features import lstm_dataset
+
+
+def loop_dataset(scaled_data, window=LSTM_WINDOW):
+    """The construction train_lstm.py used before the windowing utility"""
+    X, y = [], []
+    for i in range(window, len(scaled_data) - 1):
+        X.append(scaled_data[i - window:i])
+        y.append(1 if scaled_data[i + 1][0] > scaled_data[i][0] else 0)
+    return np.array(X), np.array(y)
+
+
+@pytest.fixture
+def series():
+    return np.cumprod(1 + np.random.default_rng(7).normal(0, 0.02, 400)) * 100
+
+
+@pytest.mark.parametrize("window", [5, LSTM_WINDOW])
+def test_windows_and_labels_match_the_old_loop(series, window):
+    expected_X, expected_y = loop_dataset(series[:, np.newaxis], window)
+    X, y = lstm_dataset(series, window)
+    np.testing.assert_array_equal(X, expected_X)
+    np.testing.assert_array_equal(y, expected_y)
+
+
+def test_windows_are_views_not_copies(series):
+    windows = sliding_windows(series)
+    assert np.shares_memory(windows, series)
+    assert windows.shape == (len(series) - LSTM_WINDOW - 1, LSTM_WINDOW)
+
+
+@pytest.mark.parametrize("length", [0, LSTM_WINDOW, LSTM_WINDOW + 1])
+def test_short_series_have_no_samples(length):
+    series = np.arange(length, dtype=float)
+    assert sliding_windows(series).shape == (0, LSTM_WINDOW)
+    assert window_labels(series).shape == (0,)
+
+
+def test_latest_windows_are_each_rows_tail():
+    matrix = np.arange(2 * 40, dtype=float).reshape(2, 40)
+    batch = latest_windows(matrix)
+    assert batch.shape == (2, LSTM_WINDOW, 1)
+    np.testing.assert_array_equal(batch[:, :, 0], matrix[:, -LSTM_WINDOW:])
+
+
+def test_scaler_modes_and_artifact_round_trip():
+    windows = np.array([[[1.0], [4.0], [2.0]], [[10.0], [5.0], [20.0]]])
+    per_window = WindowScaler("window")
+    np.testing.assert_allclose(per_window.transform(windows)[:, :, 0], [[0.25, 1, 0.5], [0.5, 0.25, 1]])
+
+    global_scale = WindowScaler("global", 1 / 20)
+    np.testing.assert_allclose(global_scale.transform(windows), windows / 20)
+
+    for scaler in (per_window, global_scale):
+        restored = WindowScaler.from_artifact(scaler.to_artifact())
+        assert (restored.mode, restored.scale) == (scaler.mode, pytest.approx(scaler.scale))
+    with pytest.raises(ValueError):
+        WindowScaler("minmax")
+
+
+def test_dataset_matches_per_symbol_construction(tmp_path):
+    rng = np.random.default_rng(3)
+    series_by_symbol = [np.cumprod(1 + rng.normal(0, 0.02, n)) * p for n, p in ((120, 50), (31, 10), (90, 300))]
+    scaler = WindowScaler("window")
+    dataset = WindowDataset.create(str(tmp_path / "series.npy"), series_by_symbol, scaler=scaler)
+
+    expected_X, expected_y = [], []
+    for series in series_by_symbol:
+        X, y = loop_dataset(series.astype(np.float32)[:, np.newaxis])
+        if len(X):
+            expected_X.append(scaler.transform(X))
+            expected_y.append(y)
+    expected_X, expected_y = np.concatenate(expected_X), np.concatenate(expected_y)
+
+    train, test = dataset.split()
+    assert len(test) == 0 and len(train) == len(dataset) == len(expected_y)
+    X, y = dataset.take(train)
+    np.testing.assert_allclose(X, expected_X, rtol=1e-6)
+    np.testing.assert_array_equal(y, expected_y)
+
+    # Streaming the same windows in batches gives the same data
+    streamed = list(dataset.batches(train, batch_size=17))
+    np.testing.assert_allclose(np.concatenate([b[0] for b in streamed]), expected_X, rtol=1e-6)
+    np.testing.assert_array_equal(np.concatenate([b[1] for b in streamed]), expected_y)
+
+
+def test_split_holds_out_each_symbols_latest_windows(tmp_path):
+    dataset = WindowDataset.create(str(tmp_path / "series.npy"), [np.arange(1, 132.0), np.arange(1, 72.0)])
+    train, test = dataset.split(test_fraction=0.25)
+    # 100 and 40 windows per symbol; the last quarter of each is held out
+    assert len(train) == 75 + 30 and len(test) == 25 + 10
+    np.testing.assert_array_equal(train, np.r_[0:75, 131:161])
+    np.testing.assert_array_equal(test, np.r_[75:100, 161:171])
+
+
+def test_dataset_reads_through_a_memmap(tmp_path):
+    dataset = WindowDataset.create(str(tmp_path / "series.npy"), [np.arange(1, 200.0)])
+    assert isinstance(dataset.series, np.memmap)
+    assert np.shares_memory(dataset._windows, dataset.series)